@@ -0,0 +1,60 @@
+"""
+Measure URIParser.parse throughput with a cold and a warm cache.
+
+Usage: python benchmarks/uri_parser_bench.py [number of URIs]
+"""
+
+import functools
+import sys
+import timeit
+
+from geneflow.uri_parser import URIParser
+
+
+def _parse_all(uris, clear=False):
+    """Parse all URIs, optionally clearing the cache first."""
+    if clear:
+        URIParser.clear_cache()
+    for uri in uris:
+        URIParser.parse(uri)
+
+
+def benchmark(count=10000):
+    """
+    Measure parse throughput.
+
+    With a cold cache, the cache is cleared before each run, so every URI
+    is parsed. With a warm cache, all URIs are parsed once before timing,
+    so every URI is a cache hit. The count is capped at the cache size so
+    that warm runs do not evict entries.
+
+    Args:
+        count: number of unique URIs to parse in each run.
+
+    Returns:
+        Dict of workload name -> URIs parsed per second.
+
+    """
+    count = min(count, URIParser.cache_size)
+    uris = [
+        'local:/data/work/job-1234abcd/step{}/sample_{:06d}.fastq.gz'\
+            .format(i % 7, i) for i in range(count)
+    ]
+
+    cold = min(timeit.repeat(
+        functools.partial(_parse_all, uris, clear=True), number=1, repeat=5
+    ))
+
+    _parse_all(uris, clear=True)
+    warm = min(timeit.repeat(
+        functools.partial(_parse_all, uris), number=1, repeat=5
+    ))
+
+    return {'cold cache': count / cold, 'warm cache': count / warm}
+
+
+if __name__ == '__main__':
+    for workload, rate in benchmark(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ).items():
+        print('{}: {:.0f} parses/s'.format(workload, rate))
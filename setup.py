@@ -53,6 +53,7 @@ setup(
     package_dir={'': 'src'},
     package_data={'': ['data/sql/geneflow.sql',
                        'data/sql/geneflow-sqlite.sql',
+                       'data/migrations/*.sql',
                        'data/templates/wrapper-script.sh.j2',
                        'data/templates/test.sh.j2']},
     include_package_data=True,
@@ -7,6 +7,7 @@ import argparse
 import geneflow.cli.common
 import geneflow.cli.add_apps
 import geneflow.cli.add_workflows
+import geneflow.cli.cache
 import geneflow.cli.help
 import geneflow.cli.init_db
 import geneflow.cli.install_workflow
@@ -65,6 +66,7 @@ def parse_args():
     # configure arguments for sub-commands
     subparser_dict['add-apps'] = geneflow.cli.add_apps.init_subparser(subparsers)
     subparser_dict['add-workflows'] = geneflow.cli.add_workflows.init_subparser(subparsers)
+    subparser_dict['cache'] = geneflow.cli.cache.init_subparser(subparsers)
     subparser_dict['help'] = geneflow.cli.help.init_subparser(subparsers)
     subparser_dict['init-db'] = geneflow.cli.init_db.init_subparser(subparsers)
     subparser_dict['install-workflow'] = geneflow.cli.install_workflow.init_subparser(subparsers)
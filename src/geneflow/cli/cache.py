@@ -0,0 +1,92 @@
+"""Module containing GeneFlow cache sub-command."""
+
+
+import datetime
+
+from geneflow.log import Log
+from geneflow.result_cache import ResultCache
+
+
+def init_subparser(subparsers):
+    """
+    Initialize argument sub-parser for cache sub-command.
+
+    Args:
+        subparsers: list of argument subparsers.
+
+    Returns:
+        None
+
+    """
+    parser = subparsers.add_parser(
+        'cache', help='inspect and prune result cache'
+    )
+    parser.add_argument(
+        'action',
+        type=str,
+        choices=['list', 'prune', 'clear'],
+        help='list entries, evict least recently used entries, or clear cache'
+    )
+    parser.add_argument(
+        '-p', '--path',
+        type=str,
+        default='~/.geneflow/cache',
+        help='result cache directory'
+    )
+    parser.add_argument(
+        '-s', '--size',
+        type=int,
+        default=10737418240,
+        help='maximum cache size in bytes after pruning'
+    )
+    parser.set_defaults(func=cache)
+
+    return parser
+
+
+def cache(args, other_args, subparser=None):
+    """
+    List, prune or clear the result cache.
+
+    Args:
+        args.action: list, prune or clear.
+        args.path: result cache directory.
+        args.size: maximum cache size for prune.
+
+    Returns:
+        On success: True.
+        On failure: False.
+
+    """
+    result_cache = ResultCache(args.path)
+    if not result_cache.initialize():
+        Log.an().error('cannot open result cache: %s', args.path)
+        return False
+
+    if args.action == 'list':
+        entries = result_cache.list()
+        for entry in entries:
+            print('{}  {:>12}  {}  {}  {}'.format(
+                entry['key'][:16],
+                entry['size'],
+                datetime.datetime.fromtimestamp(entry['accessed'])\
+                    .strftime('%Y-%m-%d %H:%M:%S'),
+                entry['app'],
+                entry['name']
+            ))
+        print('{} entries, {} bytes'.format(
+            len(entries), sum(entry['size'] for entry in entries)
+        ))
+
+    else:
+        if args.action == 'prune':
+            num_entries, num_bytes = result_cache.prune(args.size)
+        else:
+            num_entries, num_bytes = result_cache.clear()
+        Log.some().info(
+            'evicted %s cache entries, %s bytes', num_entries, num_bytes
+        )
+
+    result_cache.close()
+
+    return True
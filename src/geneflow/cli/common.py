@@ -5,7 +5,7 @@ from geneflow.log import Log
 from geneflow.workflow import Workflow
 
 
-def run_workflow(job, config, log_level):
+def run_workflow(job, config, log_level, resume=False):
     """
     Run a GeneFlow workflow.
 
@@ -13,6 +13,7 @@ def run_workflow(job, config, log_level):
         job: job dict describing run.
         config: GeneFlow configuration dict.
         log_level: logging level for this run.
+        resume: skip steps and map items finished in a previous run.
 
     Returns:
         On success: Workflow job dict.
@@ -25,7 +26,7 @@ def run_workflow(job, config, log_level):
     Log.some().info('job loaded: %s -> %s', job['name'], job['id'])
 
     # run job
-    workflow = Workflow(job['id'], config)
+    workflow = Workflow(job['id'], config, resume=resume)
     if not workflow.initialize():
         Log.an().error('workflow initialization failed: job_id=%s', job['id'])
         return False
@@ -42,7 +42,7 @@ def init_subparser(subparsers):
 
 def migrate_db(args, other_args, subparser=None):
     """
-    Migrate SQL DB schema. Currently only works for MySQL databases.
+    Migrate SQL DB schema of MySQL or SQLite databases.
 
     Args:
         args.config: GeneFlow config file path.
@@ -66,20 +66,27 @@ def migrate_db(args, other_args, subparser=None):
         Log.an().error('invalid config environment: %s', environment)
         return False
 
-    if config_dict['database']['type'] != 'mysql':
-        Log.an().error('only mysql databases can be migrated')
-        return False
-
-    migrations_path = str(Path(GF_PACKAGE_PATH, 'data/migrations'))
-
-    try:
-        database = get_backend('{}://{}:{}@{}/{}'.format(
+    if config_dict['database']['type'] == 'mysql':
+        database_uri = '{}://{}:{}@{}/{}'.format(
             config_dict['database']['type'],
             config_dict['database']['user'],
             config_dict['database']['password'],
             config_dict['database']['host'],
             config_dict['database']['database']
-        ))
+        )
+    elif config_dict['database']['type'] == 'sqlite':
+        database_uri = 'sqlite:///{}'.format(config_dict['database']['path'])
+    else:
+        Log.an().error(
+            'cannot migrate database of type: %s',
+            config_dict['database']['type']
+        )
+        return False
+
+    migrations_path = str(Path(GF_PACKAGE_PATH, 'data/migrations'))
+
+    try:
+        database = get_backend(database_uri)
         migrations = read_migrations(migrations_path)
         with database.lock():
             database.apply_migrations(database.to_apply(migrations))
@@ -27,6 +27,12 @@ def init_subparser(subparsers):
         type=str,
         help='GeneFlow workflow definition or package directory'
     )
+    parser.add_argument(
+        '--resume',
+        type=str,
+        default=None,
+        help='resume a failed or interrupted job with this job id'
+    )
     parser.set_defaults(func=run)
 
     return parser
@@ -90,6 +96,67 @@ def apply_job_modifiers(jobs_dict, job_mods):
             set_dict_key_list(job, keys, job_mods[key])
 
 
+def resume(args, workflow_path):
+    """
+    Resume a failed or interrupted GeneFlow job.
+
+    Steps that finished and whose outputs still exist are skipped, and
+    finished map items of other steps are kept.
+
+    Args:
+        args.resume: job id, or a unique prefix of at least 8 characters.
+        workflow_path: path to workflow definition.
+
+    Returns:
+        On success: True.
+        On failure: False.
+
+    """
+    # find the session database of the job
+    session = Environment().find_job_session(args.resume)
+    if not session:
+        Log.an().error('cannot find job to resume: %s', args.resume)
+        return False
+    session_id, job_id = session
+
+    # setup environment with existing session
+    env = Environment(workflow_path=workflow_path, session_id=session_id)
+    if not env.initialize(init_db=False):
+        Log.an().error('cannot initialize geneflow environment')
+        return False
+
+    cfg = Config()
+    if not cfg.load(env.get_config_path()):
+        Log.an().error('cannot load config file: %s', env.get_config_path())
+        return False
+    config_dict = cfg.config('local')
+
+    try:
+        data_source = DataSource(config_dict['database'])
+    except DataSourceException as err:
+        Log.an().error('data source initialization error [%s]', str(err))
+        return False
+
+    job = data_source.get_job_by_id(job_id)
+    if not job:
+        Log.an().error('cannot load job: %s', job_id)
+        return False
+
+    # close pooled db connections before running the job
+    DataSource.dispose_engines()
+
+    return geneflow.cli.common.run_workflow(
+        {
+            'name': job[0]['name'],
+            'id': job_id,
+            'log': None
+        },
+        config=config_dict,
+        log_level=args.log_level,
+        resume=True
+    )
+
+
 def run(args, other_args, subparser):
     """
     Run GeneFlow workflow engine.
@@ -111,6 +178,9 @@ def run(args, other_args, subparser):
         Log.an().error('cannot find workflow definition: %s', args.workflow_path)
         return False
 
+    if args.resume:
+        return resume(args, workflow_path)
+
     # setup environment
     env = Environment(workflow_path=workflow_path)
     if not env.initialize():
@@ -253,6 +323,27 @@ def run(args, other_args, subparser):
             default=[],
             help='Execution Parameters'
         )
+        dynamic_parser.add_argument(
+            '--step-limit',
+            type=int,
+            default=None,
+            dest='step_limit',
+            help='Maximum Number of Concurrent Steps (0 for no limit)'
+        )
+        dynamic_parser.add_argument(
+            '--disk-min-free',
+            type=int,
+            default=None,
+            dest='disk_min_free',
+            help='Bytes of Free Disk Space to Keep (0 for no limit)'
+        )
+        dynamic_parser.add_argument(
+            '--disk-min-free-inodes',
+            type=int,
+            default=None,
+            dest='disk_min_free_inodes',
+            help='Number of Free Inodes to Keep (0 for no limit)'
+        )
 
         dynamic_args = dynamic_parser.parse_known_args(other_args)
 
@@ -261,6 +352,15 @@ def run(args, other_args, subparser):
 
     dynamic_args = parse_dynamic_args(workflow_dict)
 
+    # override config with known cli options
+    if dynamic_args.step_limit is not None:
+        config_dict['run_step_limit'] = max(0, dynamic_args.step_limit)
+    if dynamic_args.disk_min_free is not None:
+        config_dict['disk_min_free'] = max(0, dynamic_args.disk_min_free)
+    if dynamic_args.disk_min_free_inodes is not None:
+        config_dict['disk_min_free_inodes']\
+            = max(0, dynamic_args.disk_min_free_inodes)
+
     # get absolute path to job file if provided
     job_path = None
     if dynamic_args.job_path:
@@ -411,6 +511,9 @@ def run(args, other_args, subparser):
         return False
     data_source.commit()
 
+    # close pooled db connections so they are not shared with workers
+    DataSource.dispose_engines()
+
     # create process pool to run workflows in parallel
     pool = Pool(min(5, len(job_ids)))
     jobs = [
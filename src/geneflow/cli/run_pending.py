@@ -1,6 +1,7 @@
 """This module contains methods for the run-pending CLI command."""
 
 
+import json
 from pathlib import Path
 from multiprocessing import Pool
 from functools import partial
@@ -10,6 +11,8 @@ import geneflow.cli.common
 from geneflow.config import Config
 from geneflow.log import Log
 from geneflow.data import DataSource, DataSourceException
+from geneflow.disk_admission import DiskAdmission
+from geneflow.uri_parser import URIParser
 
 
 def init_subparser(subparsers):
@@ -41,6 +44,63 @@ def init_subparser(subparsers):
     return parser
 
 
+def admit_jobs(pending_jobs, config_dict, data_source):
+    """
+    Select the pending jobs that fit in the free disk space.
+
+    If the "disk_min_free" or "disk_min_free_inodes" config setting is set,
+    jobs are admitted in queued order as long as the free space of their
+    local work and output URIs stays above the threshold after their
+    expected outputs. Expected outputs are estimated from previous jobs of
+    the same workflow. Jobs that are not admitted stay pending.
+
+    Args:
+        pending_jobs: list of pending job dicts.
+        config_dict: config environment dict.
+        data_source: DataSource instance.
+
+    Returns:
+        List of admitted job dicts.
+
+    """
+    reserved = {}
+    estimates = {}
+    admitted = []
+    for job in pending_jobs:
+        parsed_uris = [
+            URIParser.parse(uri) for uri in [
+                json.loads(job['work_uri'] or '{}').get('local'),
+                job['output_uri']
+            ] if uri
+        ]
+        admission = DiskAdmission(
+            [
+                parsed_uri['chopped_path'] for parsed_uri in parsed_uris
+                if parsed_uri and parsed_uri['scheme'] == 'local'
+            ],
+            config_dict.get('disk_min_free', 0),
+            config_dict.get('disk_min_free_inodes', 0),
+            reserved
+        )
+        if not admission.enabled:
+            admitted.append(job)
+            continue
+
+        if job['workflow_id'] not in estimates:
+            estimates[job['workflow_id']] = data_source\
+                .get_workflow_output_estimate(job['workflow_id']) or 0
+
+        if admission.admit(job['id'], estimates[job['workflow_id']]):
+            admitted.append(job)
+        else:
+            Log.a().warning(
+                'low free disk space, job stays pending: %s (%s)',
+                job['name'], job['id']
+            )
+
+    return admitted
+
+
 def run_pending(args, other_args, subparser=None):
     """
     Run any jobs in database in the PENDING state.
@@ -90,6 +150,11 @@ def run_pending(args, other_args, subparser=None):
         'pending jobs found:\n%s', pprint.pformat(pending_jobs)
     )
 
+    # hold jobs that would fill up the disk
+    pending_jobs = admit_jobs(pending_jobs, config_dict, data_source)
+    if not pending_jobs:
+        return True
+
     # set job status to QUEUED to minimize the chance that another
     # process will try to run it
     for job in pending_jobs:
@@ -98,6 +163,9 @@ def run_pending(args, other_args, subparser=None):
             data_source.rollback()
         data_source.commit()
 
+    # close pooled db connections so they are not shared with workers
+    DataSource.dispose_engines()
+
     # create a thread pool to run at most 5 jobs concurrently
     pool = Pool(min(5, len(pending_jobs)))
     jobs = [
@@ -22,6 +22,26 @@ CONFIG_MAIN_SCHEMA = {
 ENV_SCHEMA = {
     GF_VERSION: {
         'run_poll_delay': {'type': 'integer', 'default': 2},
+        'run_step_limit': {'type': 'integer', 'default': 0, 'min': 0},
+        'status_flush_interval': {'type': 'number', 'default': 5, 'min': 0},
+        'status_flush_items': {'type': 'integer', 'default': 1000, 'min': 1},
+        'map_batch_size': {'type': 'integer', 'default': 1000, 'min': 1},
+        'data_cache_size': {'type': 'integer', 'default': 1024, 'min': 0},
+        'copy_threads': {'type': 'integer', 'default': 8, 'min': 1},
+        'copy_chunk_size': {
+            'type': 'integer', 'default': 67108864, 'min': 1048576
+        },
+        'stage_strategy': {
+            'type': 'string', 'default': 'auto',
+            'allowed': ['copy', 'hardlink', 'reflink', 'symlink', 'auto']
+        },
+        'stage_concurrency': {'type': 'integer', 'default': 4, 'min': 1},
+        'sync_checksum': {'type': 'boolean', 'default': False},
+        'sync_delete': {'type': 'boolean', 'default': False},
+        'cache_path': {'type': 'string', 'default': '~/.geneflow/cache'},
+        'cache_size': {'type': 'integer', 'default': 10737418240, 'min': 0},
+        'disk_min_free': {'type': 'integer', 'default': 0, 'min': 0},
+        'disk_min_free_inodes': {'type': 'integer', 'default': 0, 'min': 0},
         'database': {
             'type': 'dict',
             'default': {
@@ -43,7 +63,9 @@ DATABASE_SCHEMA = {
             'host': {'type': 'string', 'required': True},
             'database': {'type': 'string', 'required': True},
             'user': {'type': 'string', 'required': True},
-            'password': {'type': 'string', 'required': True}
+            'password': {'type': 'string', 'required': True},
+            'pool_size': {'type': 'integer', 'default': 5, 'min': 1},
+            'pool_recycle': {'type': 'integer', 'default': 3600}
         }
     }
 }
@@ -11,8 +11,11 @@ import os
 import uuid
 import yaml
 
-from sqlalchemy import create_engine, asc, desc, case
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import create_engine, asc, desc, case, func
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Integer, String, Text
+)
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
@@ -25,6 +28,10 @@ from geneflow.log import Log
 Base = declarative_base()
 Session = sessionmaker()
 
+# engines shared by all DataSource instances in a process, keyed by
+# process id and database config
+_ENGINES = {}
+
 
 #### SQLAlchemy table definitions
 
@@ -135,6 +142,34 @@ class JobStepEntity(Base):
     msg = Column(String, default='')
 
 
+class JobStepItemEntity(Base):
+    """SQLAlchemy table definition for the GeneFlow job_step_item table."""
+
+    __tablename__ = 'job_step_item'
+
+    job_id = Column(String, primary_key=True)
+    step_id = Column(String, primary_key=True)
+    item = Column(String, primary_key=True)
+    status = Column(String, default='PENDING')
+    attempt = Column(Integer, default=0)
+    pid = Column(Integer, default=0)
+    hpc_job_id = Column(String, default='')
+    started = Column(DateTime)
+    finished = Column(DateTime)
+
+
+class JobStepOutputEntity(Base):
+    """SQLAlchemy table definition for the GeneFlow job_step_output table."""
+
+    __tablename__ = 'job_step_output'
+
+    job_id = Column(String, primary_key=True)
+    step_id = Column(String, primary_key=True)
+    output_bytes = Column(BigInteger, default=0)
+    output_items = Column(Integer, default=0)
+    finished = Column(DateTime, default=datetime.datetime.now)
+
+
 #### Main GeneFlow database class
 
 
@@ -164,40 +199,105 @@ class DataSource:
 
         """
         self._db_conf = db_conf
+        self._engine = self.get_engine(db_conf)
+        self._session = Session(bind=self._engine)
+
+
+    @staticmethod
+    def _create_engine(db_conf):
+        """
+        Create a pooled SQLAlchemy engine from database config.
+
+        Args:
+            db_conf: database configuration dict.
+
+        Returns:
+            SQLAlchemy engine.
+
+        """
         if db_conf['type'] == 'mysql':
             try:
-                self._engine = create_engine(
+                return create_engine(
                     'mysql+pymysql://{}:{}@{}/{}'.format(
                         db_conf['user'],
                         db_conf['password'],
                         db_conf['host'],
                         db_conf['database']
-                    )
+                    ),
+                    pool_size=db_conf.get('pool_size', 5),
+                    pool_recycle=db_conf.get('pool_recycle', 3600)
                 )
             except SQLAlchemyError as err:
                 Log.an().error('sql exception [%s]', str(err))
                 raise DataSourceException('DataSource() init failed')
 
-        elif db_conf['type'] == 'sqlite':
+        if db_conf['type'] == 'sqlite':
             try:
-                self._engine = create_engine('sqlite:///{}'.format(
+                return create_engine('sqlite:///{}'.format(
                     db_conf['path']
                 ))
             except SQLAlchemyError as err:
                 Log.an().error('sql exception [%s]', str(err))
                 raise DataSourceException('DataSource() init failed')
 
-        else:
-            Log.an().error('invalid db type: %s', db_conf['type'])
-            raise DataSourceException('DataSource() init failed')
+        Log.an().error('invalid db type: %s', db_conf['type'])
+        raise DataSourceException('DataSource() init failed')
 
-        self._session = Session(bind=self._engine)
+
+    @classmethod
+    def get_engine(cls, db_conf):
+        """
+        Return the engine shared by this process for a database config.
+
+        Engines (and their connection pools) are created once per process,
+        so forked workers never reuse connections of the parent process.
+
+        Args:
+            db_conf: database configuration dict.
+
+        Returns:
+            SQLAlchemy engine.
+
+        """
+        key = (
+            os.getpid(),
+            tuple(sorted((k, str(v)) for k, v in db_conf.items()))
+        )
+        if key not in _ENGINES:
+            _ENGINES[key] = cls._create_engine(db_conf)
+
+        return _ENGINES[key]
+
+
+    @staticmethod
+    def dispose_engines():
+        """
+        Close all pooled connections of this process.
+
+        Call before forking worker processes so that no open connections are
+        inherited by the workers.
+
+        Args:
+            None.
+
+        Returns:
+            True.
+
+        """
+        pid = os.getpid()
+        for key in list(_ENGINES):
+            if key[0] == pid:
+                _ENGINES.pop(key).dispose()
+
+        return True
 
 
     def commit(self):
         """
         Commit current transaction to the database and closes the session.
 
+        The session's connection is returned to the engine's pool.
+
         Args:
             self: class instance.
 
@@ -211,6 +311,26 @@ class DataSource:
         return True
 
 
+    def close(self):
+        """
+        Close the session after reading from the database.
+
+        The session's connection is returned to the engine's pool right
+        away, rather than when the session is garbage collected, which may
+        happen in another thread.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            True.
+
+        """
+        self._session.close()
+
+        return True
+
+
     def rollback(self):
         """
         Rollback current database transaction.
@@ -1477,6 +1597,30 @@ class DataSource:
         return result_dict
 
 
+    def get_job_steps_by_job_id(self, job_id):
+        """
+        Get status and detail of all steps of a job.
+
+        Args:
+            job_id: job id string of the JobStepEntity.
+
+        Returns:
+            On success: list of dicts of JobStepEntity.
+            On failure: False.
+
+        """
+        try:
+            result = self._session.query(JobStepEntity).\
+                filter(JobStepEntity.job_id == job_id).\
+                all()
+            result_dict = self.result_dict(result)
+        except SQLAlchemyError as err:
+            Log.an().error('sql exception [%s]', str(err))
+            return False
+
+        return result_dict
+
+
     def add_job_step(self, data):
         """
         Add a job step to the current session.
@@ -1502,7 +1646,9 @@ class DataSource:
         return True
 
 
-    def update_job_step_status(self, step_id, job_id, status, detail, msg):
+    def update_job_step_status(
+            self, step_id, job_id, status, detail, msg, items=None
+    ):
         """
         Update job step status in current session.
 
@@ -1510,29 +1656,169 @@ class DataSource:
             step_id: step id string of the JobStepEntity.
             job_id: job id string of the JobStepEntity.
             status: status string of the JobStepEntity.
-            detail: string with detailed description.
+            detail: string with detailed description, or None to leave the
+                existing description unchanged.
             msg: a string for message.
+            items: dict of changed map items, keyed by item name. Each value
+                is a dict with any of the JobStepItemEntity columns 'status',
+                'attempt', 'pid', 'hpc_job_id', 'started', and 'finished'.
+                Only these items are inserted or updated.
 
         Returns:
             On success: True.
             On failure: False.
 
         """
+        values = {
+            'status': status,
+            'msg': case(
+                [(JobStepEntity.msg == '', msg)],
+                else_=JobStepEntity.msg+'|'+msg
+            )
+        }
+        if detail is not None:
+            values['detail'] = detail
+
         try:
             self._session.query(JobStepEntity).\
                 filter(JobStepEntity.step_id == step_id).\
                 filter(JobStepEntity.job_id == job_id).\
-                update(
-                    {
-                        'status': status,
-                        'detail': detail,
-                        'msg': case(
-                            [(JobStepEntity.msg == '', msg)],
-                            else_=JobStepEntity.msg+'|'+msg
+                update(values, synchronize_session=False)
+        except SQLAlchemyError as err:
+            Log.an().error('sql exception [%s]', str(err))
+            return False
+
+        if items and not self.upsert_job_step_items(step_id, job_id, items):
+            return False
+
+        return True
+
+
+    def upsert_job_step_items(self, step_id, job_id, items):
+        """
+        Insert or update map item rows of a job step in current session.
+
+        Rows are written with the upsert statement of the database, i.e.,
+        "INSERT ... ON CONFLICT DO UPDATE" for sqlite and "INSERT ... ON
+        DUPLICATE KEY UPDATE" for mysql.
+
+        Args:
+            step_id: step id string of the JobStepItemEntity.
+            job_id: job id string of the JobStepItemEntity.
+            items: dict of map items keyed by item name, see
+                update_job_step_status().
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        # items with the same changed columns are written with one
+        # statement per chunk, staying below the sqlite limit on query
+        # parameters
+        groups = {}
+        for name, values in items.items():
+            groups.setdefault(tuple(sorted(values)), []).append(
+                dict(values, job_id=job_id, step_id=step_id, item=name)
+            )
+
+        table = JobStepItemEntity.__table__
+        chunk_size = 999 // len(table.columns)
+        try:
+            for columns, rows in groups.items():
+                for i in range(0, len(rows), chunk_size):
+                    if self._engine.dialect.name == 'mysql':
+                        stmt = mysql.insert(table).\
+                            values(rows[i:i+chunk_size])
+                        stmt = stmt.on_duplicate_key_update({
+                            column: stmt.inserted[column]
+                            for column in columns or ['item']
+                        })
+                    else:
+                        stmt = sqlite.insert(table).\
+                            values(rows[i:i+chunk_size])
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=['job_id', 'step_id', 'item'],
+                            set_={
+                                column: stmt.excluded[column]
+                                for column in columns or ['item']
+                            }
                         )
-                    },
-                    synchronize_session=False
-                )
+                    self._session.execute(stmt)
+
+        except SQLAlchemyError as err:
+            Log.an().error('sql exception [%s]', str(err))
+            return False
+
+        return True
+
+
+    def get_job_step_items(
+            self, job_id, step_id, status=None, offset=0, limit=100
+    ):
+        """
+        Get a page of map items of a job step.
+
+        Args:
+            job_id: job id string of the JobStepItemEntity.
+            step_id: step id string of the JobStepItemEntity.
+            status: only return items with this status, if given.
+            offset: number of items to skip.
+            limit: maximum number of items to return.
+
+        Returns:
+            On success: list of dicts of JobStepItemEntity, ordered by item
+                name.
+            On failure: False.
+
+        """
+        try:
+            query = self._session.query(JobStepItemEntity).\
+                filter(JobStepItemEntity.job_id == job_id).\
+                filter(JobStepItemEntity.step_id == step_id)
+            if status:
+                query = query.filter(JobStepItemEntity.status == status)
+            result = query.\
+                order_by(asc(JobStepItemEntity.item)).\
+                offset(offset).\
+                limit(limit).\
+                all()
+            result_dict = self.result_dict(result)
+        except SQLAlchemyError as err:
+            Log.an().error('sql exception [%s]', str(err))
+            return False
+
+        return result_dict
+
+
+    def update_job_step_output(self, step_id, job_id, output_bytes, items):
+        """
+        Record the output size of a finished job step in current session.
+
+        Args:
+            step_id: step id string of the JobStepOutputEntity.
+            job_id: job id string of the JobStepOutputEntity.
+            output_bytes: size of the step output in bytes.
+            items: number of map items of the step.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        values = {
+            'output_bytes': output_bytes,
+            'output_items': items,
+            'finished': datetime.datetime.now()
+        }
+        try:
+            if not self._session.query(JobStepOutputEntity).\
+                    filter(JobStepOutputEntity.step_id == step_id).\
+                    filter(JobStepOutputEntity.job_id == job_id).\
+                    update(values, synchronize_session=False):
+                self._session.add(JobStepOutputEntity(
+                    step_id=step_id, job_id=job_id, **values
+                ))
         except SQLAlchemyError as err:
             Log.an().error('sql exception [%s]', str(err))
             return False
@@ -1540,9 +1826,92 @@ class DataSource:
         return True
 
 
+    def get_app_output_estimate(self, name, version, limit=20):
+        """
+        Estimate the output size of a map item of an app.
+
+        The estimate is the largest output size per map item of the most
+        recent job steps that ran the same app name and version.
+
+        Args:
+            name: app name.
+            version: app version.
+            limit: number of recent job steps to consider.
+
+        Returns:
+            On success: size in bytes, 0 if the app has not run before.
+            On failure: False.
+
+        """
+        try:
+            result = self._session.query(
+                JobStepOutputEntity.output_bytes,
+                JobStepOutputEntity.output_items
+            ).\
+                filter(JobStepOutputEntity.step_id == StepEntity.id).\
+                filter(StepEntity.app_id == AppEntity.id).\
+                filter(AppEntity.name == name).\
+                filter(AppEntity.version == version).\
+                order_by(desc(JobStepOutputEntity.finished)).\
+                limit(limit).\
+                all()
+        except SQLAlchemyError as err:
+            Log.an().error('sql exception [%s]', str(err))
+            return False
+
+        return max(
+            [-(-row[0] // max(row[1], 1)) for row in result], default=0
+        )
+
+
+    def get_workflow_output_estimate(self, workflow_id, limit=20):
+        """
+        Estimate the total output size of a job of a workflow.
+
+        The estimate is the largest total output size of the steps of the
+        most recent jobs that ran the same workflow name and version.
+
+        Args:
+            workflow_id: workflow ID.
+            limit: number of recent jobs to consider.
+
+        Returns:
+            On success: size in bytes, 0 if the workflow has not run before.
+            On failure: False.
+
+        """
+        try:
+            workflow = self._session.query(
+                WorkflowEntity.name,
+                WorkflowEntity.version
+            ).\
+                filter(WorkflowEntity.id == workflow_id).\
+                first()
+            if not workflow:
+                return 0
+
+            result = self._session.query(
+                func.sum(JobStepOutputEntity.output_bytes)
+            ).\
+                filter(JobStepOutputEntity.job_id == JobEntity.id).\
+                filter(JobEntity.workflow_id == WorkflowEntity.id).\
+                filter(WorkflowEntity.name == workflow[0]).\
+                filter(WorkflowEntity.version == workflow[1]).\
+                group_by(JobStepOutputEntity.job_id).\
+                order_by(desc(func.max(JobStepOutputEntity.finished))).\
+                limit(limit).\
+                all()
+        except SQLAlchemyError as err:
+            Log.an().error('sql exception [%s]', str(err))
+            return False
+
+        return max([int(row[0] or 0) for row in result], default=0)
+
+
     def delete_job_step_by_workflow_id(self, workflow_id):
         """
-        Delete JobStepEntity by workflow id.
+        Delete JobStepEntity, JobStepItemEntity and JobStepOutputEntity by
+        workflow id.
 
         Args:
             workflow_id: the id string of the JobStepEntity workflow.
@@ -1557,6 +1926,12 @@ class DataSource:
             # for sqlite
             sub_query = self._session.query(JobEntity.id).\
                 filter(JobEntity.workflow_id == workflow_id)
+            self._session.query(JobStepItemEntity).\
+                filter(JobStepItemEntity.job_id.in_(sub_query)).\
+                delete(synchronize_session=False)
+            self._session.query(JobStepOutputEntity).\
+                filter(JobStepOutputEntity.job_id.in_(sub_query)).\
+                delete(synchronize_session=False)
             self._session.query(JobStepEntity).\
                 filter(JobStepEntity.job_id.in_(sub_query)).\
                 delete(synchronize_session=False)
@@ -1569,7 +1944,7 @@ class DataSource:
 
     def delete_job_step_by_job_id(self, job_id):
         """
-        Delete a JobStepEntity by job id.
+        Delete a JobStepEntity and its item and output rows by job id.
 
         Args:
             job_id: the job id string of JobStepEntity.
@@ -1580,6 +1955,12 @@ class DataSource:
 
         """
         try:
+            self._session.query(JobStepItemEntity).\
+                filter(JobStepItemEntity.job_id == job_id).\
+                delete(synchronize_session=False)
+            self._session.query(JobStepOutputEntity).\
+                filter(JobStepOutputEntity.job_id == job_id).\
+                delete(synchronize_session=False)
             self._session.query(JobStepEntity).\
                 filter(JobStepEntity.job_id == job_id).\
                 delete(synchronize_session=False)
@@ -0,0 +1 @@
+drop table if exists job_step_item;
@@ -0,0 +1,13 @@
+-- add table of per-map-item job step status
+create table if not exists job_step_item (
+    job_id char(32) not null default '',
+    step_id char(32) not null default '',
+    item varchar(256) not null default '',
+    status varchar(32) not null default 'PENDING',
+    attempt int not null default 0,
+    pid int not null default 0,
+    hpc_job_id varchar(64) not null default '',
+    started datetime,
+    finished datetime,
+    primary key (job_id, step_id, item)
+);
@@ -0,0 +1,10 @@
+-- add table of output sizes of finished job steps
+-- depends: 0001.add-job-step-item
+create table if not exists job_step_output (
+    job_id char(32) not null default '',
+    step_id char(32) not null default '',
+    output_bytes bigint not null default 0,
+    output_items int not null default 0,
+    finished datetime,
+    primary key (job_id, step_id)
+);
@@ -7,6 +7,8 @@ DROP TABLE IF EXISTS step;
 DROP TABLE IF EXISTS depend;
 DROP TABLE IF EXISTS job;
 DROP TABLE IF EXISTS job_step;
+DROP TABLE IF EXISTS job_step_item;
+DROP TABLE IF EXISTS job_step_output;
 DROP TRIGGER IF EXISTS update_workflow;
 
 CREATE TABLE workflow (
@@ -106,4 +108,25 @@ CREATE TABLE job_step (
     PRIMARY KEY (step_id, job_id)
 );
 
+CREATE TABLE job_step_item (
+    job_id CHAR(32) NOT NULL DEFAULT '',
+    step_id CHAR(32) NOT NULL DEFAULT '',
+    item VARCHAR(256) NOT NULL DEFAULT '',
+    status VARCHAR(32) NOT NULL DEFAULT 'PENDING',
+    attempt INT NOT NULL DEFAULT 0,
+    pid INT NOT NULL DEFAULT 0,
+    hpc_job_id VARCHAR(64) NOT NULL DEFAULT '',
+    started DATETIME,
+    finished DATETIME,
+    PRIMARY KEY (job_id, step_id, item)
+);
+
+CREATE TABLE job_step_output (
+    job_id CHAR(32) NOT NULL DEFAULT '',
+    step_id CHAR(32) NOT NULL DEFAULT '',
+    output_bytes BIGINT NOT NULL DEFAULT 0,
+    output_items INT NOT NULL DEFAULT 0,
+    finished DATETIME,
+    PRIMARY KEY (job_id, step_id)
+);
 
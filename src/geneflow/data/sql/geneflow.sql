@@ -4,6 +4,8 @@ drop table if exists step;
 drop table if exists depend;
 drop table if exists job;
 drop table if exists job_step;
+drop table if exists job_step_item;
+drop table if exists job_step_output;
 drop table if exists _yoyo_migration;
 
 create table workflow (
@@ -96,4 +98,25 @@ create table job_step (
     primary key (step_id, job_id)
 );
 
+create table job_step_item (
+    job_id char(32) not null default '',
+    step_id char(32) not null default '',
+    item varchar(256) not null default '',
+    status varchar(32) not null default 'PENDING',
+    attempt int not null default 0,
+    pid int not null default 0,
+    hpc_job_id varchar(64) not null default '',
+    started datetime,
+    finished datetime,
+    primary key (job_id, step_id, item)
+);
+
+create table job_step_output (
+    job_id char(32) not null default '',
+    step_id char(32) not null default '',
+    output_bytes bigint not null default 0,
+    output_items int not null default 0,
+    finished datetime,
+    primary key (job_id, step_id)
+);
 
@@ -1,20 +1,200 @@
 """This module contains the GeneFlow DataManager class."""
 
 
+import collections
 import inspect
+import threading
+import time
 
 from geneflow.uri_parser import URIParser
 from geneflow.log import Log
 from geneflow.extend import data_manager_contexts
 
 
+class MetadataCache:
+    """
+    Bounded LRU cache of list and exists results.
+
+    Each entry is stored with the modification time (in ns) of the folder
+    that it depends on, and is only returned while that folder is
+    unchanged. Entries are also dropped when data at, above or below their
+    path is changed through DataManager. Results that depend on a folder
+    modified in the last few seconds are not stored, because a change in
+    the same mtime tick would go unnoticed.
+    """
+
+    # minimum age of a folder mtime (ns) for results to be cached
+    MIN_AGE = 2000000000
+
+    def __init__(self, size=0):
+        """
+        Instantiate MetadataCache class.
+
+        Args:
+            self: class instance.
+            size: maximum number of entries, 0 disables the cache.
+
+        Returns:
+            Class instance.
+
+        """
+        self._size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+    def resize(self, size):
+        """Set the maximum number of entries, 0 disables the cache."""
+        with self._lock:
+            self._size = size
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+
+    def enabled(self):
+        """Check if the cache is enabled."""
+        return self._size > 0
+
+
+    def get(self, key, mtime):
+        """
+        Get a cached result.
+
+        Args:
+            self: class instance.
+            key: (kind, scheme, path, glob) tuple.
+            mtime: current mtime of the folder the result depends on.
+
+        Returns:
+            Cached result, or None if not cached or out of date.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or mtime is None or entry[0] != mtime:
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+
+            return entry[1]
+
+
+    def put(self, key, mtime, result):
+        """Store a result with the mtime of the folder it depends on."""
+        if mtime is None or time.time_ns() - mtime < self.MIN_AGE:
+            return
+
+        with self._lock:
+            self._entries[key] = (mtime, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+
+    def invalidate(self, scheme, path):
+        """
+        Drop entries for a path, its parent folders and its contents.
+
+        Args:
+            self: class instance.
+            scheme: URI scheme.
+            path: changed path.
+
+        Returns:
+            None.
+
+        """
+        path = path.rstrip('/')
+        with self._lock:
+            for key in [
+                    key for key in self._entries
+                    if key[1] == scheme and (
+                        key[2] == path
+                        or key[2].startswith(path+'/')
+                        or path.startswith(key[2].rstrip('/')+'/')
+                    )
+            ]:
+                del self._entries[key]
+                self._stats['invalidations'] += 1
+
+
+    def stats(self):
+        """Return dict of hit, miss and invalidation counters."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
 class DataManager:
     """
     Copy/move, list, delete data for various contexts.
 
     Currently, these contexts include: local.
+
+    Results of list() and exists() are cached for contexts with an
+    "_mtime_<scheme>" method, see set_cache_size().
     """
 
+    _cache = MetadataCache()
+
+    @classmethod
+    def set_cache_size(cls, size):
+        """
+        Enable or resize the metadata cache of list() and exists().
+
+        Args:
+            size: maximum number of cached results, 0 disables the cache.
+
+        Returns:
+            None.
+
+        """
+        cls._cache.resize(size)
+
+
+    @classmethod
+    def get_cache_stats(cls):
+        """Return dict of metadata cache hit, miss and invalidation counts."""
+        return cls._cache.stats()
+
+
+    @classmethod
+    def _cache_mtime(cls, parsed_uri, folder=False, **kwargs):
+        """
+        Get the mtime that a cached result of a URI depends on.
+
+        Args:
+            parsed_uri: parsed URI.
+            folder: if True, get the mtime of the parent folder of the URI.
+            **kwargs: Other arguments specific to context.
+
+        Returns:
+            mtime in ns, or None if results of the URI cannot be cached.
+
+        """
+        if not cls._cache.enabled():
+            return None
+
+        mtime_func = getattr(
+            cls, '_mtime_{}'.format(parsed_uri['scheme']), None
+        )
+        if not mtime_func:
+            return None
+
+        return mtime_func(parsed_uri, folder, **kwargs)
+
+
+    @classmethod
+    def _invalidate(cls, parsed_uri):
+        """Drop cached results affected by a change to a URI."""
+        if cls._cache.enabled():
+            cls._cache.invalidate(
+                parsed_uri['scheme'], parsed_uri['chopped_path']
+            )
+
+
     @classmethod
     def list(cls, uri=None, parsed_uri=None, globstr='*', **kwargs):
         """
@@ -48,7 +228,174 @@ class DataManager:
             Log.an().error('_list_%s method not defined', parsed_uri['scheme'])
             return False
 
-        return list_func(parsed_uri, globstr, **kwargs)
+        # only listings of a single folder are cached
+        mtime = None
+        if '/' not in globstr:
+            mtime = cls._cache_mtime(parsed_uri, **kwargs)
+        key = ('list', parsed_uri['scheme'], parsed_uri['chopped_path'], globstr)
+        if mtime is not None:
+            file_list = cls._cache.get(key, mtime)
+            if file_list is not None:
+                return list(file_list)
+
+        file_list = list_func(parsed_uri, globstr, **kwargs)
+        if mtime is not None and file_list is not False:
+            cls._cache.put(key, mtime, tuple(file_list))
+
+        return file_list
+
+
+    @classmethod
+    def iterate(cls, uri=None, parsed_uri=None, globstr='*', **kwargs):
+        """
+        Iterate over data in various contexts.
+
+        Unlike list(), contents are produced as they are found. Contexts
+        without an iterate method are listed with list() instead.
+
+        Args:
+            uri: URI to list.
+            parsed_uri: URI to list, already parsed.
+            **kwargs: Other arguments specific to context.
+
+        Returns:
+            On success: iterator of file names.
+            On failure: False.
+
+        """
+        # parse and validate URI
+        if not parsed_uri:
+            parsed_uri = URIParser.parse(uri)
+            if not parsed_uri:
+                Log.an().error('invalid uri: %s', uri)
+                return False
+
+        # check if iterate method exists for context
+        try:
+            iterate_func = getattr(
+                cls, '_iterate_{}'.format(parsed_uri['scheme'])
+            )
+        except AttributeError:
+            file_list = cls.list(
+                parsed_uri=parsed_uri, globstr=globstr, **kwargs
+            )
+            return iter(file_list) if file_list is not False else False
+
+        return iterate_func(parsed_uri, globstr, **kwargs)
+
+
+    @classmethod
+    def scan(
+            cls, uri=None, parsed_uri=None, globstr='*', with_stat=True,
+            **kwargs
+    ):
+        """
+        Scan data in various contexts, with file type and size.
+
+        Like iterate(), contents are produced as they are found. Contexts
+        without a scan method are listed with list() instead, without file
+        type or size.
+
+        Args:
+            uri: URI to scan.
+            parsed_uri: URI to scan, already parsed.
+            globstr: glob pattern matched against relative paths.
+            with_stat: if True, include the size of each entry.
+            **kwargs: Other arguments specific to context.
+
+        Returns:
+            On success: iterator of dicts with "path", "folder", "name",
+                "is_dir" and "size" keys.
+            On failure: False.
+
+        """
+        # parse and validate URI
+        if not parsed_uri:
+            parsed_uri = URIParser.parse(uri)
+            if not parsed_uri:
+                Log.an().error('invalid uri: %s', uri)
+                return False
+
+        # check if scan method exists for context
+        try:
+            scan_func = getattr(cls, '_scan_{}'.format(parsed_uri['scheme']))
+        except AttributeError:
+            file_list = cls.list(
+                parsed_uri=parsed_uri, globstr=globstr, **kwargs
+            )
+            if file_list is False:
+                return False
+
+            return (
+                {
+                    'path': path,
+                    'folder': path.rpartition('/')[0],
+                    'name': path.rpartition('/')[2],
+                    'is_dir': None,
+                    'size': None
+                } for path in file_list
+            )
+
+        return scan_func(
+            parsed_uri, globstr, with_stat=with_stat, **kwargs
+        )
+
+
+    @classmethod
+    def size(cls, uri=None, parsed_uri=None, **kwargs):
+        """
+        Get the total size of data at a URI.
+
+        Contexts without a size method are summed with scan() instead.
+
+        Args:
+            uri: URI of file or folder.
+            parsed_uri: URI of file or folder, already parsed.
+            **kwargs: Other arguments specific to context.
+
+        Returns:
+            On success: size in bytes, 0 if the URI does not exist.
+            On failure: False.
+
+        """
+        # parse and validate URI
+        if not parsed_uri:
+            parsed_uri = URIParser.parse(uri)
+            if not parsed_uri:
+                Log.an().error('invalid uri: %s', uri)
+                return False
+
+        try:
+            # check if size method exists for context
+            try:
+                size_func = getattr(
+                    cls, '_size_{}'.format(parsed_uri['scheme'])
+                )
+            except AttributeError:
+                if not cls.exists(parsed_uri=parsed_uri, **kwargs):
+                    return 0
+
+                entries = cls.scan(
+                    parsed_uri=parsed_uri, globstr='**', with_stat=True,
+                    **kwargs
+                )
+                if entries is False:
+                    return False
+
+                return sum(
+                    entry['size'] or 0 for entry in entries
+                    if not entry['is_dir']
+                )
+
+            return size_func(parsed_uri, **kwargs)
+
+        except OSError as err:
+            Log.an().error(
+                'cannot get size of uri: %s [%s]',
+                parsed_uri['chopped_uri'],
+                str(err)
+            )
+            return False
 
 
     @classmethod
@@ -88,7 +435,18 @@ class DataManager:
             )
             return None
 
-        return exists_func(parsed_uri, **kwargs)
+        mtime = cls._cache_mtime(parsed_uri, folder=True, **kwargs)
+        key = ('exists', parsed_uri['scheme'], parsed_uri['chopped_path'], '')
+        if mtime is not None:
+            exists = cls._cache.get(key, mtime)
+            if exists is not None:
+                return exists
+
+        exists = exists_func(parsed_uri, **kwargs)
+        if mtime is not None and exists is not None:
+            cls._cache.put(key, mtime, exists)
+
+        return exists
 
 
     @classmethod
@@ -128,6 +486,7 @@ class DataManager:
             )
             return False
 
+        cls._invalidate(parsed_uri)
         return delete_func(parsed_uri, **kwargs)
 
 
@@ -183,6 +542,7 @@ class DataManager:
                 )
                 return False
 
+        cls._invalidate(parsed_uri)
         # always remove final slash from URI before calling mkdir
         return mkdir_func(URIParser.parse(parsed_uri['chopped_uri']), **kwargs)
 
@@ -194,6 +554,7 @@ class DataManager:
             parsed_src_uri=None,
             dest_uri=None,
             parsed_dest_uri=None,
+            strategy=None,
             **kwargs
     ):
         """
@@ -205,6 +566,8 @@ class DataManager:
         Args:
             src: Source URI.
             dest: Destination URI.
+            strategy: stage strategy (copy, hardlink, reflink, symlink or
+                auto), overrides the "stage_strategy" context option.
             **kwargs: Other arguments specific to context.
 
         Returns:
@@ -239,16 +602,20 @@ class DataManager:
             )
             return False
 
-        return copy_func(
-            parsed_src_uri,
-            parsed_dest_uri,
-            **{
-                list_item: kwargs[list_item]
-                for list_item in set(
-                    [parsed_src_uri['scheme'], parsed_dest_uri['scheme']]
-                )
+        options = {
+            list_item: kwargs[list_item]
+            for list_item in set(
+                [parsed_src_uri['scheme'], parsed_dest_uri['scheme']]
+            )
+        }
+        if strategy:
+            options = {
+                scheme: dict(options[scheme] or {}, stage_strategy=strategy)
+                for scheme in options
             }
-        )
+
+        cls._invalidate(parsed_dest_uri)
+        return copy_func(parsed_src_uri, parsed_dest_uri, **options)
 
 
     @classmethod
@@ -303,6 +670,8 @@ class DataManager:
             )
             return False
 
+        cls._invalidate(parsed_src_uri)
+        cls._invalidate(parsed_dest_uri)
         return move_func(
             parsed_src_uri,
             parsed_dest_uri,
@@ -315,6 +684,72 @@ class DataManager:
         )
 
 
+    @classmethod
+    def sync(
+            cls,
+            src_uri=None,
+            parsed_src_uri=None,
+            dest_uri=None,
+            parsed_dest_uri=None,
+            **kwargs
+    ):
+        """
+        Incrementally copy data to/from/within workflow contexts.
+
+        Only data that is missing or changed in the destination is copied.
+        Contexts without a sync method are copied with copy() instead.
+
+        Args:
+            src: Source URI.
+            dest: Destination URI.
+            **kwargs: Other arguments specific to context.
+
+        Returns:
+            On success: dict of numbers of files and bytes transferred and
+                skipped, and files deleted, or True if data was copied with
+                copy().
+            On failure: False.
+
+        """
+        # parse and validate src URI
+        if not parsed_src_uri:
+            parsed_src_uri = URIParser.parse(src_uri)
+            if not parsed_src_uri:
+                Log.an().error('invalid src uri: %s', src_uri)
+                return False
+
+        # parse and validate dest URI
+        if not parsed_dest_uri:
+            parsed_dest_uri = URIParser.parse(dest_uri)
+            if not parsed_dest_uri:
+                Log.an().error('invalid dest uri: %s', dest_uri)
+                return False
+
+        # check if sync method exists for contexts
+        try:
+            sync_func = getattr(cls, '_sync_{}_{}'.format(
+                parsed_src_uri['scheme'], parsed_dest_uri['scheme']
+            ))
+        except AttributeError:
+            return cls.copy(
+                parsed_src_uri=parsed_src_uri,
+                parsed_dest_uri=parsed_dest_uri,
+                **kwargs
+            )
+
+        cls._invalidate(parsed_dest_uri)
+        return sync_func(
+            parsed_src_uri,
+            parsed_dest_uri,
+            **{
+                list_item: kwargs[list_item]
+                for list_item in set(
+                    [parsed_src_uri['scheme'], parsed_dest_uri['scheme']]
+                )
+            }
+        )
+
+
 def init():
     """Import methods in the data_manager_contexts module as static methods."""
     all_funcs = inspect.getmembers(data_manager_contexts, inspect.isfunction)
@@ -0,0 +1,188 @@
+"""This module contains the GeneFlow DiskAdmission class."""
+
+import os
+
+from geneflow.log import Log
+
+
+class DiskAdmission:
+    """
+    Admission control of steps and jobs based on free disk space.
+
+    Free bytes and inodes of the file systems of a set of local paths are
+    checked with statvfs. Work is admitted only while the free space left
+    after the outputs it is expected to write stays above a threshold.
+    Expected outputs of running work are reserved by key, e.g., step name,
+    until the work finishes and its outputs show up in the free space.
+    """
+
+    def __init__(self, paths, min_free=0, min_free_inodes=0, reserved=None):
+        """
+        Instantiate DiskAdmission class.
+
+        Args:
+            self: class instance.
+            paths: list of local paths, which may not exist yet.
+            min_free: number of bytes that must stay free, 0 means no limit.
+            min_free_inodes: number of inodes that must stay free, 0 means
+                no limit.
+            reserved: dict of (device, key) -> reserved bytes, shared by
+                instances that check the same file systems.
+
+        Returns:
+            Class instance.
+
+        """
+        self._paths = list(paths)
+        self._min_free = min_free
+        self._min_free_inodes = min_free_inodes
+        self._reserved = {} if reserved is None else reserved
+
+
+    @property
+    def enabled(self):
+        """Check if a threshold is set and there are paths to check."""
+        return bool(self._paths and (self._min_free or self._min_free_inodes))
+
+
+    @staticmethod
+    def _stat(path):
+        """Return (device, statvfs) of the nearest existing parent of path."""
+        path = os.path.abspath(path)
+        while not os.path.exists(path) and path != os.path.dirname(path):
+            path = os.path.dirname(path)
+
+        return (os.stat(path).st_dev, os.statvfs(path))
+
+
+    def _devices(self):
+        """Return dict of device -> statvfs of all paths."""
+        devices = {}
+        for path in self._paths:
+            try:
+                device, stat = self._stat(path)
+            except OSError as err:
+                Log.a().warning(
+                    'cannot check free disk space: %s [%s]', path, str(err)
+                )
+                continue
+            devices[device] = stat
+
+        return devices
+
+
+    def headroom(self):
+        """
+        Get the free space left above the thresholds, less reservations.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Tuple of bytes and inodes, the smallest of all file systems.
+            Inodes are None if no inode threshold is set.
+
+        """
+        free_bytes = None
+        free_inodes = None
+        for device, stat in self._devices().items():
+            reserved = sum(
+                value for (dev, _), value in self._reserved.items()
+                if dev == device
+            )
+            available = stat.f_bavail * stat.f_frsize - reserved
+            free_bytes = available if free_bytes is None\
+                else min(free_bytes, available)
+
+            # some file systems do not report inode counts
+            if self._min_free_inodes and stat.f_files:
+                free_inodes = stat.f_favail if free_inodes is None\
+                    else min(free_inodes, stat.f_favail)
+
+        if free_bytes is not None:
+            free_bytes -= self._min_free
+        if free_inodes is not None:
+            free_inodes -= self._min_free_inodes
+
+        return (free_bytes, free_inodes)
+
+
+    def reserve(self, key, num_bytes):
+        """
+        Reserve space for the expected outputs of running work.
+
+        Args:
+            self: class instance.
+            key: key of the reservation, replaces earlier reservations with
+                the same key.
+            num_bytes: number of bytes to reserve, 0 releases the
+                reservation.
+
+        Returns:
+            None.
+
+        """
+        for device in self._devices():
+            if num_bytes:
+                self._reserved[(device, key)] = num_bytes
+            else:
+                self._reserved.pop((device, key), None)
+
+
+    def limit(self, key, item_bytes, num_running):
+        """
+        Get the number of work items that can start.
+
+        Args:
+            self: class instance.
+            key: reservation key of the running work items.
+            item_bytes: expected output size of a work item, 0 if unknown.
+            num_running: number of running work items of the key.
+
+        Returns:
+            Number of work items, or None for no limit.
+
+        """
+        if not self.enabled:
+            return None
+
+        self.reserve(key, item_bytes * num_running)
+        free_bytes, free_inodes = self.headroom()
+        if (
+                (free_bytes is not None and free_bytes <= 0)
+                or (free_inodes is not None and free_inodes <= 0)
+        ):
+            return 0
+
+        if not item_bytes or free_bytes is None:
+            return None
+
+        return free_bytes // item_bytes
+
+
+    def admit(self, key, num_bytes):
+        """
+        Admit work with an expected output size, and reserve space for it.
+
+        Args:
+            self: class instance.
+            key: reservation key of the work.
+            num_bytes: expected output size in bytes, 0 if unknown.
+
+        Returns:
+            True if the work fits above the thresholds, otherwise False.
+
+        """
+        if not self.enabled:
+            return True
+
+        free_bytes, free_inodes = self.headroom()
+        if (
+                (free_bytes is not None and free_bytes < max(num_bytes, 1))
+                or (free_inodes is not None and free_inodes <= 0)
+        ):
+            return False
+
+        self.reserve(key, num_bytes)
+
+        return True
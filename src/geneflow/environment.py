@@ -69,12 +69,13 @@ class Environment:
         self._sqlite_db_path = None
 
 
-    def initialize(self):
+    def initialize(self, init_db=True):
         """
         Initialize environment.
 
         Args:
-            None.
+            init_db: create a new SQLite database for the session. Set to
+                False to reuse the database of an existing session.
 
         Returns:
             On success: True.
@@ -95,8 +96,13 @@ class Environment:
             Log.an().error('cannot initialize geneflow session')
             return False
 
-        if not self.init_sqlite_db(self._sqlite_db_path):
-            Log.an().error('cannot initialize sqlite db')
+        if init_db:
+            if not self.init_sqlite_db(self._sqlite_db_path):
+                Log.an().error('cannot initialize sqlite db')
+                return False
+
+        elif not Path(self._sqlite_db_path).is_file():
+            Log.an().error('sqlite db not found: %s', self._sqlite_db_path)
             return False
 
         if not self._init_app_paths():
@@ -202,6 +208,51 @@ class Environment:
         return True
 
 
+    def find_job_session(self, job_id):
+        """
+        Find the session whose SQLite database contains a job.
+
+        Args:
+            job_id: job id, or a unique prefix of at least 8 characters.
+
+        Returns:
+            On success: tuple of session id and full job id.
+            On failure: False.
+
+        """
+        if len(job_id) < 8:
+            Log.an().error('job id must have at least 8 characters: %s', job_id)
+            return False
+
+        if not self._init_user_home() or not self._init_dirs():
+            Log.an().error('cannot initialize geneflow directories')
+            return False
+
+        matches = []
+        for db_path in Path(self._gf_tmp).glob('*.db'):
+            try:
+                dbh = sqlite3.connect(str(db_path))
+                rows = dbh.execute(
+                    'SELECT id FROM job WHERE id LIKE ?', (job_id+'%',)
+                ).fetchall()
+                dbh.close()
+            except sqlite3.Error:
+                # not a geneflow session database
+                continue
+
+            matches += [(db_path.stem, row[0]) for row in rows]
+
+        if not matches:
+            Log.an().error('job not found: %s', job_id)
+            return False
+
+        if len(matches) > 1:
+            Log.an().error('job id is not unique: %s', job_id)
+            return False
+
+        return matches[0]
+
+
     @staticmethod
     def init_sqlite_db(sqlite_db_path):
         """
@@ -2,8 +2,16 @@
 This module contains data management extension functions for various contexts.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import fcntl
+import functools
+import hashlib
 import os
+import re
 import shutil
+import stat
+import tempfile
 from wcmatch import glob
 
 from geneflow.log import Log
@@ -12,27 +20,113 @@ from geneflow.uri_parser import URIParser
 
 ### Local data management functions and move/copy with Local as source
 
+# ioctl request to clone a file on copy-on-write file systems (linux/fs.h)
+_FICLONE = 0x40049409
+
+
+@functools.lru_cache(maxsize=64)
+def _glob_matcher(globstr):
+    """
+    Compile a glob into a function that matches relative paths.
+
+    Args:
+        globstr: glob pattern, with extended glob and globstar syntax.
+
+    Returns:
+        Function that takes a relative path and returns True if it matches.
+
+    """
+    positive, negative = glob.translate(
+        globstr, flags=glob.EXTGLOB|glob.GLOBSTAR
+    )
+    positive = [re.compile(pattern) for pattern in positive]
+    negative = [re.compile(pattern) for pattern in negative]
+
+    def match(path):
+        return (
+            any(pattern.match(path) for pattern in positive)
+            and not any(pattern.match(path) for pattern in negative)
+        )
+
+    return match
+
+
+def _scan_local(uri, globstr, with_stat=True, local=None):
+    """
+    Scan contents of local URI for paths that match a glob.
+
+    Folders are listed with os.scandir. Sub-folders are only scanned if the
+    glob can match paths in them, i.e., if it contains "**" or "/".
+    As with glob, symbolic links to folders are not followed by "**".
+
+    Args:
+        uri: parsed URI to scan.
+        globstr: glob pattern, matched against paths relative to the URI.
+        with_stat: if True, get the size of each matched entry.
+        local: local context options.
+
+    Returns:
+        Generator of dicts with "path" (relative to the URI), "folder"
+        (relative folder, '' for the URI itself), "name", "is_dir" and
+        "size" (None if with_stat is False) keys. Raises OSError if the URI
+        cannot be listed.
+
+    """
+    match = _glob_matcher(globstr)
+    max_depth = None if '**' in globstr else globstr.count('/')
+
+    folders = [('', uri['chopped_path'], 0)]
+    while folders:
+        folder, folder_path, depth = folders.pop()
+        try:
+            entries = os.scandir(folder_path)
+        except OSError as err:
+            if not folder:
+                raise
+            Log.a().warning(
+                'cannot list folder: %s [%s]', folder_path, str(err)
+            )
+            continue
+
+        with entries:
+            for entry in entries:
+                path = '{}/{}'.format(folder, entry.name)\
+                    if folder else entry.name
+                is_dir = entry.is_dir()
+                if match(path):
+                    yield {
+                        'path': path,
+                        'folder': folder,
+                        'name': entry.name,
+                        'is_dir': is_dir,
+                        'size': entry.stat().st_size if with_stat else None
+                    }
+
+                if is_dir and (
+                        depth < max_depth if max_depth is not None
+                        else not entry.is_symlink()
+                ):
+                    folders.append((path, entry.path, depth+1))
+
+
 def _list_local(uri, globstr, local=None):
     """
     List contents of local URI.
 
     Args:
         uri: parsed URI to list.
+        globstr: glob pattern, matched against paths relative to the URI.
         local: local context options.
 
     Returns:
-        On success: a list of filenames (basenames only).
+        On success: a list of paths relative to the URI, including
+            sub-folders for globs that match them, e.g., "**".
         On failure: False.
 
     """
-    prefix_length = len(uri['chopped_path'])+1
-    #recursive = True if '**' in globstr else False
     try:
         file_list = [
-            item[prefix_length:] for item in glob.glob(
-                uri['chopped_path']+'/'+globstr,
-                flags=glob.EXTGLOB|glob.GLOBSTAR
-            ) if item[prefix_length:]
+            entry['path'] for entry in _scan_local(uri, globstr, with_stat=False)
         ]
 
     except OSError as err:
@@ -45,6 +139,24 @@ def _list_local(uri, globstr, local=None):
     return file_list
 
 
+def _iterate_local(uri, globstr, local=None):
+    """
+    Iterate over contents of local URI, without listing all of it first.
+
+    Args:
+        uri: parsed URI to list.
+        globstr: glob pattern, matched against paths relative to the URI.
+        local: local context options.
+
+    Returns:
+        Generator of paths relative to the URI, including sub-folders for
+        globs that match them, e.g., "**".
+
+    """
+    for entry in _scan_local(uri, globstr, with_stat=False):
+        yield entry['path']
+
+
 def _exists_local(uri, local=None):
     """
     Check if local URI exists.
@@ -60,9 +172,64 @@ def _exists_local(uri, local=None):
     return os.path.exists(uri['chopped_path'])
 
 
+def _size_local(uri, local=None):
+    """
+    Get the total size of a local file or folder tree, like du.
+
+    Symbolic links are not followed.
+
+    Args:
+        uri: parsed URI.
+        local: local context options.
+
+    Returns:
+        Size in bytes, 0 if the URI does not exist. Raises OSError if the
+        URI cannot be read.
+
+    """
+    try:
+        if not os.path.isdir(uri['chopped_path']):
+            return os.lstat(uri['chopped_path']).st_size
+    except FileNotFoundError:
+        return 0
+
+    size = 0
+    folders = [uri['chopped_path']]
+    while folders:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                else:
+                    size += entry.stat(follow_symlinks=False).st_size
+
+    return size
+
+
+def _mtime_local(uri, folder=False, local=None):
+    """
+    Get the modification time of a local URI, for cache revalidation.
+
+    Args:
+        uri: parsed URI.
+        folder: if True, get the mtime of the parent folder of the URI.
+        local: local context options.
+
+    Returns:
+        mtime in ns, or None if the path does not exist.
+
+    """
+    try:
+        return os.stat(
+            uri['folder'] if folder else uri['chopped_path']
+        ).st_mtime_ns
+    except OSError:
+        return None
+
+
 def _mkdir_local(uri, local=None):
     """
-    Create local directory specified by URI.
+    Create local directory specified by URI, if it does not exist.
 
     Args:
         uri: parsed URI to create.
@@ -74,7 +241,7 @@ def _mkdir_local(uri, local=None):
 
     """
     try:
-        os.makedirs(uri['chopped_path'])
+        os.makedirs(uri['chopped_path'], exist_ok=True)
 
     except OSError as err:
         Log.an().error(
@@ -116,7 +283,14 @@ def _delete_local(uri, local=None):
 
     """
     try:
-        shutil.rmtree(uri['chopped_path'])
+        if (
+                os.path.islink(uri['chopped_path'])
+                or not os.path.isdir(uri['chopped_path'])
+        ):
+            # e.g., data staged with the symlink strategy
+            os.remove(uri['chopped_path'])
+        else:
+            shutil.rmtree(uri['chopped_path'])
 
     except OSError as err:
         Log.an().error(
@@ -127,9 +301,339 @@ def _delete_local(uri, local=None):
     return True
 
 
+def _local_copy_fds(src_fd, dest_fd, offset, end):
+    """
+    Copy a byte range between open files, at the same offset.
+
+    The range is copied in the kernel with os.copy_file_range if possible,
+    otherwise with os.sendfile, or with reads and writes.
+
+    Args:
+        src_fd: source file descriptor.
+        dest_fd: destination file descriptor.
+        offset: start of the range.
+        end: end of the range.
+
+    Returns:
+        None. Raises OSError on failure.
+
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < end:
+                copied = os.copy_file_range(
+                    src_fd, dest_fd, end - offset, offset, offset
+                )
+                if not copied:
+                    break
+                offset += copied
+            if offset >= end:
+                return
+        except OSError as err:
+            # e.g., not supported across file systems
+            if err.errno not in (
+                    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP
+            ):
+                raise
+
+    try:
+        os.lseek(dest_fd, offset, os.SEEK_SET)
+        while offset < end:
+            sent = os.sendfile(dest_fd, src_fd, offset, end - offset)
+            if not sent:
+                break
+            offset += sent
+        if offset >= end:
+            return
+    except OSError as err:
+        if err.errno not in (errno.EINVAL, errno.ENOSYS):
+            raise
+
+    while offset < end:
+        data = os.pread(src_fd, min(end - offset, 1048576), offset)
+        if not data:
+            raise OSError(errno.EIO, 'unexpected end of file')
+        offset += os.pwrite(dest_fd, data, offset)
+
+
+def _local_copy_range(src_path, dest_path, offset, length):
+    """
+    Copy a byte range of a file into an existing file.
+
+    Args:
+        src_path: source file path.
+        dest_path: destination file path.
+        offset: start of the range.
+        length: number of bytes to copy.
+
+    Returns:
+        None. Raises OSError on failure.
+
+    """
+    src_fd = os.open(src_path, os.O_RDONLY)
+    try:
+        dest_fd = os.open(dest_path, os.O_WRONLY)
+        try:
+            _local_copy_fds(src_fd, dest_fd, offset, offset + length)
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+
+
+def _local_copy_file(src_path, dest_path):
+    """
+    Copy a file and its permissions and times, like shutil.copy2.
+
+    Args:
+        src_path: source file path.
+        dest_path: destination file path.
+
+    Returns:
+        None. Raises OSError on failure.
+
+    """
+    src_fd = os.open(src_path, os.O_RDONLY)
+    try:
+        dest_fd = os.open(
+            dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666
+        )
+        try:
+            _local_copy_fds(src_fd, dest_fd, 0, os.fstat(src_fd).st_size)
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src_path, dest_path)
+
+
+def _local_tree(src_path, dest_path):
+    """
+    Create the folders of a local folder tree and list its files.
+
+    As with shutil.copytree, symbolic links are followed, and the
+    destination folder must not exist. If the source is a file, and the
+    destination is a folder, the file is listed in that folder.
+
+    Args:
+        src_path: source path.
+        dest_path: destination path.
+
+    Returns:
+        Tuple of lists of (source, destination) file paths and folder paths.
+        Raises OSError on failure.
+
+    """
+    files = []
+    folders = []
+    if not os.path.isdir(src_path):
+        if os.path.isdir(dest_path):
+            dest_path = os.path.join(dest_path, os.path.basename(src_path))
+        files.append((src_path, dest_path))
+        return (files, folders)
+
+    os.makedirs(dest_path)
+    folders.append((src_path, dest_path))
+    for root, dirs, names in os.walk(src_path, followlinks=True):
+        dest_root = os.path.join(dest_path, os.path.relpath(root, src_path))
+        for name in dirs:
+            os.makedirs(os.path.join(dest_root, name), exist_ok=True)
+            folders.append(
+                (os.path.join(root, name), os.path.join(dest_root, name))
+            )
+        for name in names:
+            files.append(
+                (os.path.join(root, name), os.path.join(dest_root, name))
+            )
+
+    return (files, folders)
+
+
+def _local_copy_parallel(src_path, dest_path, threads, chunk_size):
+    """
+    Copy a local file or folder tree with a pool of threads.
+
+    Files are copied concurrently, and files larger than the chunk size are
+    split into chunks that are copied concurrently. As with shutil.copytree
+    and shutil.copy2, permissions and times are copied.
+
+    Args:
+        src_path: source path.
+        dest_path: destination path.
+        threads: number of copy threads.
+        chunk_size: maximum number of bytes copied by one task.
+
+    Returns:
+        None. Raises OSError on failure.
+
+    """
+    files, folders = _local_tree(src_path, dest_path)
+    _local_copy_files(files, threads, chunk_size)
+
+    # folder times are set last, after their contents have been written
+    for src_folder, dest_folder in reversed(folders):
+        shutil.copystat(src_folder, dest_folder)
+
+
+def _local_copy_files(files, threads, chunk_size):
+    """
+    Copy a list of local files with a pool of threads.
+
+    Args:
+        files: list of (source, destination) file paths.
+        threads: number of copy threads.
+        chunk_size: maximum number of bytes copied by one task.
+
+    Returns:
+        None. Raises OSError on failure.
+
+    """
+    # small files are copied by one task each, large files are created
+    # first, then copied in chunks
+    tasks = []
+    chunked = []
+    for src_file, dest_file in files:
+        size = os.path.getsize(src_file)
+        if size <= chunk_size:
+            tasks.append((_local_copy_file, src_file, dest_file))
+            continue
+        with open(dest_file, 'wb') as dest:
+            dest.truncate(size)
+        chunked.append((src_file, dest_file))
+        for offset in range(0, size, chunk_size):
+            tasks.append((
+                _local_copy_range, src_file, dest_file, offset,
+                min(chunk_size, size - offset)
+            ))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(*task) for task in tasks]:
+            future.result()
+
+    for src_file, dest_file in chunked:
+        shutil.copystat(src_file, dest_file)
+
+
+def _local_reflink_file(src_path, dest_path):
+    """
+    Clone a file with the FICLONE ioctl, so that it shares its data blocks
+    until either copy is modified.
+
+    Args:
+        src_path: source file path.
+        dest_path: destination file path.
+
+    Returns:
+        None. Raises OSError if the file system does not support it.
+
+    """
+    src_fd = os.open(src_path, os.O_RDONLY)
+    try:
+        dest_fd = os.open(
+            dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666
+        )
+        try:
+            fcntl.ioctl(dest_fd, _FICLONE, src_fd)
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src_path, dest_path)
+
+
+def _local_link_tree(src_path, dest_path, link_func):
+    """
+    Recreate a local file or folder tree, linking each file.
+
+    Args:
+        src_path: source path.
+        dest_path: destination path.
+        link_func: function that links a source file to a destination file,
+            e.g., os.link.
+
+    Returns:
+        None. Raises OSError on failure.
+
+    """
+    files, folders = _local_tree(src_path, dest_path)
+    for src_file, dest_file in files:
+        link_func(src_file, dest_file)
+
+    for src_folder, dest_folder in reversed(folders):
+        shutil.copystat(src_folder, dest_folder)
+
+
+@functools.lru_cache(maxsize=64)
+def _local_reflink_supported(src_device, dest_folder):
+    """
+    Check if files on a device can be cloned into a folder.
+
+    Cloning is tested with temporary files in the destination folder.
+    Results are cached by source device and destination folder.
+
+    Args:
+        src_device: device ID of the source path.
+        dest_folder: destination folder path.
+
+    Returns:
+        True if files can be cloned, False otherwise.
+
+    """
+    try:
+        if os.stat(dest_folder).st_dev != src_device:
+            return False
+
+        with tempfile.TemporaryFile(dir=dest_folder) as src_file, \
+                tempfile.TemporaryFile(dir=dest_folder) as dest_file:
+            src_file.write(b'0')
+            src_file.flush()
+            fcntl.ioctl(dest_file.fileno(), _FICLONE, src_file.fileno())
+
+    except OSError:
+        return False
+
+    return True
+
+
+def _local_resolve_strategy(strategy, src_path, dest_path):
+    """
+    Resolve the "auto" stage strategy to "reflink" or "copy".
+
+    Args:
+        strategy: stage strategy.
+        src_path: source path.
+        dest_path: destination path.
+
+    Returns:
+        Stage strategy. Raises OSError if the source does not exist.
+
+    """
+    if strategy != 'auto':
+        return strategy
+
+    dest_folder = os.path.abspath(dest_path)
+    if not os.path.isdir(dest_folder):
+        dest_folder = os.path.dirname(dest_folder)
+
+    return 'reflink' if _local_reflink_supported(
+        os.stat(src_path).st_dev, dest_folder
+    ) else 'copy'
+
+
 def _copy_local_local(src_uri, dest_uri, local=None):
     """
-    Copy local data with system shell.
+    Copy local data.
+
+    The "stage_strategy" local context option selects how data is copied:
+        copy: copy data. With more than one "copy_threads", files and
+            chunks of up to "copy_chunk_size" bytes are copied in parallel.
+        hardlink: hard link each file, the source and destination files are
+            the same file.
+        reflink: clone each file, data blocks are shared until modified.
+            This requires a copy-on-write file system, e.g., btrfs or xfs.
+        symlink: create a symbolic link to the source.
+        auto: clone if the source and destination are on the same file
+            system and it supports cloning, otherwise copy.
 
     Args:
         src_uri: Source URI parsed into dict with URIParser.
@@ -141,14 +645,54 @@ def _copy_local_local(src_uri, dest_uri, local=None):
         On failure: False.
 
     """
+    options = local or {}
+    strategy = options.get('stage_strategy', 'copy')
+    threads = options.get('copy_threads', 1)
     try:
-        shutil.copytree(
-            src_uri['path'],
-            dest_uri['path']
+        strategy = _local_resolve_strategy(
+            strategy, src_uri['path'], dest_uri['path']
         )
+
+        if strategy == 'symlink':
+            dest_path = dest_uri['path']
+            if (
+                    os.path.isdir(dest_path)
+                    and not os.path.isdir(src_uri['path'])
+            ):
+                dest_path = os.path.join(
+                    dest_path, os.path.basename(src_uri['path'])
+                )
+            os.symlink(os.path.abspath(src_uri['path']), dest_path)
+        elif strategy == 'hardlink':
+            _local_link_tree(src_uri['path'], dest_uri['path'], os.link)
+        elif strategy == 'reflink':
+            _local_link_tree(
+                src_uri['path'], dest_uri['path'], _local_reflink_file
+            )
+        elif strategy != 'copy':
+            Log.an().error('invalid stage strategy: %s', strategy)
+            return False
+        elif threads > 1:
+            _local_copy_parallel(
+                src_uri['path'],
+                dest_uri['path'],
+                threads,
+                options.get('copy_chunk_size', 67108864)
+            )
+        elif os.path.isdir(src_uri['path']):
+            shutil.copytree(
+                src_uri['path'],
+                dest_uri['path']
+            )
+        else:
+            shutil.copy2(
+                src_uri['path'],
+                dest_uri['path']
+            )
     except OSError as err:
         Log.an().error(
-            'cannot copy from %s to %s [%s]',
+            'cannot %s from %s to %s [%s]',
+            strategy,
             src_uri['uri'],
             dest_uri['uri'],
             str(err)
@@ -158,6 +702,195 @@ def _copy_local_local(src_uri, dest_uri, local=None):
     return True
 
 
+def _local_same_file(src_stat, dest_stat, src_path, dest_path, checksum):
+    """
+    Check if a destination file is up to date with its source.
+
+    Files are compared by size and modification time in seconds, like
+    rsync, or by size and content hash if checksum is True.
+
+    Args:
+        src_stat: os.stat_result of the source file.
+        dest_stat: os.stat_result of the destination file.
+        src_path: source file path.
+        dest_path: destination file path.
+        checksum: compare content hashes instead of modification times.
+
+    Returns:
+        True if the files are the same, False otherwise.
+
+    """
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+
+    if not checksum:
+        return int(src_stat.st_mtime) == int(dest_stat.st_mtime)
+
+    digests = []
+    for path in (src_path, dest_path):
+        sha = hashlib.sha256()
+        with open(path, 'rb') as data_file:
+            for block in iter(lambda: data_file.read(1048576), b''):
+                sha.update(block)
+        digests.append(sha.digest())
+
+    return digests[0] == digests[1]
+
+
+def _local_remove(path):
+    """Remove a local file, symbolic link or folder tree."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def _sync_local_local(src_uri, dest_uri, local=None):
+    """
+    Incrementally copy local data, like rsync.
+
+    Only files that are missing or changed in the destination are copied,
+    others are skipped. The local context options select how files are
+    compared and copied:
+        sync_checksum: compare files by content hash instead of modification
+            time.
+        sync_delete: delete destination files and folders that are not in
+            the source.
+        stage_strategy, copy_threads, copy_chunk_size: see
+            _copy_local_local(). With the symlink strategy, each file is
+            linked.
+
+    Args:
+        src_uri: Source URI parsed into dict with URIParser.
+        dest_uri: Destination URI parsed into dict with URIParser.
+        local: local context options.
+
+    Returns:
+        On success: dict of numbers of files and bytes transferred and
+            skipped, and files deleted.
+        On failure: False.
+
+    """
+    options = local or {}
+    checksum = options.get('sync_checksum', False)
+    stats = {
+        'files_transferred': 0, 'bytes_transferred': 0,
+        'files_skipped': 0, 'bytes_skipped': 0, 'files_deleted': 0
+    }
+    src_path = src_uri['path']
+    dest_path = dest_uri['path']
+    try:
+        # list source files and folders, relative to the source path
+        if os.path.isdir(src_path):
+            files = []
+            folders = ['']
+            for root, dirs, names in os.walk(src_path, followlinks=True):
+                rel_root = os.path.relpath(root, src_path)
+                rel_root = '' if rel_root == '.' else rel_root
+                folders.extend(os.path.join(rel_root, name) for name in dirs)
+                files.extend(os.path.join(rel_root, name) for name in names)
+        else:
+            if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+                dest_path = os.path.join(
+                    dest_path, os.path.basename(src_path)
+                )
+            files = ['']
+            folders = []
+
+        # create folders, replacing files that are in the way
+        for folder in folders:
+            dest_folder = os.path.join(dest_path, folder)
+            if os.path.lexists(dest_folder) and (
+                    os.path.islink(dest_folder)
+                    or not os.path.isdir(dest_folder)
+            ):
+                _local_remove(dest_folder)
+            os.makedirs(dest_folder, exist_ok=True)
+
+        # compare files
+        transfer = []
+        for name in files:
+            src_file = os.path.join(src_path, name) if name else src_path
+            dest_file = os.path.join(dest_path, name) if name else dest_path
+            src_stat = os.stat(src_file)
+            try:
+                dest_stat = os.lstat(dest_file)
+            except FileNotFoundError:
+                dest_stat = None
+
+            if (
+                    dest_stat
+                    and stat.S_ISREG(dest_stat.st_mode)
+                    and _local_same_file(
+                        src_stat, dest_stat, src_file, dest_file, checksum
+                    )
+            ):
+                stats['files_skipped'] += 1
+                stats['bytes_skipped'] += src_stat.st_size
+                continue
+
+            if dest_stat:
+                _local_remove(dest_file)
+            transfer.append((src_file, dest_file))
+            stats['files_transferred'] += 1
+            stats['bytes_transferred'] += src_stat.st_size
+
+        strategy = _local_resolve_strategy(
+            options.get('stage_strategy', 'copy'), src_path, dest_path
+        )
+        if strategy == 'copy':
+            _local_copy_files(
+                transfer,
+                options.get('copy_threads', 1),
+                options.get('copy_chunk_size', 67108864)
+            )
+        else:
+            link_func = {
+                'hardlink': os.link,
+                'reflink': _local_reflink_file,
+                'symlink': lambda src, dest: os.symlink(
+                    os.path.abspath(src), dest
+                )
+            }.get(strategy)
+            if not link_func:
+                Log.an().error('invalid stage strategy: %s', strategy)
+                return False
+            for src_file, dest_file in transfer:
+                link_func(src_file, dest_file)
+
+        # delete extraneous destination data
+        if options.get('sync_delete', False) and folders:
+            keep = set(files) | set(folders)
+            for root, dirs, names in os.walk(dest_path):
+                rel_root = os.path.relpath(root, dest_path)
+                rel_root = '' if rel_root == '.' else rel_root
+                for name in list(dirs) + names:
+                    if os.path.join(rel_root, name) not in keep:
+                        _local_remove(os.path.join(root, name))
+                        stats['files_deleted'] += 1
+                dirs[:] = [
+                    name for name in dirs
+                    if os.path.join(rel_root, name) in keep
+                ]
+
+        for folder in reversed(folders):
+            shutil.copystat(
+                os.path.join(src_path, folder),
+                os.path.join(dest_path, folder)
+            )
+
+    except OSError as err:
+        Log.an().error(
+            'cannot sync from %s to %s [%s]',
+            src_uri['uri'],
+            dest_uri['uri'],
+            str(err)
+        )
+        return False
+
+    return stats
+
+
 def _move_local_local(src_uri, dest_uri, local=None):
     """
     Move local data with system shell.
@@ -4,13 +4,14 @@
 import drmaa
 import os
 from slugify import slugify
+import shlex
 import shutil
-from wcmatch import glob
 
 from geneflow.log import Log
 from geneflow.workflow_step import WorkflowStep
 from geneflow.data_manager import DataManager
 from geneflow.uri_parser import URIParser
+from geneflow.extend.job_status import STATUS_PROVIDERS
 
 
 class GridengineStep(WorkflowStep):
@@ -68,6 +69,12 @@ class GridengineStep(WorkflowStep):
             drmaa.JobState.FAILED: 'FAILED'
         }
 
+        # query status of all jobs of the step at once, instead of one
+        # drmaa call per job
+        self._status_provider = None
+        self._status_provider_name = self._step['execution']['parameters']\
+            .get('status_provider', 'drmaa')
+
 
     def initialize(self):
         """
@@ -103,6 +110,17 @@ class GridengineStep(WorkflowStep):
             Log.an().error(msg)
             return self._fatal(msg)
 
+        # make sure status provider is valid
+        if self._status_provider_name != 'drmaa':
+            if self._status_provider_name not in ['qstat']:
+                msg = 'invalid status provider for gridengine step: {}'.format(
+                    self._status_provider_name
+                )
+                Log.an().error(msg)
+                return self._fatal(msg)
+            self._status_provider\
+                = STATUS_PROVIDERS[self._status_provider_name]()
+
         if not super(GridengineStep, self).initialize():
             msg = 'cannot initialize workflow step'
             Log.an().error(msg)
@@ -181,11 +199,12 @@ class GridengineStep(WorkflowStep):
             self: class instance.
 
         Returns:
-            Array of base file names in the map URI. Returns False on
-            exception.
+            Generator of dicts with "chopped_uri" and "filename" keys, for
+            files in the map URI that are listed as the generator is
+            consumed. Returns False on exception.
 
         """
-        combined_file_list = []
+        file_iters = []
         for uri in self._parsed_map_uris:
             # make sure map URI is compatible scheme (local)
             if uri['scheme'] != 'local':
@@ -195,64 +214,34 @@ class GridengineStep(WorkflowStep):
                 Log.an().error(msg)
                 return self._fatal(msg)
 
-            # get file list from URI
-            file_list = DataManager.list(
+            # scan files in URI
+            file_iter = DataManager.scan(
                 parsed_uri=uri,
-                globstr=self._step['map']['glob']
+                globstr=self._step['map']['glob'],
+                with_stat=False
             )
-            if file_list is False:
+
+            if file_iter is False:
                 msg = 'cannot get contents of map uri: {}'\
                     .format(uri['chopped_uri'])
                 Log.an().error(msg)
                 return self._fatal(msg)
 
-            if self._step['map']['inclusive']:
-                # filter with glob
-                if glob.globfilter(
-                    [uri['name']],
-                    self._step['map']['glob'],
-                    flags=glob.EXTGLOB|glob.GLOBSTAR
-                ):
-                    combined_file_list.append({
-                        'chopped_uri': '{}://{}{}'.format(
-                            uri['scheme'],
-                            uri['authority'],
-                            uri['folder']
-                        ),
-                        'filename': uri['name']
-                    })
-
-            for f in file_list:
-                if '/' in f:
-                    # reparse uri to correctly represent recursive elements
-                    new_uri = URIParser.parse('{}/{}'.format(uri['chopped_uri'], f))
-                    combined_file_list.append({
-                        'chopped_uri': '{}://{}{}'.format(
-                            new_uri['scheme'],
-                            new_uri['authority'],
-                            new_uri['folder']
-                        ),
-                        'filename': new_uri['name']
-                    })
-                else:
-                    combined_file_list.append({
-                        'chopped_uri': uri['chopped_uri'],
-                        'filename': f
-                    })
-
-        return combined_file_list
+            file_iters.append((uri, file_iter))
 
+        return self._iterate_map_files(file_iters)
 
-    def _run_map(self, map_item):
+
+    def _get_job_args(self, map_item):
         """
-        Run a job for each map item and store the job ID.
+        Construct wrapper script arguments, job name and log path of a job.
 
         Args:
             self: class instance.
             map_item: map item object (item of self._map).
 
         Returns:
-            On success: True.
+            On success: tuple of argument list, job name and log path.
             On failure: False.
 
         """
@@ -340,15 +329,20 @@ class GridengineStep(WorkflowStep):
             name
         )
 
-        # create and populate job template
-        jt = self._gridengine['drmaa_session'].createJobTemplate()
-        jt.remoteCommand = '/bin/bash'
-        jt.args = args
-        jt.jobName = name
-        jt.errorPath = ':{}.err'.format(log_path)
-        jt.outputPath = ':{}.out'.format(log_path)
+        return (args, name, log_path)
 
-        # pass execution parameters to job template
+
+    def _get_native_spec(self):
+        """
+        Construct gridengine options from execution parameters.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            String of gridengine options.
+
+        """
         native_spec = ''
         if 'queue' in self._step['execution']['parameters']:
             native_spec += ' -q {}'.format(
@@ -362,7 +356,38 @@ class GridengineStep(WorkflowStep):
             native_spec += ' {}'.format(
                 self._step['execution']['parameters']['other']
             )
-        jt.nativeSpecification = native_spec
+
+        return native_spec
+
+
+    def _run_map(self, map_item):
+        """
+        Run a job for each map item and store the job ID.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        job_args = self._get_job_args(map_item)
+        if not job_args:
+            return False
+        args, name, log_path = job_args
+
+        # create and populate job template
+        jt = self._gridengine['drmaa_session'].createJobTemplate()
+        jt.remoteCommand = '/bin/bash'
+        jt.args = args
+        jt.jobName = name
+        jt.errorPath = ':{}.err'.format(log_path)
+        jt.outputPath = ':{}.out'.format(log_path)
+
+        # pass execution parameters to job template
+        jt.nativeSpecification = self._get_native_spec()
 
         # submit hpc job using drmaa library
         try:
@@ -374,8 +399,7 @@ class GridengineStep(WorkflowStep):
             Log.a().warning(msg)
 
             # set to failed, but return True so that it's retried
-            map_item['status'] = 'FAILED'
-            map_item['run'][map_item['attempt']]['status'] = 'FAILED'
+            self._set_item_status(map_item, 'FAILED')
 
             return True
 
@@ -392,8 +416,86 @@ class GridengineStep(WorkflowStep):
         map_item['run'][map_item['attempt']]['hpc_job_id'] = job_id
 
         # set status of process
-        map_item['status'] = 'QUEUED'
-        map_item['run'][map_item['attempt']]['status'] = 'QUEUED'
+        self._set_item_status(map_item, 'QUEUED')
+
+        return True
+
+
+    def _run_chunk(self, map_items):
+        """
+        Run a chunk of map items as a single gridengine job.
+
+        Args:
+            self: class instance.
+            map_items: list of map item objects (items of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        if len(map_items) == 1:
+            return self._run_map(map_items[0])
+
+        chunk = []
+        for map_item in map_items:
+            job_args = self._get_job_args(map_item)
+            if not job_args:
+                return False
+            args, _, log_path = job_args
+            chunk.append((
+                map_item,
+                '{} > {} 2> {}'.format(
+                    ' '.join(shlex.quote(arg) for arg in ['/bin/bash']+args),
+                    shlex.quote(log_path+'.out'),
+                    shlex.quote(log_path+'.err')
+                ),
+                log_path
+            ))
+
+        script_path = self._write_chunk_script(chunk)
+        if not script_path:
+            return False
+        name = os.path.splitext(os.path.basename(script_path))[0]
+
+        # create and populate job template
+        jt = self._gridengine['drmaa_session'].createJobTemplate()
+        jt.remoteCommand = '/bin/bash'
+        jt.args = [script_path]
+        jt.jobName = name
+        jt.errorPath = ':{}.err'.format(os.path.splitext(script_path)[0])
+        jt.outputPath = ':{}.out'.format(os.path.splitext(script_path)[0])
+        jt.nativeSpecification = self._get_native_spec()
+
+        # submit hpc job using drmaa library
+        try:
+            job_id = self._gridengine['drmaa_session'].runJob(jt)
+
+        except drmaa.DrmCommunicationException as err:
+            msg = 'cannot submit gridengine job for step "{}" [{}]'\
+                    .format(self._step['name'], str(err))
+            Log.a().warning(msg)
+
+            # set to failed, but return True so that they're retried
+            for map_item in map_items:
+                self._set_item_status(map_item, 'FAILED')
+
+            return True
+
+        self._gridengine['drmaa_session'].deleteJobTemplate(jt)
+
+        Log.a().debug(
+            '[step.%s]: hpc job id: %s -> %s (%s items)',
+            self._step['name'],
+            name,
+            job_id,
+            len(map_items)
+        )
+
+        # record job info
+        for map_item in map_items:
+            map_item['run'][map_item['attempt']]['hpc_job_id'] = job_id
+            self._set_item_status(map_item, 'QUEUED')
 
         return True
 
@@ -403,6 +505,8 @@ class GridengineStep(WorkflowStep):
         Execute shell scripts for each of the map items, as long as
         number of running jobs is < throttle limit.
 
+        Map items are grouped into chunks that run as a single job if the
+        "chunk_size" or "chunk_duration" execution parameter is set.
         Then store HPC job numbers in run detail.
 
         Args:
@@ -413,29 +517,24 @@ class GridengineStep(WorkflowStep):
             On failure: False.
 
         """
-        if self._throttle_limit > 0 and self._num_running >= self._throttle_limit:
+        if (
+                self._throttle_limit > 0
+                and self._get_num_running_jobs() >= self._throttle_limit
+        ):
             # throttle limit reached
             # exit without running anything new
             return True
 
-        for map_item in self._map:
-            if map_item['status'] == 'PENDING':
-                if not self._run_map(map_item):
-                    msg = 'cannot queue job for map item "{}"'\
-                        .format(map_item['filename'])
-                    Log.an().error(msg)
-                    map_item['status'] = 'FAILED'
-                    map_item['run'][map_item['attempt']]['status']\
-                        = map_item['status']
-
-                else:
-                    self._num_running += 1
-                    if (
-                        self._throttle_limit > 0
-                        and self._num_running >= self._throttle_limit
-                    ):
-                        # reached throttle limit
-                        break
+        for map_items in self._get_pending_chunks():
+            if not self._run_chunk(map_items):
+                msg = 'cannot queue job for map items "{}"'\
+                    .format(', '.join(item['filename'] for item in map_items))
+                Log.an().error(msg)
+                for map_item in map_items:
+                    self._set_item_status(map_item, 'FAILED')
+
+            else:
+                self._num_running += len(map_items)
 
         self._update_status_db('RUNNING', '')
 
@@ -452,10 +551,33 @@ class GridengineStep(WorkflowStep):
             self: class instance.
 
         Returns:
-            A dict of all map items and their run histories.
+            A list of all map items and their run histories.
+
+        """
+        return [map_item.to_dict() for map_item in self._map]
+
+
+    def _get_exit_status(self, map_item):
+        """
+        Get the exit status of a job that is no longer in the queue.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            Exit status, or None if the job has not finished yet.
 
         """
-        return self._map
+        try:
+            job_info = self._gridengine['drmaa_session'].wait(
+                map_item['run'][map_item['attempt']]['hpc_job_id'],
+                self._gridengine['drmaa_session'].TIMEOUT_NO_WAIT
+            )
+        except drmaa.errors.DrmaaException:
+            return None
+
+        return job_info.exitStatus
 
 
     def check_running_jobs(self):
@@ -469,46 +591,66 @@ class GridengineStep(WorkflowStep):
             True.
 
         """
+        if self._status_provider:
+            self._check_jobs_bulk()
+
         # check if jobs are running, finished, or failed
-        for map_item in self._map:
-            if map_item['status'] not in ['FINISHED','FAILED','PENDING']:
+        # jobs of chunks are shared by their map items
+        job_states = {}
+        job_infos = {}
+        if not self._status_provider:
+            for map_item in list(self._active_items.values()):
+                hpc_job_id = map_item['run'][map_item['attempt']]['hpc_job_id']
                 try:
                     # can only get job status if it has not already been disposed with "wait"
-                    status = self._gridengine['drmaa_session'].jobStatus(
-                        map_item['run'][map_item['attempt']]['hpc_job_id']
+                    if hpc_job_id not in job_states:
+                        job_states[hpc_job_id] \
+                            = self._gridengine['drmaa_session'].jobStatus(hpc_job_id)
+                    self._set_item_status(
+                        map_item, self._job_status_map[job_states[hpc_job_id]]
                     )
-                    map_item['status'] = self._job_status_map[status]
 
                 except drmaa.DrmCommunicationException as err:
                     msg = 'cannot get job status for step "{}" [{}]'\
                             .format(self._step['name'], str(err))
                     Log.a().warning(msg)
-                    map_item['status'] = 'UNKNOWN'
+                    self._set_item_status(map_item, 'UNKNOWN')
 
                 if map_item['status'] in ['FINISHED','FAILED']:
                     # check exit status
-                    job_info = self._gridengine['drmaa_session'].wait(
-                        map_item['run'][map_item['attempt']]['hpc_job_id'],
-                        self._gridengine['drmaa_session'].TIMEOUT_NO_WAIT
-                    )
+                    if hpc_job_id not in job_infos:
+                        job_infos[hpc_job_id] = self._gridengine['drmaa_session'].wait(
+                            hpc_job_id,
+                            self._gridengine['drmaa_session'].TIMEOUT_NO_WAIT
+                        )
+                    exit_status = job_infos[hpc_job_id].exitStatus
+                    if 'log_path' in map_item['run'][map_item['attempt']]:
+                        # map item of a chunk
+                        exit_status = self._read_exit_status(map_item)
+                        self._set_item_status(
+                            map_item, 'FAILED' if exit_status else 'FINISHED'
+                        )
                     Log.a().debug(
                         '[step.%s]: exit status: %s -> %s',
                         self._step['name'],
                         map_item['template']['output'],
-                        job_info.exitStatus
+                        exit_status
                     )
-                    if job_info.exitStatus > 0:
+                    if exit_status > 0:
                         # job actually failed
-                        map_item['status'] = 'FAILED'
+                        self._set_item_status(map_item, 'FAILED')
 
                     # decrease num running procs
                     if self._num_running > 0:
                         self._num_running -= 1
 
-            map_item['run'][map_item['attempt']]['status'] = map_item['status']
-
-            if map_item['status'] == 'FAILED' and map_item['attempt'] < 5:
-                if self._throttle_limit == 0 or self._num_running < self._throttle_limit:
+        for map_item in list(self._failed_items.values()):
+            if map_item['attempt'] < 5:
+                if (
+                        self._throttle_limit == 0
+                        or self._get_num_running_jobs()
+                        < self._throttle_limit
+                ):
                     # retry job if not at retry or throttle limit
                     if not self.retry_failed(map_item):
                         Log.a().warning(
@@ -0,0 +1,310 @@
+"""This module contains GeneFlow HPC job status provider classes."""
+
+import xml.etree.ElementTree as ElementTree
+
+from geneflow.log import Log
+from geneflow.shell_wrapper import ShellWrapper
+
+
+class JobStatusProvider:
+    """
+    Base class for bulk HPC job status queries.
+
+    A provider gets the status of many scheduler jobs with a single command.
+    Job states are translated into GeneFlow map item states: 'QUEUED',
+    'RUNNING', 'FINISHED', 'FAILED' or 'UNKNOWN'. Jobs that are not listed
+    in the scheduler output are left out of the result.
+
+    The command runner can be replaced, e.g., to parse recorded scheduler
+    output in tests.
+    """
+
+    def __init__(self, runner=None):
+        """
+        Instantiate JobStatusProvider class.
+
+        Args:
+            self: class instance.
+            runner: function that takes a command string and returns its
+                STDOUT as bytes, or False on failure. Defaults to
+                ShellWrapper.invoke.
+
+        Returns:
+            Class instance.
+
+        """
+        self._runner = runner if runner else ShellWrapper.invoke
+
+
+    def command(self, job_ids):
+        """
+        Construct the scheduler command that lists the status of jobs.
+
+        This method must be overridden by the child class.
+
+        """
+        raise NotImplementedError
+
+
+    @staticmethod
+    def parse(output):
+        """
+        Parse scheduler command output.
+
+        This method must be overridden by the child class.
+
+        """
+        raise NotImplementedError
+
+
+    def query(self, job_ids):
+        """
+        Get the status of jobs with a single scheduler command.
+
+        Args:
+            self: class instance.
+            job_ids: list of scheduler job ids.
+
+        Returns:
+            On success: dict of job id -> {'status': status, 'exit_status':
+                exit status, or None if not known}.
+            On failure: False.
+
+        """
+        if not job_ids:
+            return {}
+
+        command = self.command(job_ids)
+        stdout = self._runner(command)
+        if stdout is False:
+            Log.a().warning('cannot query job status: %s', command)
+            return False
+
+        if isinstance(stdout, bytes):
+            stdout = stdout.decode()
+
+        return self.parse(stdout)
+
+
+class SqueueStatusProvider(JobStatusProvider):
+    """
+    Get status of slurm jobs and job array tasks that are still in the queue.
+
+    Jobs that have finished are no longer listed by squeue.
+    """
+
+    STATUS_MAP = {
+        'PENDING': 'QUEUED',
+        'REQUEUED': 'QUEUED',
+        'RESV_DEL_HOLD': 'QUEUED',
+        'REQUEUE_HOLD': 'QUEUED',
+        'REQUEUE_FED': 'QUEUED',
+        'CONFIGURING': 'RUNNING',
+        'RUNNING': 'RUNNING',
+        'COMPLETING': 'RUNNING',
+        'SUSPENDED': 'RUNNING',
+        'STOPPED': 'RUNNING',
+        'SIGNALING': 'RUNNING',
+        'STAGE_OUT': 'RUNNING',
+        'RESIZING': 'RUNNING'
+    }
+
+    def command(self, job_ids):
+        """Return squeue command, listing array tasks individually."""
+        return 'squeue --noheader --array --format="%i %T" --jobs={}'.format(
+            ','.join(sorted({str(job_id).split('_')[0] for job_id in job_ids}))
+        )
+
+
+    @classmethod
+    def parse(cls, output):
+        """
+        Parse squeue output with "%i %T" format.
+
+        Args:
+            cls: class object.
+            output: squeue STDOUT string.
+
+        Returns:
+            Dict of job id -> status dict.
+
+        """
+        result = {}
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) == 2:
+                for job_id in cls._expand_job_id(fields[0]):
+                    result[job_id] = {
+                        'status': cls.STATUS_MAP.get(fields[1], 'UNKNOWN'),
+                        'exit_status': None
+                    }
+
+        return result
+
+
+    @staticmethod
+    def _expand_job_id(job_id):
+        """
+        Expand collapsed pending array tasks, e.g., "123_[0-3,7%2]".
+
+        Args:
+            job_id: job id string from squeue output.
+
+        Returns:
+            List of job id strings.
+
+        """
+        if not job_id.endswith(']') or '_[' not in job_id:
+            return [job_id]
+
+        base, spec = job_id[:-1].split('_[', 1)
+        job_ids = []
+        for part in spec.split('%')[0].split(','):
+            first, _, last = part.partition('-')
+            try:
+                job_ids.extend(
+                    '{}_{}'.format(base, task)
+                    for task in range(int(first), int(last or first)+1)
+                )
+            except ValueError:
+                Log.a().warning('cannot parse squeue job id: %s', job_id)
+
+        return job_ids
+
+
+class SacctStatusProvider(JobStatusProvider):
+    """
+    Get status and exit codes of slurm jobs from the accounting database.
+
+    Unlike squeue, sacct also lists finished jobs, so no per-job follow-up
+    call is needed to get the exit status.
+    """
+
+    STATUS_MAP = {
+        'PENDING': 'QUEUED',
+        'REQUEUED': 'QUEUED',
+        'RUNNING': 'RUNNING',
+        'COMPLETING': 'RUNNING',
+        'SUSPENDED': 'RUNNING',
+        'COMPLETED': 'FINISHED',
+        'FAILED': 'FAILED',
+        'CANCELLED': 'FAILED',
+        'TIMEOUT': 'FAILED',
+        'NODE_FAIL': 'FAILED',
+        'OUT_OF_MEMORY': 'FAILED',
+        'PREEMPTED': 'FAILED',
+        'BOOT_FAIL': 'FAILED',
+        'DEADLINE': 'FAILED'
+    }
+
+    def command(self, job_ids):
+        """Return sacct command with parsable output."""
+        return (
+            'sacct --noheader --parsable2 --format=JobID,State,ExitCode'
+            ' --jobs={}'
+        ).format(','.join(str(job_id) for job_id in job_ids))
+
+
+    @classmethod
+    def parse(cls, output):
+        """
+        Parse sacct output with "JobID,State,ExitCode" format.
+
+        Job steps (e.g., "123.batch") are skipped. States such as
+        "CANCELLED by 0" are reduced to their first word.
+
+        Args:
+            cls: class object.
+            output: sacct STDOUT string.
+
+        Returns:
+            Dict of job id -> status dict.
+
+        """
+        result = {}
+        for line in output.splitlines():
+            fields = line.strip().split('|')
+            if len(fields) != 3 or '.' in fields[0]:
+                continue
+
+            status = cls.STATUS_MAP.get(
+                fields[1].split(' ')[0].rstrip('+'), 'UNKNOWN'
+            )
+            try:
+                exit_status = int(fields[2].split(':')[0])
+            except ValueError:
+                exit_status = None
+
+            if status == 'FINISHED' and exit_status:
+                status = 'FAILED'
+
+            result[fields[0]] = {'status': status, 'exit_status': exit_status}
+
+        return result
+
+
+class QstatStatusProvider(JobStatusProvider):
+    """
+    Get status of GridEngine jobs that are still in the queue.
+
+    Jobs that have finished are no longer listed by qstat, so their exit
+    status must be collected separately.
+    """
+
+    def command(self, job_ids):
+        """Return qstat command with XML output."""
+        return 'qstat -xml'
+
+
+    @staticmethod
+    def parse(output):
+        """
+        Parse qstat XML output.
+
+        Args:
+            output: qstat STDOUT string.
+
+        Returns:
+            On success: dict of job id -> status dict.
+            On failure: False, if the output cannot be parsed.
+
+        """
+        try:
+            root = ElementTree.fromstring(output)
+        except ElementTree.ParseError as err:
+            Log.a().warning('cannot parse qstat output [%s]', str(err))
+            return False
+
+        result = {}
+        for job in root.iter('job_list'):
+            job_id = job.findtext('JB_job_number')
+            state = job.findtext('state', '')
+            if not job_id:
+                continue
+
+            if 'E' in state:
+                status = 'FAILED'
+            elif 'r' in state or 't' in state or 's' in state.lower():
+                status = 'RUNNING'
+            elif 'q' in state or 'h' in state:
+                status = 'QUEUED'
+            else:
+                status = 'UNKNOWN'
+
+            # qstat lists array tasks with their task ids
+            tasks = job.findtext('tasks')
+            if tasks and tasks.isdigit():
+                job_id = '{}.{}'.format(job_id, tasks)
+
+            result[job_id] = {'status': status, 'exit_status': None}
+
+        return result
+
+
+# status providers that can be selected with the "status_provider"
+# execution parameter
+STATUS_PROVIDERS = {
+    'squeue': SqueueStatusProvider,
+    'sacct': SacctStatusProvider,
+    'qstat': QstatStatusProvider
+}
@@ -1,8 +1,8 @@
 """This module contains the GeneFlow LocalStep class."""
 
 
+import shlex
 from slugify import slugify
-from wcmatch import glob
 import pprint
 
 from geneflow.log import Log
@@ -163,11 +163,12 @@ class LocalStep(WorkflowStep):
             self: class instance.
 
         Returns:
-            Array of base file names in the map URI. Returns False on
-            exception.
+            Generator of dicts with "chopped_uri" and "filename" keys, for
+            files in the map URI that are listed as the generator is
+            consumed. Returns False on exception.
 
         """
-        combined_file_list = []
+        file_iters = []
         for uri in self._parsed_map_uris:
             # make sure map URI is compatible scheme (local)
             if uri['scheme'] != 'local':
@@ -177,66 +178,34 @@ class LocalStep(WorkflowStep):
                 Log.an().error(msg)
                 return self._fatal(msg)
 
-            # get file list from URI
-            file_list = DataManager.list(
+            # scan files in URI
+            file_iter = DataManager.scan(
                 parsed_uri=uri,
-                globstr=self._step['map']['glob']
+                globstr=self._step['map']['glob'],
+                with_stat=False
             )
 
-            if file_list is False:
+            if file_iter is False:
                 msg = 'cannot get contents of map uri: {}'\
                     .format(uri['chopped_uri'])
                 Log.an().error(msg)
                 return self._fatal(msg)
 
-            if self._step['map']['inclusive']:
-                # filter with glob
-                if glob.globfilter(
-                    [uri['name']],
-                    self._step['map']['glob'],
-                    flags=glob.EXTGLOB|glob.GLOBSTAR
-                ):
-                    combined_file_list.append({
-                        'chopped_uri': '{}://{}{}'.format(
-                            uri['scheme'],
-                            uri['authority'],
-                            uri['folder']
-                        ),
-                        'filename': uri['name']
-                    })
-
-            for f in file_list:
-                if '/' in f:
-                    # reparse uri to correctly represent recursive elements
-                    new_uri = URIParser.parse('{}/{}'.format(uri['chopped_uri'], f))
-                    combined_file_list.append({
-                        'chopped_uri': '{}://{}{}'.format(
-                            new_uri['scheme'],
-                            new_uri['authority'],
-                            new_uri['folder']
-                        ),
-                        'filename': new_uri['name']
-                    })
-                else:
-                    combined_file_list.append({
-                        'chopped_uri': uri['chopped_uri'],
-                        'filename': f
-                    })
-
-        return combined_file_list
+            file_iters.append((uri, file_iter))
 
+        return self._iterate_map_files(file_iters)
 
-    def _run_map(self, map_item):
+
+    def _get_command(self, map_item):
         """
-        Run a job for each map item and store the proc and PID.
+        Construct the shell command and log path of a map item.
 
         Args:
             self: class instance.
             map_item: map item object (item of self._map).
 
         Returns:
-            On success: True.
-            On failure: False.
+            Tuple of shell command and log path.
 
         """
         # load default app inputs, overwrite with template inputs
@@ -305,6 +274,24 @@ class LocalStep(WorkflowStep):
 
         Log.a().debug('command: %s', cmd)
 
+        return (cmd, log_path)
+
+
+    def _run_map(self, map_item):
+        """
+        Run a job for each map item and store the proc and PID.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        cmd, _ = self._get_command(map_item)
+
         # launch process
         proc = ShellWrapper.spawn(cmd)
         if proc is False:
@@ -315,10 +302,59 @@ class LocalStep(WorkflowStep):
         # record job info
         map_item['run'][map_item['attempt']]['proc'] = proc
         map_item['run'][map_item['attempt']]['pid'] = proc.pid
+        map_item['run'][map_item['attempt']]['pidfd'] \
+            = ShellWrapper.open_pidfd(proc)
 
         # set status of process
-        map_item['status'] = 'RUNNING'
-        map_item['run'][map_item['attempt']]['status'] = 'RUNNING'
+        self._set_item_status(map_item, 'RUNNING')
+
+        return True
+
+
+    def _run_chunk(self, map_items):
+        """
+        Run a chunk of map items in a single process.
+
+        Args:
+            self: class instance.
+            map_items: list of map item objects (items of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        if len(map_items) == 1:
+            return self._run_map(map_items[0])
+
+        chunk = []
+        for map_item in map_items:
+            cmd, log_path = self._get_command(map_item)
+            chunk.append((map_item, cmd, log_path))
+
+        script_path = self._write_chunk_script(chunk)
+        if not script_path:
+            return False
+
+        # launch process
+        cmd = '/bin/bash {}'.format(shlex.quote(script_path))
+        proc = ShellWrapper.spawn(cmd)
+        if proc is False:
+            msg = 'shell process error: {}'.format(cmd)
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        # record job info, only the first map item watches the process
+        pidfd = ShellWrapper.open_pidfd(proc)
+        for map_item in map_items:
+            map_item['run'][map_item['attempt']]['proc'] = proc
+            map_item['run'][map_item['attempt']]['pid'] = proc.pid
+            if pidfd is not None:
+                map_item['run'][map_item['attempt']]['pidfd'] = pidfd
+                pidfd = None
+
+            # set status of process
+            self._set_item_status(map_item, 'RUNNING')
 
         return True
 
@@ -328,6 +364,8 @@ class LocalStep(WorkflowStep):
         Execute shell scripts for each of the map items, as long as
         number of running jobs is < throttle limit.
 
+        Map items are grouped into chunks that run in a single process if
+        the "chunk_size" or "chunk_duration" execution parameter is set.
         Then store PIDs in run detail.
 
         Args:
@@ -338,29 +376,24 @@ class LocalStep(WorkflowStep):
             On failure: False.
 
         """
-        if self._throttle_limit > 0 and self._num_running >= self._throttle_limit:
+        if (
+                self._throttle_limit > 0
+                and self._get_num_running_jobs() >= self._throttle_limit
+        ):
             # throttle limit reached
             # exit without running anything new
             return True
 
-        for map_item in self._map:
-            if map_item['status'] == 'PENDING':
-                if not self._run_map(map_item):
-                    msg = 'cannot run script for map item "{}"'\
-                        .format(map_item['filename'])
-                    Log.an().error(msg)
-                    map_item['status'] = 'FAILED'
-                    map_item['run'][map_item['attempt']]['status']\
-                        = map_item['status']
-
-                else:
-                    self._num_running += 1
-                    if (
-                        self._throttle_limit > 0
-                        and self._num_running >= self._throttle_limit
-                    ):
-                        # reached throttle limit
-                        break
+        for map_items in self._get_pending_chunks():
+            if not self._run_chunk(map_items):
+                msg = 'cannot run script for map items "{}"'\
+                    .format(', '.join(item['filename'] for item in map_items))
+                Log.an().error(msg)
+                for map_item in map_items:
+                    self._set_item_status(map_item, 'FAILED')
+
+            else:
+                self._num_running += len(map_items)
 
         self._update_status_db('RUNNING', '')
 
@@ -402,17 +435,20 @@ class LocalStep(WorkflowStep):
 
         """
         # check if procs are running, finished, or failed
-        for map_item in self._map:
+        for map_item in list(self._active_items.values()):
             if map_item['status'] in ['RUNNING','UNKNOWN']:
                 try:
                     if not ShellWrapper.is_running(
                             map_item['run'][map_item['attempt']]['proc']
                     ):
-                        returncode = map_item['run'][map_item['attempt']]['proc'].returncode
-                        if returncode:
-                            map_item['status'] = 'FAILED'
+                        if 'log_path' in map_item['run'][map_item['attempt']]:
+                            # map item of a chunk
+                            returncode = self._read_exit_status(map_item)
                         else:
-                            map_item['status'] = 'FINISHED'
+                            returncode = map_item['run'][map_item['attempt']]['proc'].returncode
+                        self._set_item_status(
+                            map_item, 'FAILED' if returncode else 'FINISHED'
+                        )
 
                         Log.a().debug(
                             '[step.%s]: exit status: %s -> %s',
@@ -421,6 +457,12 @@ class LocalStep(WorkflowStep):
                             returncode
                         )
 
+                        # process has been reaped, stop watching it
+                        ShellWrapper.close_pidfd(
+                            map_item['run'][map_item['attempt']]\
+                                .pop('pidfd', None)
+                        )
+
                         # decrease num running procs
                         if self._num_running > 0:
                             self._num_running -= 1
@@ -430,16 +472,32 @@ class LocalStep(WorkflowStep):
                         'process polling failed for map item "%s" [%s]',
                         map_item['filename'], str(err)
                     )
-                    map_item['status'] = 'UNKNOWN'
-
-                map_item['run'][map_item['attempt']]['status']\
-                    = map_item['status']
+                    self._set_item_status(map_item, 'UNKNOWN')
 
         self._update_status_db(self._status, '')
 
         return True
 
 
+    def get_wait_fds(self):
+        """
+        Return pidfds of all running map items.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            List of file descriptors.
+
+        """
+        return [
+            map_item['run'][map_item['attempt']]['pidfd']
+            for map_item in self._active_items.values()
+            if map_item['status'] == 'RUNNING'
+            and map_item['run'][map_item['attempt']].get('pidfd') is not None
+        ]
+
+
     def retry_failed(self):
         """
         Retry any map-reduce jobs that failed.
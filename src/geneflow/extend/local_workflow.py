@@ -51,7 +51,14 @@ class LocalWorkflow:
             None.
 
         Returns:
-            {} - no options specific for this context.
+            Dict containing the number of copy threads, the copy chunk size,
+            the stage strategy and sync options.
 
         """
-        return {}
+        return {
+            'copy_threads': self._config.get('copy_threads', 8),
+            'copy_chunk_size': self._config.get('copy_chunk_size', 67108864),
+            'stage_strategy': self._config.get('stage_strategy', 'auto'),
+            'sync_checksum': self._config.get('sync_checksum', False),
+            'sync_delete': self._config.get('sync_delete', False)
+        }
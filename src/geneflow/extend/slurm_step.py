@@ -4,13 +4,15 @@
 import drmaa
 import os
 from slugify import slugify
+import shlex
 import shutil
-from wcmatch import glob
 
 from geneflow.log import Log
 from geneflow.workflow_step import WorkflowStep
 from geneflow.data_manager import DataManager
 from geneflow.uri_parser import URIParser
+from geneflow.shell_wrapper import ShellWrapper
+from geneflow.extend.job_status import STATUS_PROVIDERS
 
 
 class SlurmStep(WorkflowStep):
@@ -68,6 +70,18 @@ class SlurmStep(WorkflowStep):
             drmaa.JobState.FAILED: 'FAILED'
         }
 
+        # submit map items as job arrays with sbatch instead of drmaa
+        self._array = str(
+            self._step['execution']['parameters'].get('array', False)
+        ).lower() in ['true', 'yes', '1']
+        self._array_count = 0  # number of job arrays submitted
+
+        # query status of all jobs of the step at once, instead of one
+        # drmaa call per job
+        self._status_provider = None
+        self._status_provider_name = self._step['execution']['parameters']\
+            .get('status_provider', 'squeue' if self._array else 'drmaa')
+
 
     def initialize(self):
         """
@@ -103,6 +117,22 @@ class SlurmStep(WorkflowStep):
             Log.an().error(msg)
             return self._fatal(msg)
 
+        # make sure status provider is valid
+        if self._status_provider_name != 'drmaa':
+            if self._status_provider_name not in ['squeue', 'sacct']:
+                msg = 'invalid status provider for slurm step: {}'.format(
+                    self._status_provider_name
+                )
+                Log.an().error(msg)
+                return self._fatal(msg)
+            self._status_provider\
+                = STATUS_PROVIDERS[self._status_provider_name]()
+
+        elif self._array:
+            msg = 'status of slurm job arrays cannot be checked with drmaa'
+            Log.an().error(msg)
+            return self._fatal(msg)
+
         if not super(SlurmStep, self).initialize():
             msg = 'cannot initialize workflow step'
             Log.an().error(msg)
@@ -181,11 +211,12 @@ class SlurmStep(WorkflowStep):
             self: class instance.
 
         Returns:
-            Array of base file names in the map URI. Returns False on
-            exception.
+            Generator of dicts with "chopped_uri" and "filename" keys, for
+            files in the map URI that are listed as the generator is
+            consumed. Returns False on exception.
 
         """
-        combined_file_list = []
+        file_iters = []
         for uri in self._parsed_map_uris:
             # make sure map URI is compatible scheme (local)
             if uri['scheme'] != 'local':
@@ -195,64 +226,34 @@ class SlurmStep(WorkflowStep):
                 Log.an().error(msg)
                 return self._fatal(msg)
 
-            # get file list from URI
-            file_list = DataManager.list(
+            # scan files in URI
+            file_iter = DataManager.scan(
                 parsed_uri=uri,
-                globstr=self._step['map']['glob']
+                globstr=self._step['map']['glob'],
+                with_stat=False
             )
-            if file_list is False:
+
+            if file_iter is False:
                 msg = 'cannot get contents of map uri: {}'\
                     .format(uri['chopped_uri'])
                 Log.an().error(msg)
                 return self._fatal(msg)
 
-            if self._step['map']['inclusive']:
-                # filter with glob
-                if glob.globfilter(
-                    [uri['name']],
-                    self._step['map']['glob'],
-                    flags=glob.EXTGLOB|glob.GLOBSTAR
-                ):
-                    combined_file_list.append({
-                        'chopped_uri': '{}://{}{}'.format(
-                            uri['scheme'],
-                            uri['authority'],
-                            uri['folder']
-                        ),
-                        'filename': uri['name']
-                    })
-
-            for f in file_list:
-                if '/' in f:
-                    # reparse uri to correctly represent recursive elements
-                    new_uri = URIParser.parse('{}/{}'.format(uri['chopped_uri'], f))
-                    combined_file_list.append({
-                        'chopped_uri': '{}://{}{}'.format(
-                            new_uri['scheme'],
-                            new_uri['authority'],
-                            new_uri['folder']
-                        ),
-                        'filename': new_uri['name']
-                    })
-                else:
-                    combined_file_list.append({
-                        'chopped_uri': uri['chopped_uri'],
-                        'filename': f
-                    })
-
-        return combined_file_list
+            file_iters.append((uri, file_iter))
 
+        return self._iterate_map_files(file_iters)
 
-    def _run_map(self, map_item):
+
+    def _get_job_args(self, map_item):
         """
-        Run a job for each map item and store the job ID.
+        Construct wrapper script arguments, job name and log path of a job.
 
         Args:
             self: class instance.
             map_item: map item object (item of self._map).
 
         Returns:
-            On success: True.
+            On success: tuple of argument list, job name and log path.
             On failure: False.
 
         """
@@ -340,15 +341,20 @@ class SlurmStep(WorkflowStep):
             name
         )
 
-        # create and populate job template
-        jt = self._slurm['drmaa_session'].createJobTemplate()
-        jt.remoteCommand = '/bin/bash'
-        jt.args = args
-        jt.jobName = name
-        jt.errorPath = ':{}.err'.format(log_path)
-        jt.outputPath = ':{}.out'.format(log_path)
+        return (args, name, log_path)
 
-        # pass execution parameters to job template
+
+    def _get_native_spec(self):
+        """
+        Construct slurm options from execution parameters.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            String of slurm options.
+
+        """
         native_spec = ' --nodes=1 --ntasks=1'
         if 'queue' in self._step['execution']['parameters']:
             native_spec += ' -p {}'.format(
@@ -362,7 +368,38 @@ class SlurmStep(WorkflowStep):
             native_spec += ' {}'.format(
                 self._step['execution']['parameters']['other']
             )
-        jt.nativeSpecification = native_spec
+
+        return native_spec
+
+
+    def _run_map(self, map_item):
+        """
+        Run a job for each map item and store the job ID.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        job_args = self._get_job_args(map_item)
+        if not job_args:
+            return False
+        args, name, log_path = job_args
+
+        # create and populate job template
+        jt = self._slurm['drmaa_session'].createJobTemplate()
+        jt.remoteCommand = '/bin/bash'
+        jt.args = args
+        jt.jobName = name
+        jt.errorPath = ':{}.err'.format(log_path)
+        jt.outputPath = ':{}.out'.format(log_path)
+
+        # pass execution parameters to job template
+        jt.nativeSpecification = self._get_native_spec()
 
         # submit hpc job using drmaa library
         try:
@@ -374,8 +411,7 @@ class SlurmStep(WorkflowStep):
             Log.a().warning(msg)
 
             # set to failed, but return True so that it's retried
-            map_item['status'] = 'FAILED'
-            map_item['run'][map_item['attempt']]['status'] = 'FAILED'
+            self._set_item_status(map_item, 'FAILED')
 
             return True
 
@@ -392,8 +428,195 @@ class SlurmStep(WorkflowStep):
         map_item['run'][map_item['attempt']]['hpc_job_id'] = job_id
 
         # set status of process
-        map_item['status'] = 'QUEUED'
-        map_item['run'][map_item['attempt']]['status'] = 'QUEUED'
+        self._set_item_status(map_item, 'QUEUED')
+
+        return True
+
+
+    def _run_chunk(self, map_items):
+        """
+        Run a chunk of map items as a single slurm job.
+
+        Args:
+            self: class instance.
+            map_items: list of map item objects (items of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        if len(map_items) == 1:
+            return self._run_map(map_items[0])
+
+        chunk = []
+        for map_item in map_items:
+            job_args = self._get_job_args(map_item)
+            if not job_args:
+                return False
+            args, _, log_path = job_args
+            chunk.append((
+                map_item,
+                '{} > {} 2> {}'.format(
+                    ' '.join(shlex.quote(arg) for arg in ['/bin/bash']+args),
+                    shlex.quote(log_path+'.out'),
+                    shlex.quote(log_path+'.err')
+                ),
+                log_path
+            ))
+
+        script_path = self._write_chunk_script(chunk)
+        if not script_path:
+            return False
+        name = os.path.splitext(os.path.basename(script_path))[0]
+
+        # create and populate job template
+        jt = self._slurm['drmaa_session'].createJobTemplate()
+        jt.remoteCommand = '/bin/bash'
+        jt.args = [script_path]
+        jt.jobName = name
+        jt.errorPath = ':{}.err'.format(os.path.splitext(script_path)[0])
+        jt.outputPath = ':{}.out'.format(os.path.splitext(script_path)[0])
+        jt.nativeSpecification = self._get_native_spec()
+
+        # submit hpc job using drmaa library
+        try:
+            job_id = self._slurm['drmaa_session'].runJob(jt)
+
+        except drmaa.DrmCommunicationException as err:
+            msg = 'cannot submit slurm job for step "{}" [{}]'\
+                    .format(self._step['name'], str(err))
+            Log.a().warning(msg)
+
+            # set to failed, but return True so that they're retried
+            for map_item in map_items:
+                self._set_item_status(map_item, 'FAILED')
+
+            return True
+
+        self._slurm['drmaa_session'].deleteJobTemplate(jt)
+
+        Log.a().debug(
+            '[step.%s]: hpc job id: %s -> %s (%s items)',
+            self._step['name'],
+            name,
+            job_id,
+            len(map_items)
+        )
+
+        # record job info
+        for map_item in map_items:
+            map_item['run'][map_item['attempt']]['hpc_job_id'] = job_id
+            self._set_item_status(map_item, 'QUEUED')
+
+        return True
+
+
+    def _run_array(self, map_items):
+        """
+        Submit map items as a single slurm job array with sbatch.
+
+        Arguments of each array task are written to an argument table in
+        the _log folder, one line per task. Each task writes its exit code
+        to "<log path>.exit". The throttle limit is also applied to the
+        array with the "%N" option, as a safeguard.
+
+        Args:
+            self: class instance.
+            map_items: list of map item objects (items of self._map).
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        log_dir = '{}/_log'.format(
+            self._parsed_data_uris[self._source_context][0]['chopped_path']
+        )
+        array_name = 'gf-array-{}-{}'.format(
+            self._array_count,
+            slugify(self._step['name'], regex_pattern=r'[^-a-z0-9_]+')
+        )
+        table_path = '{}/{}.args'.format(log_dir, array_name)
+        script_path = '{}/{}.sh'.format(log_dir, array_name)
+
+        # construct argument table, with log path as first column
+        lines = []
+        for map_item in map_items:
+            job_args = self._get_job_args(map_item)
+            if not job_args:
+                return False
+            args, _, log_path = job_args
+            map_item['run'][map_item['attempt']]['log_path'] = log_path
+            lines.append(' '.join(
+                shlex.quote(arg) for arg in [log_path]+args
+            ))
+
+        try:
+            with open(table_path, 'w') as table_file:
+                table_file.write('\n'.join(lines)+'\n')
+            with open(script_path, 'w') as script_file:
+                script_file.write(
+                    '#!/bin/bash\n'
+                    'LINE=$(sed -n "$((SLURM_ARRAY_TASK_ID+1))p" {})\n'
+                    'eval "set -- ${{LINE}}"\n'
+                    'LOG="$1"\n'
+                    'shift\n'
+                    '/bin/bash "$@" > "${{LOG}}.out" 2> "${{LOG}}.err"\n'
+                    'echo $? > "${{LOG}}.exit"\n'.format(
+                        shlex.quote(table_path)
+                    )
+                )
+        except OSError as err:
+            msg = 'cannot write job array files for step "{}" [{}]'\
+                .format(self._step['name'], str(err))
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        array_spec = '0-{}'.format(len(map_items)-1)
+        if self._throttle_limit > 0:
+            array_spec += '%{}'.format(self._throttle_limit)
+
+        cmd = (
+            'sbatch --parsable --array={} --job-name={} --output={}{} {}'
+        ).format(
+            array_spec,
+            array_name,
+            shlex.quote('{}/{}-%a.slurm'.format(log_dir, array_name)),
+            self._get_native_spec(),
+            shlex.quote(script_path)
+        )
+        Log.a().debug('[step.%s]: command: %s', self._step['name'], cmd)
+
+        stdout = ShellWrapper.invoke(cmd)
+        if stdout is False:
+            # set to failed, but return True so that they're retried
+            Log.a().warning(
+                'cannot submit slurm job array for step "%s"',
+                self._step['name']
+            )
+            for map_item in map_items:
+                self._set_item_status(map_item, 'FAILED')
+
+            return True
+
+        # output of --parsable is "jobid[;cluster]"
+        array_job_id = stdout.decode().strip().split(';')[0]
+        self._array_count += 1
+
+        Log.a().debug(
+            '[step.%s]: hpc job array id: %s (%s tasks)',
+            self._step['name'],
+            array_job_id,
+            len(map_items)
+        )
+
+        # record job info
+        for i, map_item in enumerate(map_items):
+            map_item['run'][map_item['attempt']]['hpc_job_id']\
+                = '{}_{}'.format(array_job_id, i)
+            self._set_item_status(map_item, 'QUEUED')
+        self._num_running += len(map_items)
 
         return True
 
@@ -403,7 +626,13 @@ class SlurmStep(WorkflowStep):
         Execute shell scripts for each of the map items, as long as
         number of running jobs is < throttle limit.
 
-        Then store HPC job numbers in run detail.
+        Then store HPC job numbers in run detail. If the "array" execution
+        parameter is set, pending map items are submitted as one job array,
+        up to the throttle limit less the running map items of all arrays of
+        the step, and as many as fit in the free disk space if a disk
+        threshold is set. Otherwise, map
+        items are grouped into chunks that run as a single job if the
+        "chunk_size" or "chunk_duration" execution parameter is set.
 
         Args:
             self: class instance.
@@ -413,29 +642,46 @@ class SlurmStep(WorkflowStep):
             On failure: False.
 
         """
-        if self._throttle_limit > 0 and self._num_running >= self._throttle_limit:
+        if self._array:
+            self._restore_cached_items()
+
+            # apply the throttle limit to all arrays of the step
+            limit = self._get_admission_limit()
+            if self._throttle_limit > 0:
+                limit = self._throttle_limit - self._num_running\
+                    if limit is None\
+                    else min(limit, self._throttle_limit - self._num_running)
+            pending = self._pop_pending_items(limit)
+            if pending:
+                if not self._run_array(pending):
+                    msg = 'cannot queue job array for step "{}"'\
+                        .format(self._step['name'])
+                    Log.an().error(msg)
+                    for map_item in pending:
+                        self._set_item_status(map_item, 'FAILED')
+
+            self._update_status_db('RUNNING', '')
+
+            return True
+
+        if (
+                self._throttle_limit > 0
+                and self._get_num_running_jobs() >= self._throttle_limit
+        ):
             # throttle limit reached
             # exit without running anything new
             return True
 
-        for map_item in self._map:
-            if map_item['status'] == 'PENDING':
-                if not self._run_map(map_item):
-                    msg = 'cannot queue job for map item "{}"'\
-                        .format(map_item['filename'])
-                    Log.an().error(msg)
-                    map_item['status'] = 'FAILED'
-                    map_item['run'][map_item['attempt']]['status']\
-                        = map_item['status']
-
-                else:
-                    self._num_running += 1
-                    if (
-                        self._throttle_limit > 0
-                        and self._num_running >= self._throttle_limit
-                    ):
-                        # reached throttle limit
-                        break
+        for map_items in self._get_pending_chunks():
+            if not self._run_chunk(map_items):
+                msg = 'cannot queue job for map items "{}"'\
+                    .format(', '.join(item['filename'] for item in map_items))
+                Log.an().error(msg)
+                for map_item in map_items:
+                    self._set_item_status(map_item, 'FAILED')
+
+            else:
+                self._num_running += len(map_items)
 
         self._update_status_db('RUNNING', '')
 
@@ -452,10 +698,33 @@ class SlurmStep(WorkflowStep):
             self: class instance.
 
         Returns:
-            A dict of all map items and their run histories.
+            A list of all map items and their run histories.
 
         """
-        return self._map
+        return [map_item.to_dict() for map_item in self._map]
+
+
+    def _get_exit_status(self, map_item):
+        """
+        Get the exit status of a job that is no longer in the queue.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            Exit status, or None if the job has not finished yet.
+
+        """
+        try:
+            job_info = self._slurm['drmaa_session'].wait(
+                map_item['run'][map_item['attempt']]['hpc_job_id'],
+                self._slurm['drmaa_session'].TIMEOUT_NO_WAIT
+            )
+        except drmaa.errors.DrmaaException:
+            return None
+
+        return job_info.exitStatus
 
 
     def check_running_jobs(self):
@@ -469,46 +738,77 @@ class SlurmStep(WorkflowStep):
             True.
 
         """
+        if self._array:
+            self._check_jobs_bulk()
+            for map_item in list(self._failed_items.values()):
+                if map_item['attempt'] < 5:
+                    # requeue for the next job array
+                    self.retry_failed(map_item)
+
+            self._update_status_db(self._status, '')
+
+            return True
+
+        if self._status_provider:
+            self._check_jobs_bulk()
+
         # check if jobs are running, finished, or failed
-        for map_item in self._map:
-            if map_item['status'] not in ['FINISHED','FAILED','PENDING']:
+        # jobs of chunks are shared by their map items
+        job_states = {}
+        job_infos = {}
+        if not self._status_provider:
+            for map_item in list(self._active_items.values()):
+                hpc_job_id = map_item['run'][map_item['attempt']]['hpc_job_id']
                 try:
                     # can only get job status if it has not already been disposed with "wait"
-                    status = self._slurm['drmaa_session'].jobStatus(
-                        map_item['run'][map_item['attempt']]['hpc_job_id']
+                    if hpc_job_id not in job_states:
+                        job_states[hpc_job_id] \
+                            = self._slurm['drmaa_session'].jobStatus(hpc_job_id)
+                    self._set_item_status(
+                        map_item, self._job_status_map[job_states[hpc_job_id]]
                     )
-                    map_item['status'] = self._job_status_map[status]
 
                 except drmaa.DrmCommunicationException as err:
                     msg = 'cannot get job status for step "{}" [{}]'\
                             .format(self._step['name'], str(err))
                     Log.a().warning(msg)
-                    map_item['status'] = 'UNKNOWN'
+                    self._set_item_status(map_item, 'UNKNOWN')
 
                 if map_item['status'] in ['FINISHED','FAILED']:
                     # check exit status
-                    job_info = self._slurm['drmaa_session'].wait(
-                        map_item['run'][map_item['attempt']]['hpc_job_id'],
-                        self._slurm['drmaa_session'].TIMEOUT_NO_WAIT
-                    )
+                    if hpc_job_id not in job_infos:
+                        job_infos[hpc_job_id] = self._slurm['drmaa_session'].wait(
+                            hpc_job_id,
+                            self._slurm['drmaa_session'].TIMEOUT_NO_WAIT
+                        )
+                    exit_status = job_infos[hpc_job_id].exitStatus
+                    if 'log_path' in map_item['run'][map_item['attempt']]:
+                        # map item of a chunk
+                        exit_status = self._read_exit_status(map_item)
+                        self._set_item_status(
+                            map_item, 'FAILED' if exit_status else 'FINISHED'
+                        )
                     Log.a().debug(
                         '[step.%s]: exit status: %s -> %s',
                         self._step['name'],
                         map_item['template']['output'],
-                        job_info.exitStatus
+                        exit_status
                     )
-                    if job_info.exitStatus > 0:
+                    if exit_status > 0:
                         # job actually failed
-                        map_item['status'] = 'FAILED'
+                        self._set_item_status(map_item, 'FAILED')
 
                     # decrease num running procs
                     if self._num_running > 0:
                         self._num_running -= 1
 
-            map_item['run'][map_item['attempt']]['status'] = map_item['status']
-
-            if map_item['status'] == 'FAILED' and map_item['attempt'] < 5:
-                if self._throttle_limit == 0 or self._num_running < self._throttle_limit:
+        for map_item in list(self._failed_items.values()):
+            if map_item['attempt'] < 5:
+                if (
+                        self._throttle_limit == 0
+                        or self._get_num_running_jobs()
+                        < self._throttle_limit
+                ):
                     # retry job if not at retry or throttle limit
                     if not self.retry_failed(map_item):
                         Log.a().warning(
@@ -547,6 +847,11 @@ class SlurmStep(WorkflowStep):
         # add another run to list
         map_item['attempt'] += 1
         map_item['run'].append({})
+        if self._array:
+            # submitted with the next job array
+            self._set_item_status(map_item, 'PENDING')
+            return True
+
         if not self._run_map(map_item):
             Log.a().warning(
                 '[step.%s]: cannot retry slurm job (%s), attempt number %s',
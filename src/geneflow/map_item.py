@@ -0,0 +1,173 @@
+"""This module contains the GeneFlow MapItem and MapTemplate classes."""
+
+from collections.abc import Mapping
+
+
+# marks template values that have not been expanded yet
+_UNSET = object()
+
+
+class MapTemplate(Mapping):
+    """
+    Expanded template values of a map item.
+
+    The template keys of a step are stored once, in an index dict that is
+    shared by the templates of all map items of the step. Each template only
+    stores a list of values.
+    """
+
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index):
+        """
+        Instantiate MapTemplate class.
+
+        Args:
+            self: class instance.
+            index: dict of template key -> value position, shared by all map
+                items of a step.
+
+        Returns:
+            Class instance.
+
+        """
+        self._index = index
+        self._values = [_UNSET] * len(index)
+
+
+    def __getitem__(self, key):
+        """Return template value, or raise KeyError if not expanded."""
+        value = self._values[self._index[key]]
+        if value is _UNSET:
+            raise KeyError(key)
+
+        return value
+
+
+    def __setitem__(self, key, value):
+        """Set template value, key must be a template key of the step."""
+        self._values[self._index[key]] = value
+
+
+    def __contains__(self, key):
+        """Check if a template value has been expanded."""
+        return key in self._index and self._values[self._index[key]] is not _UNSET
+
+
+    def __iter__(self):
+        """Iterate over keys of expanded template values."""
+        return (
+            key for key, value in zip(self._index, self._values)
+            if value is not _UNSET
+        )
+
+
+    def __len__(self):
+        """Return number of expanded template values."""
+        return sum(1 for value in self._values if value is not _UNSET)
+
+
+class MapItem:
+    """
+    A map-reduce item of a workflow step.
+
+    Map items support dict-style access to their fields: "filename",
+    "chopped_uri", "replace", "template", "status", "attempt" and "run".
+    The "replace" dict is derived from the regex groups of the file name,
+    which are stored as a tuple.
+    """
+
+    __slots__ = (
+        'filename', 'chopped_uri', 'groups', 'template', 'status', 'attempt',
+        'run'
+    )
+
+    def __init__(
+            self,
+            filename,
+            chopped_uri,
+            template,
+            groups=(),
+            status='PENDING'
+    ):
+        """
+        Instantiate MapItem class.
+
+        Args:
+            self: class instance.
+            filename: name of the map item.
+            chopped_uri: URI of the folder that contains the map item.
+            template: MapTemplate instance.
+            groups: tuple of regex groups matched in the file name.
+            status: initial map item status.
+
+        Returns:
+            Class instance.
+
+        """
+        self.filename = filename
+        self.chopped_uri = chopped_uri
+        self.groups = groups
+        self.template = template
+        self.status = status
+        self.attempt = 0
+        self.run = [{}]
+
+
+    @property
+    def replace(self):
+        """Return dict of regex group placeholders -> matched values."""
+        return {
+            '${'+str(i+1)+'}': group for i, group in enumerate(self.groups)
+        }
+
+
+    def __getitem__(self, key):
+        """Return field value, or raise KeyError for unknown fields."""
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+    def __setitem__(self, key, value):
+        """Set field value, or raise KeyError for unknown fields."""
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+    def __contains__(self, key):
+        """Check if a field exists."""
+        return key == 'replace' or key in self.__slots__
+
+
+    def get(self, key, default=None):
+        """Return field value, or default for unknown fields."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+    def to_dict(self):
+        """
+        Convert map item to a dict, e.g., for JSON serialization.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Dict of map item fields.
+
+        """
+        return {
+            'filename': self.filename,
+            'chopped_uri': self.chopped_uri,
+            'replace': self.replace,
+            'template': dict(self.template),
+            'status': self.status,
+            'attempt': self.attempt,
+            'run': self.run
+        }
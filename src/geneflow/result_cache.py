@@ -0,0 +1,386 @@
+"""This module contains the GeneFlow ResultCache class."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+import time
+import uuid
+
+from geneflow.log import Log
+
+
+class ResultCache:
+    """
+    Content-addressed cache of map item outputs.
+
+    Outputs are stored in "<cache path>/objects/<key>" and indexed in a
+    SQLite database with their size and last access time. When the total
+    size exceeds the size limit, least recently used outputs are evicted.
+    File digests are memoized by path, size and modification time.
+    """
+
+    def __init__(self, cache_path=None, size_limit=0):
+        """
+        Instantiate ResultCache class.
+
+        Args:
+            self: class instance.
+            cache_path: cache directory, defaults to ~/.geneflow/cache.
+            size_limit: maximum size of cached outputs in bytes, 0 means no
+                limit.
+
+        Returns:
+            Class instance.
+
+        """
+        self._path = Path(
+            os.path.expanduser(cache_path or '~/.geneflow/cache')
+        )
+        self._size_limit = size_limit
+        self._conn = None
+        # total size of cached outputs, updated by store() and prune()
+        self._total_size = 0
+
+
+    def initialize(self):
+        """
+        Create cache directories and open the index.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        try:
+            (self._path / 'objects').mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(self._path / 'index.db'), timeout=60
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS entry ('
+                ' key TEXT PRIMARY KEY, app TEXT, name TEXT,'
+                ' size INTEGER, created REAL, accessed REAL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS digest ('
+                ' path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER,'
+                ' digest TEXT)'
+            )
+            self._conn.commit()
+            self._total_size = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM entry'
+            ).fetchone()[0]
+
+        except (OSError, sqlite3.Error) as err:
+            Log.an().error(
+                'cannot initialize result cache: %s [%s]', self._path, str(err)
+            )
+            return False
+
+        return True
+
+
+    def close(self):
+        """Close the index."""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+
+    @staticmethod
+    def _hash_file(path):
+        """Return sha256 hex digest of file contents."""
+        sha = hashlib.sha256()
+        with open(path, 'rb') as data_file:
+            for block in iter(lambda: data_file.read(1 << 20), b''):
+                sha.update(block)
+
+        return sha.hexdigest()
+
+
+    def _file_digest(self, path):
+        """Return digest of a file, memoized by size and modification time."""
+        stat = os.stat(path)
+        row = self._conn.execute(
+            'SELECT digest FROM digest WHERE path = ? AND size = ?'
+            ' AND mtime = ?',
+            (path, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        digest = self._hash_file(path)
+        self._conn.execute(
+            'INSERT OR REPLACE INTO digest VALUES (?, ?, ?, ?)',
+            (path, stat.st_size, stat.st_mtime_ns, digest)
+        )
+        self._conn.commit()
+
+        return digest
+
+
+    def digest(self, path):
+        """
+        Get the digest of a file or directory.
+
+        The digest of a directory covers the relative paths and contents of
+        all files in it.
+
+        Args:
+            self: class instance.
+            path: local file or directory path.
+
+        Returns:
+            On success: hex digest string.
+            On failure: None.
+
+        """
+        try:
+            if os.path.isdir(path):
+                sha = hashlib.sha256()
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        file_path = os.path.join(root, name)
+                        sha.update(os.path.relpath(file_path, path).encode())
+                        sha.update(self._file_digest(file_path).encode())
+                return sha.hexdigest()
+
+            return self._file_digest(path)
+
+        except (OSError, sqlite3.Error) as err:
+            Log.a().warning('cannot get digest of %s [%s]', path, str(err))
+            return None
+
+
+    @staticmethod
+    def key(app, method, parameters, input_digests):
+        """
+        Compute the cache key of a map item.
+
+        Args:
+            app: app dict with name, version and git fields.
+            method: execution method.
+            parameters: dict of map item template values other than inputs.
+            input_digests: dict of input name -> digest of input data.
+
+        Returns:
+            Hex key string.
+
+        """
+        return hashlib.sha256(json.dumps({
+            'app': [app.get('name'), app.get('version'), app.get('git')],
+            'method': method,
+            'parameters': parameters,
+            'inputs': input_digests
+        }, sort_keys=True, default=str).encode()).hexdigest()
+
+
+    @staticmethod
+    def _copy(src, dst):
+        """Copy a file or directory tree."""
+        if os.path.isdir(src):
+            shutil.copytree(src, dst)
+        else:
+            shutil.copy2(src, dst)
+
+
+    @staticmethod
+    def _remove(path):
+        """Remove a file or directory tree, if it exists."""
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+
+    @staticmethod
+    def _size(path):
+        """Return total size of a file or directory tree in bytes."""
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(path) for name in files
+        )
+
+
+    def restore(self, key, dest_path):
+        """
+        Copy a cached output to a step output.
+
+        The output is copied rather than linked, so that changes to it, e.g.,
+        after it has been moved to the final output URI, do not alter the
+        cache.
+
+        Args:
+            self: class instance.
+            key: cache key.
+            dest_path: local path of the output to create.
+
+        Returns:
+            True if the output was restored, False if it is not cached.
+
+        """
+        object_path = str(self._path / 'objects' / key)
+        try:
+            row = self._conn.execute(
+                'SELECT key FROM entry WHERE key = ?', (key,)
+            ).fetchone()
+            if not row or not os.path.lexists(object_path):
+                return False
+
+            self._remove(dest_path)
+            self._copy(object_path, dest_path)
+
+            self._conn.execute(
+                'UPDATE entry SET accessed = ? WHERE key = ?',
+                (time.time(), key)
+            )
+            self._conn.commit()
+
+        except (OSError, shutil.Error, sqlite3.Error) as err:
+            Log.a().warning(
+                'cannot restore cached output %s [%s]', dest_path, str(err)
+            )
+            return False
+
+        return True
+
+
+    def store(self, key, src_path, app_name=''):
+        """
+        Add an output to the cache, then evict entries if the total size
+        exceeds the size limit.
+
+        The output is copied, so that changes to it do not alter the cache.
+
+        Args:
+            self: class instance.
+            key: cache key.
+            src_path: local path of the output.
+            app_name: name of the app that created the output.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        object_path = str(self._path / 'objects' / key)
+        tmp_path = '{}.{}.tmp'.format(object_path, uuid.uuid4().hex)
+        try:
+            if not os.path.lexists(object_path):
+                self._copy(src_path, tmp_path)
+                os.replace(tmp_path, object_path)
+
+            size = self._size(object_path)
+            row = self._conn.execute(
+                'SELECT size FROM entry WHERE key = ?', (key,)
+            ).fetchone()
+
+            now = time.time()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entry VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    key, app_name, os.path.basename(src_path),
+                    size, now, now
+                )
+            )
+            self._conn.commit()
+            self._total_size += size - (row[0] if row else 0)
+
+        except (OSError, shutil.Error, sqlite3.Error) as err:
+            Log.a().warning(
+                'cannot add output to result cache: %s [%s]',
+                src_path, str(err)
+            )
+            self._remove(tmp_path)
+            return False
+
+        if self._size_limit and self._total_size > self._size_limit:
+            self.prune(self._size_limit)
+
+        return True
+
+
+    def list(self):
+        """
+        List cache entries, most recently used first.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            List of dicts with key, app, name, size, created and accessed
+            fields.
+
+        """
+        return [
+            dict(zip(
+                ['key', 'app', 'name', 'size', 'created', 'accessed'], row
+            ))
+            for row in self._conn.execute(
+                'SELECT key, app, name, size, created, accessed FROM entry'
+                ' ORDER BY accessed DESC'
+            )
+        ]
+
+
+    def prune(self, size_limit):
+        """
+        Evict least recently used entries until the cache fits a size.
+
+        Args:
+            self: class instance.
+            size_limit: maximum total size in bytes.
+
+        Returns:
+            Tuple of number of entries and bytes evicted.
+
+        """
+        rows = self._conn.execute(
+            'SELECT key, size FROM entry ORDER BY accessed DESC'
+        ).fetchall()
+
+        total = 0
+        evict = []
+        for key, size in rows:
+            total += size
+            if total > size_limit:
+                evict.append((key, size))
+
+        for key, _ in evict:
+            self._remove(str(self._path / 'objects' / key))
+            self._conn.execute('DELETE FROM entry WHERE key = ?', (key,))
+        self._conn.commit()
+
+        evicted = sum(size for _, size in evict)
+        # resync with entries stored by other processes
+        self._total_size = total - evicted
+
+        return (len(evict), evicted)
+
+
+    def clear(self):
+        """
+        Remove all cache entries and memoized digests.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Tuple of number of entries and bytes evicted.
+
+        """
+        result = self.prune(0)
+        self._conn.execute('DELETE FROM digest')
+        self._conn.commit()
+
+        return result
@@ -1,7 +1,9 @@
 """This module contains the GeneFlow ShellWrapper class."""
 
 import os
+import select
 from subprocess import (PIPE, Popen)
+import time
 
 from geneflow.log import Log
 
@@ -73,3 +75,70 @@ class ShellWrapper:
 
         """
         return proc.poll() is None
+
+
+    @staticmethod
+    def open_pidfd(proc):
+        """
+        Open a file descriptor that becomes readable when the process exits.
+
+        Args:
+            proc: The process object to be watched.
+
+        Returns:
+            On success: file descriptor.
+            If pidfds are not supported by the platform: None.
+
+        """
+        try:
+            return os.pidfd_open(proc.pid)
+        except (AttributeError, OSError):
+            return None
+
+
+    @staticmethod
+    def close_pidfd(pidfd):
+        """
+        Close a file descriptor returned by open_pidfd().
+
+        Args:
+            pidfd: The file descriptor, or None.
+
+        Returns:
+            None.
+
+        """
+        if pidfd is None:
+            return
+
+        try:
+            os.close(pidfd)
+        except OSError as err:
+            Log.a().warning('cannot close pidfd: %s [%s]', pidfd, str(err))
+
+
+    @staticmethod
+    def wait_any(fds, timeout):
+        """
+        Wait until any of the processes watched by fds exits.
+
+        Falls back to sleeping for the full timeout if there is nothing to
+        watch.
+
+        Args:
+            fds: List of file descriptors returned by open_pidfd().
+            timeout: Maximum time to wait, in seconds.
+
+        Returns:
+            True if a watched process exited, False if timed out.
+
+        """
+        if not fds:
+            time.sleep(timeout)
+            return False
+
+        poller = select.poll()
+        for fd in fds:
+            poller.register(fd, select.POLLIN)
+
+        return bool(poller.poll(timeout * 1000))
@@ -1,5 +1,8 @@
 """This module contains the GeneFlow StageableData class."""
 
+from concurrent.futures import Future
+import threading
+
 from geneflow.data_manager import DataManager
 from geneflow.log import Log
 from geneflow.uri_parser import URIParser
@@ -42,6 +45,12 @@ class StageableData:
         self._staged_final = False
         # rm (clean) folders before staging?
         self._clean = clean
+        # numbers of files and bytes transferred and skipped when staging
+        self._stage_stats = {
+            'files_transferred': 0, 'bytes_transferred': 0,
+            'files_skipped': 0, 'bytes_skipped': 0, 'files_deleted': 0
+        }
+        self._stage_stats_lock = threading.Lock()
 
 
     def initialize(self):
@@ -91,119 +100,260 @@ class StageableData:
         return True
 
 
-    def stage(self, **kwargs):
+    def _stage_uri(self, parsed_src_uri, parsed_dest_uri, **kwargs):
         """
-        Copy data to all contexts except 'final' from source URI. Source URI can be multiple
-        locations, but only copy to the first element of dest URIs.
+        Copy data from a source URI to a destination URI.
 
-        Set _staged indicator to True on success.
+        If clean is set, the destination is removed first, and data is
+        copied. Otherwise, data is synced, so that only missing or changed
+        files are copied.
 
         Args:
             self: class instance.
+            parsed_src_uri: source URI, already parsed.
+            parsed_dest_uri: destination URI, already parsed.
             **kwargs: additional arguments required by DataManager.copy().
 
         Returns:
-            True or False.
+            On success: True.
+            On failure: False.
+
+        """
+        if self._clean:
+            if (
+                    DataManager.exists(parsed_uri=parsed_dest_uri)
+                    and not DataManager.delete(parsed_uri=parsed_dest_uri)
+            ):
+                Log.an().error(
+                    'cannot delete existing data uri: %s',
+                    parsed_dest_uri['chopped_uri']
+                )
+                return False
+
+            return DataManager.copy(
+                parsed_src_uri=parsed_src_uri,
+                parsed_dest_uri=parsed_dest_uri,
+                **kwargs
+            )
+
+        result = DataManager.sync(
+            parsed_src_uri=parsed_src_uri,
+            parsed_dest_uri=parsed_dest_uri,
+            **kwargs
+        )
+        if isinstance(result, dict):
+            Log.some().debug(
+                'synced %s: %s file(s) (%s bytes) transferred,'
+                ' %s file(s) (%s bytes) skipped',
+                parsed_dest_uri['chopped_uri'],
+                result['files_transferred'],
+                result['bytes_transferred'],
+                result['files_skipped'],
+                result['bytes_skipped']
+            )
+            with self._stage_stats_lock:
+                for key in self._stage_stats:
+                    self._stage_stats[key] += result[key]
+
+        return bool(result)
+
+
+    def _stage_final_uri(self, parsed_src_uri, parsed_dest_uri, **kwargs):
+        """
+        Move or copy data from a source URI to a final destination URI.
+
+        Local data is moved if the destination does not exist, or if clean
+        is set. Otherwise, data is staged with _stage_uri().
+
+        Args:
+            self: class instance.
+            parsed_src_uri: source URI, already parsed.
+            parsed_dest_uri: destination URI, already parsed.
+            **kwargs: additional arguments required by DataManager.move().
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        if (
+                parsed_src_uri['scheme'] != 'local'
+                or parsed_dest_uri['scheme'] != 'local'
+        ):
+            return self._stage_uri(parsed_src_uri, parsed_dest_uri, **kwargs)
+
+        dest_exists = DataManager.exists(parsed_uri=parsed_dest_uri)
+        if dest_exists and not self._clean:
+            return self._stage_uri(parsed_src_uri, parsed_dest_uri, **kwargs)
+
+        if dest_exists and not DataManager.delete(parsed_uri=parsed_dest_uri):
+            Log.an().error(
+                'cannot delete existing data uri: %s',
+                parsed_dest_uri['chopped_uri']
+            )
+            return False
+
+        # move final data instead of copy, only for local-->local schemes
+        return DataManager.move(
+            parsed_src_uri=parsed_src_uri,
+            parsed_dest_uri=parsed_dest_uri,
+            **kwargs
+        )
+
+
+    def submit_stage(self, executor=None, final=False, **kwargs):
+        """
+        Start copying data from source URI to other contexts.
+
+        Each context and URI is staged by a separate task. Without an
+        executor, tasks run one after another until one fails.
+
+        Args:
+            self: class instance.
+            executor: concurrent.futures executor that runs the tasks, or
+                None to run them right away.
+            final: stage to the 'final' context if True, otherwise stage to
+                all contexts except 'final'.
+            **kwargs: additional arguments required by DataManager.copy()
+                and DataManager.move().
+
+        Returns:
+            List of (future, error message) tuples.
 
         """
+        stage_func = self._stage_final_uri if final else self._stage_uri
+        futures = []
         for context in self._parsed_data_uris:
-            if context != self._source_context:
-                if self._clean:
-                    # remove target URI first
-                    pass
-
-                for i, parsed_source_uri in enumerate(self._parsed_data_uris[self._source_context]):
-
-                    Log.some().debug(
-                        'staging data: %s->%s to %s->%s',
-                        self._source_context,
-                        parsed_source_uri['chopped_uri'],
-                        context,
-                        self._parsed_data_uris[context][i]['chopped_uri']
-                    )
+            if (
+                    context == self._source_context
+                    or (context == 'final') != final
+            ):
+                continue
+
+            for i, parsed_source_uri in enumerate(
+                    self._parsed_data_uris[self._source_context]
+            ):
+                parsed_dest_uri = self._parsed_data_uris[context][i]
+                Log.some().debug(
+                    'staging %sdata: %s->%s to %s->%s',
+                    'final ' if final else '',
+                    self._source_context,
+                    parsed_source_uri['chopped_uri'],
+                    context,
+                    parsed_dest_uri['chopped_uri']
+                )
+                msg = 'cannot stage {}data by copying from {} to {}'.format(
+                    'final ' if final else '',
+                    parsed_source_uri['chopped_uri'],
+                    parsed_dest_uri['chopped_uri']
+                )
+
+                if executor:
+                    futures.append((
+                        executor.submit(
+                            stage_func,
+                            parsed_source_uri,
+                            parsed_dest_uri,
+                            **kwargs
+                        ),
+                        msg
+                    ))
+                    continue
+
+                future = Future()
+                future.set_result(
+                    stage_func(parsed_source_uri, parsed_dest_uri, **kwargs)
+                )
+                futures.append((future, msg))
+                if not future.result():
+                    return futures
+
+        return futures
+
+
+    def wait_stage(self, futures, final=False):
+        """
+        Wait for staging tasks started with submit_stage() to finish.
 
-                    if context != 'final':
-                        if not DataManager.copy(
-                                parsed_src_uri=parsed_source_uri,
-                                parsed_dest_uri=self._parsed_data_uris[context][i],
-                                **kwargs
-                        ):
-                            msg = 'cannot stage data by copying from {} to {}'.format(
-                                parsed_source_uri['chopped_uri'],
-                                self._parsed_data_uris[context][i]['chopped_uri']
-                            )
-                            Log.an().error(msg)
-                            return self._fatal(msg)
-
-        self._staged = True
+        Set _staged or _staged_final indicator to True on success.
+
+        Args:
+            self: class instance.
+            futures: list of (future, error message) tuples.
+            final: True if data was staged to the 'final' context.
+
+        Returns:
+            True or False.
+
+        """
+        failed = None
+        for future, msg in futures:
+            err = future.exception()
+            if err is not None:
+                msg = '{} [{}]'.format(msg, str(err))
+            elif future.result():
+                continue
+            if not failed:
+                failed = msg
+
+        if failed:
+            Log.an().error(failed)
+            return self._fatal(failed)
+
+        if final:
+            self._staged_final = True
+        else:
+            self._staged = True
 
         return True
 
 
-    def stage_final(self, **kwargs):
+    def stage(self, executor=None, **kwargs):
+        """
+        Copy data to all contexts except 'final' from source URI. Source URI can be multiple
+        locations, but only copy to the first element of dest URIs.
+
+        Unless clean is set, data is synced, so that data that is already
+        staged is not copied again.
+
+        Set _staged indicator to True on success.
+
+        Args:
+            self: class instance.
+            executor: concurrent.futures executor to stage contexts and URIs
+                concurrently, or None to stage them one after another.
+            **kwargs: additional arguments required by DataManager.copy().
+
+        Returns:
+            True or False.
+
+        """
+        return self.wait_stage(self.submit_stage(executor, **kwargs))
+
+
+    def stage_final(self, executor=None, **kwargs):
         """
         Move data to final context from source URI.
 
+        Local data is moved if the destination does not exist, or if clean
+        is set. Otherwise, data is synced, so that data that is already
+        staged is not copied again.
+
         Set _staged_final indicator to True on success.
 
         Args:
             self: class instance.
+            executor: concurrent.futures executor to stage URIs
+                concurrently, or None to stage them one after another.
             **kwargs: additional arguments required by DataManager.move().
 
         Returns:
             True or False.
 
         """
-        for context in self._parsed_data_uris:
-            if context != self._source_context:
-                if self._clean:
-                    # remove target URI first
-                    pass
-
-                for i, parsed_source_uri in enumerate(self._parsed_data_uris[self._source_context]):
-
-                    Log.some().debug(
-                        'staging final data: %s->%s to %s->%s',
-                        self._source_context,
-                        parsed_source_uri['chopped_uri'],
-                        context,
-                        self._parsed_data_uris[context][i]['chopped_uri']
-                    )
-
-                    if context == 'final':
-                        if (
-                                parsed_source_uri['scheme'] == 'local'
-                                and self._parsed_data_uris[context][i]['scheme'] == 'local'
-                        ):
-                            # move final data instead of copy, only for local-->local schemes
-                            if not DataManager.move(
-                                    parsed_src_uri=parsed_source_uri,
-                                    parsed_dest_uri=self._parsed_data_uris[context][i],
-                                    **kwargs
-                            ):
-                                msg = 'cannot stage final data by copying from {} to {}'.format(
-                                    parsed_source_uri['chopped_uri'],
-                                    self._parsed_data_uris[context][i]['chopped_uri']
-                                )
-                                Log.an().error(msg)
-                                return self._fatal(msg)
-
-                        else:
-                            if not DataManager.copy(
-                                    parsed_src_uri=parsed_source_uri,
-                                    parsed_dest_uri=self._parsed_data_uris[context][i],
-                                    **kwargs
-                            ):
-                                msg = 'cannot stage final data by copying from {} to {}'.format(
-                                    parsed_source_uri['chopped_uri'],
-                                    self._parsed_data_uris[context][i]['chopped_uri']
-                                )
-                                Log.an().error(msg)
-                                return self._fatal(msg)
-
-        self._staged_final = True
-
-        return True
+        return self.wait_stage(
+            self.submit_stage(executor, final=True, **kwargs), final=True
+        )
 
 
     def is_staged(self):
@@ -234,6 +384,21 @@ class StageableData:
         return self._staged_final
 
 
+    def get_stage_stats(self):
+        """
+        Get numbers of files and bytes transferred and skipped when syncing.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Dict of numbers of files and bytes transferred and skipped, and
+            files deleted.
+
+        """
+        return self._stage_stats
+
+
     def get_data_uri(self, context):
         """
         Return the URI for a specific context.
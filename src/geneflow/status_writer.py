@@ -0,0 +1,278 @@
+"""This module contains the GeneFlow StatusWriter class."""
+
+import threading
+
+from geneflow.log import Log
+from geneflow.data import DataSource, DataSourceException
+
+
+class StatusWriter:
+    """
+    Write job step status updates to the database in a background thread.
+
+    Updates for the same job step that are submitted before the previous
+    update has been written are coalesced, so only the latest status and
+    detail of each step is written.
+    """
+
+    def __init__(self, db_conf):
+        """
+        Instantiate StatusWriter class.
+
+        Args:
+            self: class instance.
+            db_conf: database configuration dict.
+
+        Returns:
+            Class instance.
+
+        """
+        self._db_conf = db_conf
+
+        # latest unwritten update for each (job_id, step_id)
+        self._pending = {}
+        # number of updates handed to the writer thread but not yet written
+        self._in_flight = 0
+        # write counters for each job
+        self._stats = {}
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._write_loop, name='geneflow-status-writer', daemon=True
+        )
+        self._thread.start()
+
+
+    def _job_stats(self, job_id):
+        """Return write counters of a job, creating them if needed."""
+        return self._stats.setdefault(
+            job_id, {'rows': 0, 'bytes': 0, 'coalesced': 0, 'skipped': 0}
+        )
+
+
+    def submit(
+            self, job_id, step_id, status, detail_json, msg, items=None,
+            wait=False
+    ):
+        """
+        Queue a job step status update.
+
+        Args:
+            self: class instance.
+            job_id: job identifier.
+            step_id: step identifier.
+            status: job step status.
+            detail_json: JSON string of map item detail, or None to leave the
+                detail unchanged.
+            msg: message associated with step status.
+            items: dict of changed job_step_item records keyed by item name.
+            wait: if True, block until the update has been written.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        with self._cond:
+            if self._closed:
+                Log.an().error('status writer is closed')
+                return False
+
+            if not self._thread.is_alive():
+                Log.an().error('status writer thread is not running')
+                return False
+
+            key = (job_id, step_id)
+            if key in self._pending:
+                # merge with the unwritten update
+                self._job_stats(job_id)['coalesced'] += 1
+                _, pending_detail, _, pending_items = self._pending[key]
+                if detail_json is None:
+                    detail_json = pending_detail
+                pending_items.update(items or {})
+                items = pending_items
+            self._pending[key] = (status, detail_json, msg, dict(items or {}))
+            self._cond.notify_all()
+
+            if wait:
+                return self._wait_written()
+
+        return True
+
+
+    def skip(self, job_id):
+        """
+        Count an update that was skipped because nothing changed.
+
+        Args:
+            self: class instance.
+            job_id: job identifier.
+
+        Returns:
+            None.
+
+        """
+        with self._cond:
+            self._job_stats(job_id)['skipped'] += 1
+
+
+    def flush(self):
+        """
+        Block until all queued updates have been written.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            On success: True.
+            On failure: False, if the writer thread is not running.
+
+        """
+        with self._cond:
+            return self._wait_written()
+
+
+    def _wait_written(self):
+        """
+        Wait until all queued updates have been written.
+
+        The caller must hold the condition lock.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            On success: True.
+            On failure: False, if the writer thread is not running.
+
+        """
+        while not self._cond.wait_for(
+                lambda: not self._pending and not self._in_flight,
+                timeout=1
+        ):
+            if not self._thread.is_alive():
+                Log.an().error('status writer thread is not running')
+                return False
+
+        return True
+
+
+    def close(self):
+        """
+        Write all queued updates and stop the writer thread.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            True.
+
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+        return True
+
+
+    def get_stats(self, job_id):
+        """
+        Return write counters of a job.
+
+        Args:
+            self: class instance.
+            job_id: job identifier.
+
+        Returns:
+            Dict with number of rows and bytes written, and number of
+            updates coalesced or skipped.
+
+        """
+        with self._cond:
+            return dict(self._job_stats(job_id))
+
+
+    def _write_loop(self):
+        """Write queued updates until the writer is closed."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    # closed and nothing left to write
+                    return
+
+                updates = self._pending
+                self._pending = {}
+                self._in_flight = len(updates)
+
+            written = []
+            try:
+                written = self._write(updates)
+            except Exception as err:
+                # keep the writer thread alive
+                Log.an().error('cannot write status updates [%s]', str(err))
+            finally:
+                # never leave waiting threads blocked
+                with self._cond:
+                    for job_id, num_rows, num_bytes in written:
+                        stats = self._job_stats(job_id)
+                        stats['rows'] += num_rows
+                        stats['bytes'] += num_bytes
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+
+    def _write(self, updates):
+        """
+        Write a batch of updates.
+
+        Args:
+            self: class instance.
+            updates: dict of (job_id, step_id) ->
+                (status, detail_json, msg, items).
+
+        Returns:
+            List of (job_id, rows, bytes) for each update written.
+
+        """
+        try:
+            data_source = DataSource(self._db_conf)
+        except DataSourceException as err:
+            Log.an().error('data source initialization error [%s]', str(err))
+            return []
+
+        written = []
+        for (job_id, step_id), (status, detail_json, msg, items)\
+                in updates.items():
+            try:
+                if not data_source.update_job_step_status(
+                        step_id, job_id, status, detail_json, msg, items=items
+                ):
+                    Log.an().warning('cannot update job status in data source')
+                    data_source.rollback()
+                    continue
+
+                data_source.commit()
+
+            except Exception as err:
+                Log.an().error(
+                    'cannot write status of step %s [%s]', step_id, str(err)
+                )
+                try:
+                    data_source.rollback()
+                except Exception as rollback_err:
+                    Log.a().warning(
+                        'cannot roll back status update [%s]',
+                        str(rollback_err)
+                    )
+                continue
+
+            written.append((
+                job_id,
+                1 + len(items),
+                len(detail_json or '') + len(str(items))
+            ))
+
+        return written
@@ -1,10 +1,127 @@
 """This module contains the GeneFlow URIParser class."""
 
 # import system modules
+from collections.abc import Mapping
+import functools
 import re
 # import custom modules
 from geneflow.log import Log
 
+
+class ParsedURI(Mapping):
+    """
+    Immutable components of a parsed URI.
+
+    Components are attributes, and can also be accessed like dict keys,
+    e.g., parsed_uri['chopped_path']. Parsed URIs are shared by all callers
+    of URIParser.parse() with the same URI, so they cannot be modified.
+    """
+
+    __slots__ = (
+        'uri', 'chopped_uri', 'scheme', 'authority', 'path', 'chopped_path',
+        'folder', 'name'
+    )
+    _FIELDS = frozenset(__slots__)
+
+    def __init__(
+            self,
+            uri,
+            chopped_uri,
+            scheme,
+            authority,
+            path,
+            chopped_path,
+            folder,
+            name
+    ):
+        """
+        Instantiate ParsedURI class.
+
+        Args:
+            self: class instance.
+            uri: original URI.
+            chopped_uri: normalized URI.
+            scheme: URI scheme.
+            authority: URI authority.
+            path: full path.
+            chopped_path: normalized path.
+            folder: folder part of path.
+            name: folder/file name, part of path after last slash.
+
+        Returns:
+            Class instance.
+
+        """
+        for key, value in zip(self.__slots__, (
+                uri, chopped_uri, scheme, authority, path, chopped_path,
+                folder, name
+        )):
+            object.__setattr__(self, key, value)
+
+
+    def __setattr__(self, key, value):
+        """Raise AttributeError, parsed URIs are immutable."""
+        raise AttributeError('parsed uri is immutable')
+
+
+    def __delattr__(self, key):
+        """Raise AttributeError, parsed URIs are immutable."""
+        raise AttributeError('parsed uri is immutable')
+
+
+    def __getitem__(self, key):
+        """Return URI component, or raise KeyError for unknown keys."""
+        if key in self._FIELDS:
+            return getattr(self, key)
+
+        raise KeyError(key)
+
+
+    def __contains__(self, key):
+        """Check if a URI component exists."""
+        return key in self._FIELDS
+
+
+    def __iter__(self):
+        """Iterate over names of URI components."""
+        return iter(self.__slots__)
+
+
+    def __len__(self):
+        """Return number of URI components."""
+        return len(self.__slots__)
+
+
+    def __repr__(self):
+        """Return string representation, same as for a dict."""
+        return repr(self.to_dict())
+
+
+    def to_dict(self):
+        """
+        Copy URI components to a new dict.
+
+        Use the dict to serialize the parsed URI, e.g., with json.dumps(),
+        or to modify its components.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Dict of URI component name -> value.
+
+        """
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+    def __reduce__(self):
+        """Support pickle and copy."""
+        return (
+            self.__class__,
+            tuple(getattr(self, key) for key in self.__slots__)
+        )
+
+
 class URIParser:
     r"""
     Light-weight URI parser adhering to part of RFC 3986.
@@ -54,8 +171,12 @@ class URIParser:
     """
 
     # regular expressions for parsing the URI
-    uri_regex = "^(([^:/]+):)?(//([^/]*))?(.*?)$"
-    path_regex = "^(.*?)(/?)([^/]+)?$"
+    uri_regex = re.compile("^(([^:/]+):)?(//([^/]*))?(.*?)$")
+    path_regex = re.compile("^(.*?)(/?)([^/]+)?$")
+    slash_regex = re.compile('/+')
+
+    # maximum number of parsed URIs to keep
+    cache_size = 16384
 
     @classmethod
     def parse(cls, uri):
@@ -64,12 +185,15 @@ class URIParser:
 
         defaults to "local".
 
+        Results are memoized by URI, least recently used URIs are evicted
+        when the cache is full.
+
         Args:
             uri: A generic URI string.
 
         Returns:
-            On success: A dict that contains "uri", "scheme", "authority", and
-            "path", etc:
+            On success: A ParsedURI that contains "uri", "scheme",
+            "authority", and "path", etc:
                 {
                     "uri": original URI
                     "chopped_uri": normalized URI
@@ -82,10 +206,30 @@ class URIParser:
                     "name": folder/file name, part of path after last slash
                 }
 
+                The ParsedURI is shared with other callers and is not a
+                dict: it cannot be modified or passed to json.dumps(). Use
+                to_dict() for a modifiable and serializable copy.
+
             On failure: False.
 
         """
-        matched = re.match(cls.uri_regex, str(uri))
+        try:
+            return _parse_cached(uri)
+        except TypeError:
+            # unhashable URI
+            return cls._parse(uri)
+
+
+    @classmethod
+    def clear_cache(cls):
+        """Remove all memoized parsed URIs."""
+        _parse_cached.cache_clear()
+
+
+    @classmethod
+    def _parse(cls, uri):
+        """Parse a URI without memoization, see parse()."""
+        matched = cls.uri_regex.match(str(uri))
         if not matched:
             Log.a().debug('invalid uri: %s', uri)
             return False
@@ -100,10 +244,10 @@ class URIParser:
         path = matched.group(5) if matched.group(5) else '/'
 
         # replace one or more consecutive slashes with single slash
-        path = re.sub('/+', '/', path)
+        path = cls.slash_regex.sub('/', path)
 
         # get folder and name from path
-        matched = re.match(cls.path_regex, path)
+        matched = cls.path_regex.match(path)
         if not matched:
             Log.a().debug('invalid path of uri: %s', path)
             return False
@@ -123,16 +267,16 @@ class URIParser:
             chopped_path
         )
 
-        return {
-            'uri': uri, # original URI
-            'chopped_uri': chopped_uri,
-            'scheme': scheme,
-            'authority': authority,
-            'path': path,
-            'chopped_path': chopped_path,
-            'folder': folder,
-            'name': name
-        }
+        return ParsedURI(
+            uri, # original URI
+            chopped_uri,
+            scheme,
+            authority,
+            path,
+            chopped_path,
+            folder,
+            name
+        )
 
 
     @classmethod
@@ -185,3 +329,10 @@ class URIParser:
             return False
 
         return parsed_new_uri
+
+
+# memoized URIParser.parse(), keyed by URI
+_parse_cached = functools.lru_cache(maxsize=URIParser.cache_size)(
+    URIParser._parse
+)
+
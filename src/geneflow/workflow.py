@@ -1,9 +1,10 @@
 """This module contains the GeneFlow Workflow class."""
 
 
-import time
-
+import collections
+from concurrent.futures import ThreadPoolExecutor
 import copy
+import json
 import requests
 from slugify import slugify
 import yaml
@@ -12,6 +13,9 @@ from geneflow.log import Log
 from geneflow.data import DataSource, DataSourceException
 from geneflow.data_manager import DataManager
 from geneflow.definition import Definition
+from geneflow.disk_admission import DiskAdmission
+from geneflow.shell_wrapper import ShellWrapper
+from geneflow.status_writer import StatusWriter
 from geneflow.workflow_dag import WorkflowDAG, WorkflowDAGException
 from geneflow.uri_parser import URIParser
 from geneflow.extend.contexts import Contexts
@@ -20,7 +24,7 @@ from geneflow.extend.contexts import Contexts
 class Workflow:
     """Wraps workflow, job, app loading and running calls."""
 
-    def __init__(self, job_id, config):
+    def __init__(self, job_id, config, resume=False):
         """
         Initialize the GeneFlow Workflow class.
 
@@ -30,6 +34,8 @@ class Workflow:
             self: class instance
             job_id: Job identifier
             config: the Workflow subsection of the GeneFlow configuration
+            resume: skip steps and map items finished in a previous run of
+                the job
 
         Returns:
             Class instance.
@@ -42,6 +48,8 @@ class Workflow:
         self._apps = None            # app definitions
         self._dag = None             # WorkflowDAG class instance
         self._status = 'PENDING'
+        self._status_writer = None   # background writer of step status
+        self._resume = resume
 
         self._parsed_job_work_uri = {}
         self._parsed_job_output_uri = {}
@@ -52,6 +60,17 @@ class Workflow:
         # context-specific data and methods
         self._workflow_context = {}
 
+        # work data usage and garbage collection
+        self._work_refs = {}        # node -> number of dependents not done
+        self._work_sizes = {}       # step -> size of work data in bytes
+        self._work_collected = set()
+        self._work_usage = 0
+        self._work_usage_peak = 0
+        self._work_reclaimed = 0
+
+        # admission control of map items based on free disk space
+        self._disk_admission = None
+
 
     def initialize(self):
         """
@@ -69,6 +88,9 @@ class Workflow:
             On failure: False.
 
         """
+        # cache list and exists results of data contexts
+        DataManager.set_cache_size(self._config.get('data_cache_size', 1024))
+
         # load and validate job definition from database
         if not self._load_job():
             msg = 'cannot load job definition'
@@ -135,6 +157,12 @@ class Workflow:
             Log.an().error(msg)
             return self._fatal(msg)
 
+        # hold map items of steps while free disk space is low
+        if not self._init_disk_admission():
+            msg = 'cannot initialize disk space admission control'
+            Log.an().error(msg)
+            return self._fatal(msg)
+
         return True
 
 
@@ -187,11 +215,19 @@ class Workflow:
             self._parsed_job_output_uri['chopped_uri']
         )
 
+        if self._work_usage_peak or self._work_reclaimed:
+            str_rep += (
+                '\n    Work Data: '
+                '\n        Peak usage: {} bytes'
+                '\n        Reclaimed: {} bytes'
+            ).format(self._work_usage_peak, self._work_reclaimed)
+
         return str_rep
 
 
     def _fatal(self, msg):
 
+        self._close_status_writer()
         self._update_status_db('ERROR', msg)
 
         return False
@@ -217,6 +253,7 @@ class Workflow:
             return self._fatal(msg)
 
         self._job = data_source.get_job_def_by_id(self._job_id)
+        data_source.close()
         if self._job is False:
             msg = 'cannot load job from data source: job_id={}'\
                 .format(self._job_id)
@@ -262,6 +299,7 @@ class Workflow:
         self._workflow = data_source.get_workflow_def_by_id(
             self._job['workflow_id']
         )
+        data_source.close()
         if self._workflow is False:
             msg = 'cannot load workflow from data source: workflow_id={}'.\
                 format(self._job['workflow_id'])
@@ -309,6 +347,7 @@ class Workflow:
         self._apps = data_source.get_app_defs_by_workflow_id(
             self._job['workflow_id']
         )
+        data_source.close()
         if self._apps is False:
             msg = 'cannot load apps from data source: workflow_id={}'.\
                 format(self._job['workflow_id'])
@@ -617,7 +656,7 @@ class Workflow:
                 return self._fatal(msg)
 
             self._workflow_context[context] = workflow_class(
-                self._config, self._job, self._parsed_job_work_uri
+                self._job, self._config, self._parsed_job_work_uri
             )
 
             # perform context-specific init
@@ -719,125 +758,812 @@ class Workflow:
             Log.an().error(msg)
             return self._fatal(str(err)+'|'+msg)
 
+        # write step status updates in the background
+        self._status_writer = StatusWriter(self._config['database'])
+        for node_name in self._dag.get_topological_sort():
+            node = self._dag.graph().nodes[node_name]
+            if node['type'] == 'step':
+                node['node'].set_status_writer(self._status_writer)
+
         return True
 
 
+    def _init_disk_admission(self):
+        """
+        Set up admission control of map items based on free disk space.
+
+        Free space is checked on the local work and output URIs if the
+        "disk_min_free" or "disk_min_free_inodes" config setting is set. The
+        output size of a map item of each step is estimated from previous
+        runs of the same app.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        paths = [
+            parsed_uri['chopped_path'] for parsed_uri in [
+                self._parsed_job_work_uri.get('local'),
+                self._parsed_job_output_uri
+            ] if parsed_uri and parsed_uri['scheme'] == 'local'
+        ]
+        admission = DiskAdmission(
+            paths,
+            self._config.get('disk_min_free', 0),
+            self._config.get('disk_min_free_inodes', 0)
+        )
+        if not admission.enabled:
+            return True
+
+        try:
+            data_source = DataSource(self._config['database'])
+        except DataSourceException as err:
+            msg = 'data source initialization error [{}]'.format(str(err))
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        for node_name in self._dag.get_topological_sort():
+            node = self._dag.graph().nodes[node_name]
+            if node['type'] != 'step':
+                continue
+
+            item_bytes = data_source.get_app_output_estimate(
+                node['node']._app['name'], node['node']._app['version']
+            )
+            if item_bytes is False:
+                msg = 'cannot get output estimate for step {}'\
+                    .format(node_name)
+                Log.an().error(msg)
+                return self._fatal(msg)
+
+            Log.some().debug(
+                '[%s]: estimated output size: %s bytes per map item',
+                node_name, item_bytes
+            )
+            node['node'].set_disk_admission(admission, item_bytes)
+
+        data_source.close()
+        self._disk_admission = admission
+
+        return True
+
+
+    def _close_status_writer(self):
+        """
+        Write pending step status updates and stop the status writer.
+
+        Args:
+            self: class instance
+
+        Returns:
+            True.
+
+        """
+        if not self._status_writer:
+            return True
+
+        self._status_writer.close()
+        stats = self._status_writer.get_stats(self._job_id)
+        Log.some().debug(
+            'step status writes: %s row(s), %s byte(s), %s coalesced,'
+            ' %s skipped',
+            stats['rows'],
+            stats['bytes'],
+            stats['coalesced'],
+            stats['skipped']
+        )
+        self._status_writer = None
+
+        return True
+
+
+    def _load_resume_state(self):
+        """
+        Load status of steps and map items from a previous run of the job.
+
+        Finished map items are read from the job_step_item table. Map items
+        of steps without item records are read from the step detail.
+
+        Args:
+            self: class instance
+
+        Returns:
+            On success: dict of step node name -> (step status, set of
+                finished map item names).
+            On failure: False.
+
+        """
+        try:
+            data_source = DataSource(self._config['database'])
+        except DataSourceException as err:
+            msg = 'data source initialization error [{}]'.format(str(err))
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        job_steps = data_source.get_job_steps_by_job_id(self._job_id)
+        if job_steps is False:
+            msg = 'cannot load job steps: job_id={}'.format(self._job_id)
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        step_nodes = {
+            self._dag.graph().nodes[node_name]['step']['step_id']: node_name
+            for node_name in self._dag.get_topological_sort()
+            if self._dag.graph().nodes[node_name]['type'] == 'step'
+        }
+
+        state = {}
+        for job_step in job_steps:
+            if job_step['step_id'] not in step_nodes:
+                continue
+
+            finished = set()
+            offset = 0
+            while True:
+                items = data_source.get_job_step_items(
+                    self._job_id, job_step['step_id'], status='FINISHED',
+                    offset=offset, limit=1000
+                )
+                if not items:
+                    break
+                finished.update(item['item'] for item in items)
+                offset += len(items)
+
+            if not finished and job_step['detail']:
+                # detail is a dict of item name -> runs, or a list of items
+                try:
+                    detail = json.loads(job_step['detail'])
+                except ValueError:
+                    detail = {}
+                if isinstance(detail, dict):
+                    finished = {
+                        name for name, runs in detail.items()
+                        if runs and runs[-1].get('status') == 'FINISHED'
+                    }
+                else:
+                    finished = {
+                        item['filename'] for item in detail
+                        if item.get('status') == 'FINISHED'
+                    }
+
+            state[step_nodes[job_step['step_id']]]\
+                = (job_step['status'], finished)
+        data_source.close()
+
+        return state
+
+
     def _re_init(self):
         """Reinitialize connection object."""
         return True
 
 
-    def run(self):
+    def _start_step(self, node_name, stream=False):
         """
-        Run Workflow.
+        Expand map items of a step so that it can start running.
 
         Args:
             self: class instance
+            node_name: name of the step node in the graph.
+            stream: if True, map items are streamed from the step referenced
+                by the map URI as they finish.
 
         Returns:
             On success: True.
             On failure: False.
 
         """
-        self._update_status_db('RUNNING', '')
+        node = self._dag.graph().nodes[node_name]
+
+        # Reinit connection to exec context
+        if not self._re_init():
+            msg = 'cannot reinit exec context'
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        Log.some().info(
+            '[%s]: app: %s:%s [%s]',
+            node_name,
+            node['node']._app['name'],
+            node['node']._app['version'],
+            node['node']._app['git']
+        )
+
+        if self._dag.get_stream_consumers(node_name):
+            # outputs of map items are staged as they finish
+            node['node'].enable_item_staging()
+
+        Log.some().debug('[%s]: iterating map uri', node_name)
+        if not node['node'].iterate_map_uri(stream=stream):
+            msg = 'iterate map uri failed for step {}'.format(node_name)
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        Log.some().info('[%s]: running', node_name)
+
+        return True
 
+
+    def _complete_step(self, node_name):
+        """
+        Checkpoint, clean up, and stage the outputs of a finished step.
+
+        Args:
+            self: class instance
+            node_name: name of the step node in the graph.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        node = self._dag.graph().nodes[node_name]
+
+        Log.some().debug('[%s]: all jobs complete', node_name)
+
+        # check if step satisfies checkpoint of all, any, or none job completion
+        if not node['node'].checkpoint():
+            msg = 'failed checkpoint for step {}'.format(node_name)
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        # cleanup jobs
+        Log.some().debug('[%s]: cleaning', node_name)
+        if not node['node'].clean_up():
+            msg = 'clean up failed for step {}'.format(node_name)
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        # stage outputs (non-final)
+        Log.some().debug('[%s]: staging output', node_name)
+        with self._stage_executor() as executor:
+            if not node['node'].stage(executor, **self._context_options()):
+                msg = 'staging failed for step {}'.format(node_name)
+                Log.an().error(msg)
+                return self._fatal(msg)
+
+        # track work data usage
+        size = DataManager.size(
+            parsed_uri=node['node'].get_data_uri(node['source_context'])[0],
+            **{
+                node['source_context']: self._workflow_context[
+                    node['source_context']
+                ].get_context_options()
+            }
+        )
+        if size is not False:
+            self._work_sizes[node_name] = size
+            self._work_usage += size
+            self._work_usage_peak = max(
+                self._work_usage_peak, self._work_usage
+            )
+            self._update_output_db(node_name, size)
+
+        # outputs of the step now show up in the free disk space
+        if self._disk_admission:
+            self._disk_admission.reserve(node['step']['name'], 0)
+
+        return True
+
+
+    def _update_output_db(self, node_name, size):
+        """
+        Record the output size of a finished step in DB.
+
+        The output sizes are used to estimate the output sizes of later
+        runs of the same apps and workflows.
+
+        Args:
+            self: class instance.
+            node_name: name of the step node in the graph.
+            size: size of the step output in bytes.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        node = self._dag.graph().nodes[node_name]
+        try:
+            data_source = DataSource(self._config['database'])
+        except DataSourceException as err:
+            Log.a().warning('data source initialization error [%s]', str(err))
+            return False
+
+        if not data_source.update_job_step_output(
+                node['step']['step_id'],
+                self._job['job_id'],
+                size,
+                node['node'].get_num_items()
+        ):
+            Log.a().warning(
+                '[%s]: cannot record output size in data source', node_name
+            )
+            data_source.rollback()
+            return False
+
+        data_source.commit()
+
+        return True
+
+
+    def _release_work_refs(self, node_name):
+        """
+        Release references of a completed node to the data of its
+        predecessors.
+
+        Args:
+            self: class instance.
+            node_name: name of the completed node.
+
+        Returns:
+            None.
+
+        """
+        for pred in self._dag.graph().predecessors(node_name):
+            self._work_refs[pred] -= 1
+
+
+    def _collect_work_data(self, done, final_futures):
+        """
+        Delete work data of steps that is no longer needed.
+
+        Work data of a step is deleted if its "gc" execution parameter is
+        set, all steps that depend on it have completed, and it is not
+        published or its final output has been staged.
+
+        Args:
+            self: class instance.
+            done: set of completed nodes.
+            final_futures: dict of step name -> final staging futures.
+
+        Returns:
+            None.
+
+        """
         for node_name in self._dag.get_topological_sort():
             node = self._dag.graph().nodes[node_name]
-            if node['type'] == 'input':
-
-                Log.some().debug('[%s]: staging input', node_name)
-                if not node['node'].stage(
-                        move_final=False,
-                        **{
-                            context: self._workflow_context[context]\
-                                .get_context_options()\
-                            for context in self._workflow_context
-                        }
-                ):
-                    msg = 'staging failed for input {}'.format(node_name)
-                    Log.an().error(msg)
-                    return self._fatal(msg)
+            if (
+                    node['type'] != 'step'
+                    or node_name not in done
+                    or node_name in self._work_collected
+                    or self._work_refs[node_name] > 0
+                    or str(
+                        node['step']['execution']['parameters']\
+                            .get('gc', False)
+                    ).lower() not in ['true', 'yes', '1']
+            ):
+                continue
+
+            if 'final' in node['contexts'] and not (
+                    node_name in final_futures
+                    and all(
+                        future.done()
+                        and future.exception() is None
+                        and future.result()
+                        for future, _ in final_futures[node_name]
+                    )
+            ):
+                continue
+
+            self._work_collected.add(node_name)
+            self._work_usage -= self._work_sizes.get(node_name, 0)
+            for context in node['contexts']:
+                if context == 'final':
+                    continue
+
+                context_options = {
+                    context: self._workflow_context[context]\
+                        .get_context_options()
+                }
+                for parsed_uri in node['node'].get_data_uri(context):
+                    if not DataManager.exists(
+                            parsed_uri=parsed_uri, **context_options
+                    ):
+                        continue
+
+                    size = DataManager.size(
+                        parsed_uri=parsed_uri, **context_options
+                    )
+                    if not DataManager.delete(
+                            parsed_uri=parsed_uri, **context_options
+                    ):
+                        Log.a().warning(
+                            'cannot delete work data: %s',
+                            parsed_uri['chopped_uri']
+                        )
+                        continue
+
+                    Log.some().info(
+                        '[%s]: deleted work data: %s (%s bytes)',
+                        node_name, parsed_uri['chopped_uri'], size or 0
+                    )
+                    self._work_reclaimed += size or 0
+
+
+    def _stage_executor(self):
+        """
+        Create an executor for concurrent staging.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            ThreadPoolExecutor with "stage_concurrency" worker threads.
+
+        """
+        return ThreadPoolExecutor(
+            max_workers=self._config.get('stage_concurrency', 4)
+        )
 
-            else: # step node
 
-                # Reinit connection to exec context
-                if not self._re_init():
-                    msg = 'cannot reinit exec context'
+    def _stage_nodes(self, node_names):
+        """
+        Stage data of input nodes concurrently.
+
+        Data of all nodes, contexts and URIs is staged by a pool of
+        "stage_concurrency" threads.
+
+        Args:
+            self: class instance.
+            node_names: list of names of nodes to stage.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        with self._stage_executor() as executor:
+            futures = {
+                node_name: self._dag.graph().nodes[node_name]['node']\
+                    .submit_stage(executor, **self._context_options())
+                for node_name in node_names
+            }
+
+            for node_name in node_names:
+                node = self._dag.graph().nodes[node_name]
+                if not node['node'].wait_stage(futures[node_name]):
+                    msg = 'staging failed for {} {}'.format(
+                        node['type'], node_name
+                    )
                     Log.an().error(msg)
                     return self._fatal(msg)
 
-                Log.some().info(
-                    '[%s]: app: %s:%s [%s]',
-                    node_name,
-                    node['node']._app['name'],
-                    node['node']._app['version'],
-                    node['node']._app['git']
-                )
+        return True
+
+
+    def _context_options(self):
+        """
+        Get options of all workflow contexts, e.g., for DataManager.copy().
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Dict of context -> dict of context options.
+
+        """
+        return {
+            context: self._workflow_context[context].get_context_options()
+            for context in self._workflow_context
+        }
+
+
+    def _submit_final_stage(self, executor, futures, done, force=False):
+        """
+        Start staging final outputs of completed steps in the background.
+
+        Final outputs of local steps are moved, so a step is only staged
+        once all steps that depend on it have completed.
+
+        Args:
+            self: class instance.
+            executor: executor that stages final outputs.
+            futures: dict of step name -> staging futures, updated with the
+                newly started steps.
+            done: set of completed nodes.
+            force: if True, start all steps that have not been started.
+
+        Returns:
+            None.
+
+        """
+        for node_name in self._dag.get_topological_sort():
+            node = self._dag.graph().nodes[node_name]
+            if (
+                    node['type'] != 'step'
+                    or node_name in futures
+                    or (
+                        not force
+                        and (
+                            node_name not in done
+                            or not all(
+                                succ in done for succ
+                                in self._dag.graph().successors(node_name)
+                            )
+                        )
+                    )
+            ):
+                continue
+
+            Log.some().debug('[%s]: staging final output', node_name)
+            futures[node_name] = node['node'].submit_stage(
+                executor, final=True, **self._context_options()
+            )
+
 
-                Log.some().debug('[%s]: iterating map uri', node_name)
-                if not node['node'].iterate_map_uri():
-                    msg = 'iterate map uri failed for step {}'.format(node_name)
+    def _wait_final_stage(self, futures):
+        """
+        Wait for final outputs of all steps to be staged.
+
+        Args:
+            self: class instance.
+            futures: dict of step name -> staging futures.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        for node_name in self._dag.get_topological_sort():
+            if node_name not in futures:
+                continue
+
+            node = self._dag.graph().nodes[node_name]
+            if not node['node'].wait_stage(futures[node_name], final=True):
+                msg = 'staging final output failed for step {}'\
+                    .format(node_name)
+                Log.an().error(msg)
+                return self._fatal(msg)
+
+            Log.some().info('[%s]: complete', node_name)
+
+        return True
+
+
+    def _run_steps(self, done, final_executor, final_futures):
+        """
+        Run all steps that are not complete.
+
+        Args:
+            self: class instance.
+            done: set of completed nodes, updated as steps complete.
+            final_executor: executor that stages final outputs.
+            final_futures: dict of step name -> final staging futures,
+                updated as final outputs are submitted for staging.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        # steps waiting to start (in topological order) and running steps
+        pending = [
+            node_name for node_name in self._dag.get_topological_sort()
+            if self._dag.graph().nodes[node_name]['type'] == 'step'
+            and node_name not in done
+        ]
+        active = []
+        step_limit = self._config.get('run_step_limit', 0)
+
+        while pending or active:
+
+            # start all steps whose predecessors are complete
+            for node_name in list(pending):
+                if step_limit > 0 and len(active) >= step_limit:
+                    break
+
+                stream_source = self._dag.get_stream_source(node_name)
+                if all(
+                        pred in done
+                        or (pred == stream_source and pred in active)
+                        for pred in self._dag.graph().predecessors(node_name)
+                ):
+                    if not self._start_step(
+                            node_name,
+                            stream=(stream_source in active)
+                    ):
+                        return False
+                    pending.remove(node_name)
+                    active.append(node_name)
+
+            if not active:
+                msg = 'no runnable steps: {}'.format(', '.join(pending))
+                Log.an().error(msg)
+                return self._fatal(msg)
+
+            # run new jobs and poll all running steps
+            completed = False
+            for node_name in list(active):
+                node = self._dag.graph().nodes[node_name]
+
+                if node['node'].is_stream_open():
+                    # add map items streamed from the source step
+                    stream_source = self._dag.graph().nodes[
+                        self._dag.get_stream_source(node_name)
+                    ]['node']
+                    node['node'].extend_map(stream_source.get_staged_items())
+                    if self._dag.get_stream_source(node_name) in done:
+                        if not node['node'].close_stream():
+                            msg = 'no map items streamed to step {}'\
+                                .format(node_name)
+                            Log.an().error(msg)
+                            return self._fatal(msg)
+
+                if not node['node'].fill_map():
+                    msg = 'cannot add map items to step {}'.format(node_name)
                     Log.an().error(msg)
                     return self._fatal(msg)
 
-                # run new jobs and poll until all job(s) done
-                Log.some().info('[%s]: running', node_name)
-                while not node['node'].all_done():
+                if not node['node'].all_done():
+                    # check first so that finished jobs free up throttle
+                    # slots for jobs started in the same pass
+                    node['node'].check_running_jobs()
                     if not node['node'].run():
                         msg = 'run failed for step {}'.format(node_name)
                         Log.an().error(msg)
                         return self._fatal(msg)
-                    node['node'].check_running_jobs()
-                    time.sleep(self._config['run_poll_delay'])
 
-                Log.some().debug('[%s]: all jobs complete', node_name)
+                    if self._dag.get_stream_consumers(node_name):
+                        # stage finished items for streaming steps
+                        if node['node'].stage_map_items(
+                                **{
+                                    context: self._workflow_context[context]\
+                                        .get_context_options()\
+                                    for context in self._workflow_context
+                                }
+                        ) is False:
+                            msg = 'staging map items failed for step {}'\
+                                .format(node_name)
+                            Log.an().error(msg)
+                            return self._fatal(msg)
+
+                if node['node'].all_done():
+                    if not self._complete_step(node_name):
+                        return False
+                    active.remove(node_name)
+                    done.add(node_name)
+                    self._release_work_refs(node_name)
+                    completed = True
+
+            if completed:
+                self._submit_final_stage(
+                    final_executor, final_futures, done
+                )
 
-                # check if step satisfies checkpoint of all, any, or none job completion
-                if not node['node'].checkpoint():
-                    msg = 'failed checkpoint for step {}'.format(node_name)
-                    Log.an().error(msg)
-                    return self._fatal(msg)
+            # delete work data that is no longer needed, including data of
+            # steps whose final outputs have been staged since
+            self._collect_work_data(done, final_futures)
+
+            # start newly ready steps right away, otherwise wait until a
+            # local job exits or the poll delay elapses
+            if not completed:
+                ShellWrapper.wait_any(
+                    [
+                        fd for node_name in active
+                        for fd in self._dag.graph().nodes[node_name]['node']\
+                            .get_wait_fds()
+                    ],
+                    self._config['run_poll_delay']
+                )
 
-                # cleanup jobs
-                Log.some().debug('[%s]: cleaning', node_name)
-                if not node['node'].clean_up():
-                    msg = 'clean up failed for step {}'.format(node_name)
-                    Log.an().error(msg)
-                    return self._fatal(msg)
+        return True
 
-                # stage outputs (non-final)
-                Log.some().debug('[%s]: staging output', node_name)
-                if not node['node'].stage(
-                        **{
-                            context: self._workflow_context[context]\
-                                .get_context_options()\
-                            for context in self._workflow_context
-                        }
-                ):
-                    msg = 'staging failed for step {}'.format(node_name)
-                    Log.an().error(msg)
-                    return self._fatal(msg)
 
+    def run(self):
+        """
+        Run Workflow.
 
-        # stage final outputs
-        for node_name in self._dag.get_topological_sort():
+        Inputs are staged first. Steps are then started as soon as all of
+        their predecessors in the graph have completed, so independent
+        branches of the workflow run concurrently. The number of steps
+        running at once is limited by the "run_step_limit" config setting
+        (0 means no limit).
+
+        Steps with the "stream" execution parameter start as soon as the
+        step referenced by their map URI is running, and receive new map
+        items as individual items of that step finish and are staged.
+
+        Args:
+            self: class instance
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        self._update_status_db('RUNNING', '')
+
+        # completed nodes, inputs are complete once staged
+        done = set()
+
+        resume_state = {}
+        if self._resume:
+            resume_state = self._load_resume_state()
+            if resume_state is False:
+                return False
+
+        # stage all inputs concurrently
+        input_nodes = [
+            node_name for node_name in self._dag.get_topological_sort()
+            if self._dag.graph().nodes[node_name]['type'] == 'input'
+        ]
+        Log.some().debug('staging inputs: %s', input_nodes)
+        if not self._stage_nodes(input_nodes):
+            return False
+
+        done.update(input_nodes)
+        self._work_refs = self._dag.get_reference_counts()
+
+        # skip steps that finished in a previous run, and keep finished
+        # map items of the other steps
+        for node_name, (status, finished) in resume_state.items():
             node = self._dag.graph().nodes[node_name]
-            if node['type'] == 'step':
+            if status == 'FINISHED' and node['node'].data_exists():
+                Log.some().info(
+                    '[%s]: finished in previous run, skipping', node_name
+                )
+                done.add(node_name)
+                self._release_work_refs(node_name)
+            elif finished:
+                node['node'].set_finished_items(finished)
+
+        # final outputs are staged in the background as soon as steps and
+        # their dependents are complete
+        final_executor = self._stage_executor()
+        final_futures = {}
+        try:
+            self._submit_final_stage(final_executor, final_futures, done)
+            self._collect_work_data(done, final_futures)
 
-                Log.some().debug('[%s]: staging final output', node_name)
-                if not node['node'].stage_final(
-                        **{
-                            context: self._workflow_context[context]\
-                                .get_context_options()\
-                            for context in self._workflow_context
-                        }
-                ):
-                    msg = 'staging final output failed for step {}'.format(node_name)
-                    Log.an().error(msg)
-                    return self._fatal(msg)
+            if not self._run_steps(done, final_executor, final_futures):
+                return False
+
+            # wait for final outputs still being staged
+            self._submit_final_stage(
+                final_executor, final_futures, done, force=True
+            )
+            if not self._wait_final_stage(final_futures):
+                return False
+        finally:
+            # do not leave staging threads running after a failure
+            for futures in final_futures.values():
+                for future, _ in futures:
+                    future.cancel()
+            final_executor.shutdown(wait=True)
+
+        self._collect_work_data(done, final_futures)
+        Log.some().info(
+            'work data: peak usage %s bytes, %s bytes reclaimed',
+            self._work_usage_peak, self._work_reclaimed
+        )
 
-                Log.some().info('[%s]: complete', node_name)
+        Log.some().debug(
+            'data cache: %(hits)s hits, %(misses)s misses,'
+            ' %(invalidations)s invalidations, %(entries)s entries',
+            DataManager.get_cache_stats()
+        )
+
+        stage_stats = collections.Counter()
+        for node_name in self._dag.get_topological_sort():
+            stage_stats.update(
+                self._dag.graph().nodes[node_name]['node'].get_stage_stats()
+            )
+        Log.some().debug(
+            'staged data: %s file(s) (%s bytes) transferred,'
+            ' %s file(s) (%s bytes) skipped, %s deleted',
+            stage_stats['files_transferred'],
+            stage_stats['bytes_transferred'],
+            stage_stats['files_skipped'],
+            stage_stats['bytes_skipped'],
+            stage_stats['files_deleted']
+        )
 
+        self._close_status_writer()
         self._update_status_db('FINISHED', '')
 
         return True
@@ -185,6 +185,59 @@ class WorkflowDAG:
         return self._graph
 
 
+    def get_stream_source(self, node_name):
+        """
+        Get the step node that streams map items to a step node.
+
+        Args:
+            node_name: name of the step node.
+
+        Returns:
+            Name of the streaming predecessor step node, or None if the
+            step does not stream its map items.
+
+        """
+        for pred in self._graph.predecessors(node_name):
+            if self._graph.edges[pred, node_name].get('stream'):
+                return pred
+
+        return None
+
+
+    def get_stream_consumers(self, node_name):
+        """
+        Get the step nodes that stream map items from a step node.
+
+        Args:
+            node_name: name of the step node.
+
+        Returns:
+            List of names of successor step nodes that stream map items.
+
+        """
+        return [
+            succ for succ in self._graph.successors(node_name)
+            if self._graph.edges[node_name, succ].get('stream')
+        ]
+
+
+    def get_reference_counts(self):
+        """
+        Count the nodes that use the data of each node.
+
+        Args:
+            None.
+
+        Returns:
+            Dict of node name -> number of successor nodes.
+
+        """
+        return {
+            node_name: self._graph.out_degree(node_name)
+            for node_name in self._graph.nodes
+        }
+
+
     @classmethod
     def _get_template_matches(cls, template_value):
         """
@@ -589,6 +642,23 @@ class WorkflowDAG:
                         Contexts.get_data_scheme_of_exec_context(step['execution']['context'])
                     ] = ''
 
+            # stream map items from the step referenced by the map uri
+            if str(
+                    step['execution']['parameters'].get('stream', False)
+            ).lower() in ['true', 'yes', '1']:
+                map_deps = self._get_template_matches(step['map']['uri'])
+                map_dep = next(iter(map_deps.values()), None)
+                if not map_dep or map_dep['name'] == 'workflow':
+                    Log.a().warning(
+                        'step "%s" can only stream map items from a step'
+                        ' output, streaming disabled',
+                        step_name
+                    )
+                else:
+                    self._graph.edges[
+                        'step.{}'.format(map_dep['name']), step_node
+                    ]['stream'] = True
+
 
     def _init_inputs(self):
         """
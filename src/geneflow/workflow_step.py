@@ -1,10 +1,22 @@
 """This module contains the GeneFlow WorkflowStep class."""
 
+import collections
+import datetime
+import itertools
 import json
+import logging
+import os
+import shlex
+import time
 import regex as re
+from slugify import slugify
+from wcmatch import glob
 
 from geneflow.log import Log
 from geneflow.data import DataSource, DataSourceException
+from geneflow.data_manager import DataManager
+from geneflow.map_item import MapItem, MapTemplate
+from geneflow.result_cache import ResultCache
 from geneflow.stageable_data import StageableData
 from geneflow.uri_parser import URIParser
 
@@ -15,6 +27,9 @@ class WorkflowStep(StageableData):
     Inherits from the "StageableData" class.
     """
 
+    # template references, e.g., ${1}, ${workflow->input} or ${step->output}
+    _TEMPLATE_REF = re.compile(r'(\$\{[^{}]+\})')
+
     def __init__(
             self,
             job,
@@ -97,6 +112,40 @@ class WorkflowStep(StageableData):
         if self._throttle_limit < 0:
             self._throttle_limit = 0
 
+        # number of map items that run in a single process or job
+        self._chunk_size = max(1, int(
+            self._step['execution']['parameters'].get('chunk_size', 1)
+        ))
+        # target run time of a chunk in seconds, 0 means use chunk_size
+        self._chunk_duration = max(0.0, float(
+            self._step['execution']['parameters'].get('chunk_duration', 0)
+        ))
+        # number of map items of a chunk that run at the same time
+        self._chunk_parallel = max(1, int(
+            self._step['execution']['parameters'].get('chunk_parallel', 1)
+        ))
+        self._chunk_count = 0  # number of chunk scripts written
+
+        # bulk job status queries of HPC steps, see _check_jobs_bulk()
+        self._status_provider = None
+        # seconds to wait for the exit status of a job that is no longer
+        # listed by the status provider
+        self._exit_grace = max(0.0, float(
+            self._step['execution']['parameters'].get('exit_grace', 300)
+        ))
+        self._unlisted_since = {}  # hpc job id -> time first unlisted
+
+        # reuse outputs of map items from earlier runs
+        self._cache_enabled = str(
+            self._step['execution']['parameters'].get('cache', False)
+        ).lower() in ['true', 'yes', '1']
+        self._result_cache = None
+
+        # hold map items while free disk space is low
+        self._disk_admission = None
+        self._disk_item_bytes = 0  # expected output size of a map item
+        self._disk_hold = False
+
         # workflow-level inputs and parameters
         self._inputs = inputs
         self._parameters = parameters
@@ -116,6 +165,49 @@ class WorkflowStep(StageableData):
         self._parsed_map_uris = []
         self._replace = {}
 
+        # template keys are shared by the templates of all map items
+        self._template_index = {
+            key: i for i, key in enumerate(self._step['template'])
+        }
+        # template strings split into literals and ${...} references
+        self._parsed_templates = {
+            key: tuple(self._TEMPLATE_REF.split(value))
+            for key, value in self._step['template'].items()
+            if isinstance(value, str)
+        }
+        self._template_plans = []  # compiled by _compile_templates()
+
+        # map items indexed by status, updated on each status change
+        self._status_counts = collections.Counter()
+        self._pending_items = collections.deque()  # may hold stale items
+        self._active_items = {}  # id -> map item, queued or running
+        self._failed_items = {}  # id -> map item
+        self._unstaged_items = collections.deque()  # finished, not staged
+        self._item_staging = False  # index items for stage_map_items()
+        self._uncached_items = collections.deque()  # pending, no cache key
+        self._run_time_sum = 0.0  # run time of finished map items
+        self._run_time_count = 0
+
+        # streaming of map items from a dependent step
+        self._stream_open = False
+        self._stream_count = 0  # number of streamed outputs consumed
+
+        # files of the map uri that have not been added to the map yet
+        self._map_files = None
+        self._num_map_files = 0
+
+        # outputs of map items that have been staged individually
+        self._staged_items = []
+
+        # map items that finished in a previous run of the job
+        self._finished_items = set()
+
+        # buffered status updates, written by a StatusWriter if set
+        self._status_writer = None
+        self._dirty_items = {}  # map items changed since last write
+        self._written_status = None  # step status and msg of last write
+        self._last_write = 0.0
+
         # init StageableData base class
         StageableData.__init__(self, data_uris, source_context, clean)
 
@@ -166,6 +258,28 @@ class WorkflowStep(StageableData):
             Log.an().error(msg)
             return self._fatal(msg)
 
+        # compile templates into substitution plans
+        self._compile_templates()
+
+        # open result cache
+        if self._cache_enabled:
+            if self._parsed_data_uris[self._source_context][0]['scheme']\
+                    != 'local':
+                Log.a().warning(
+                    '[step.%s]: result cache requires a local data uri',
+                    self._step['name']
+                )
+            else:
+                self._result_cache = ResultCache(
+                    self._config.get('cache_path'),
+                    self._config.get('cache_size', 0)
+                )
+                if not self._result_cache.initialize():
+                    Log.a().warning(
+                        '[step.%s]: result cache disabled', self._step['name']
+                    )
+                    self._result_cache = None
+
         return True
 
 
@@ -338,7 +452,46 @@ class WorkflowStep(StageableData):
         raise NotImplementedError
 
 
-    def iterate_map_uri(self):
+    def _iterate_map_files(self, file_iters):
+        """
+        Generate map URI files from file name iterators.
+
+        Args:
+            self: class instance.
+            file_iters: list of (parsed map uri, iterator of
+                DataManager.scan() entries) tuples.
+
+        Yields:
+            Dicts with "chopped_uri" and "filename" keys.
+
+        """
+        for uri, file_iter in file_iters:
+            if self._step['map']['inclusive']:
+                # filter with glob
+                if glob.globfilter(
+                    [uri['name']],
+                    self._step['map']['glob'],
+                    flags=glob.EXTGLOB|glob.GLOBSTAR
+                ):
+                    yield {
+                        'chopped_uri': '{}://{}{}'.format(
+                            uri['scheme'],
+                            uri['authority'],
+                            uri['folder']
+                        ),
+                        'filename': uri['name']
+                    }
+
+            for entry in file_iter:
+                yield {
+                    'chopped_uri': '{}/{}'.format(
+                        uri['chopped_uri'].rstrip('/'), entry['folder']
+                    ) if entry['folder'] else uri['chopped_uri'],
+                    'filename': entry['name']
+                }
+
+
+    def iterate_map_uri(self, stream=False):
         """
         Expand step templates for each map-reduce item.
 
@@ -346,114 +499,62 @@ class WorkflowStep(StageableData):
         and are stored in the self._map list.
         If no map_uri is given, only one item "." is included in _map.
 
+        The map URI is listed lazily: only the first batch of map items is
+        added here, and fill_map() adds more as pending items are
+        dispatched.
+
         Args:
             self: class instance.
+            stream: if True, the map URI is not listed. Instead, map items
+                are added with extend_map() as the step referenced by the map
+                URI finishes individual items, until close_stream() is called.
 
         Returns:
             On success: True.
             On failure: False.
 
         """
-        def multiple_replace(string, rep_dict):
-            """
-            Replace multiple string patterns simultaneously.
-
-            Args:
-                string: The string to be replaced.
-                rep_dict: Dictionary containing key and values as patterns that
-                    should be replaced.
-
-            Returns:
-                On success: The string with all the patterns replaced.
-                On failure: False.
-
-            """
-            pattern = re.compile(
-                "|".join([re.escape(k) for k in rep_dict.keys()]),
-                re.M
-            )
-            return pattern.sub(lambda x: rep_dict[x.group(0)], string)
-
         # iterate map items
         if self._map_uris == []:
             # no mapping, run only one job
-            self._map = [{
-                'filename': 'root',
-                'chopped_uri': '',
-                'replace': {},
-                'template': {},
-                'status': 'PENDING',
-                'attempt': 0,
-                'run': [{}]
-            }]
+            self._map = []
+            self._add_map_item(
+                MapItem('root', '', MapTemplate(self._template_index))
+            )
 
-        else:
-            # list uri contents and place into matched files
-            file_list = self._get_map_uri_list()
-            if file_list is False:
-                msg = 'cannot get list of items from map uris: {}'.format(
-                    self._map_uris
-                )
-                Log.an().error(msg)
-                return self._fatal(msg)
+            return True
 
-            if file_list == []: # this folder should never be empty
-                msg = 'map uri contents cannot be empty: {}'.format(
-                    self._map_uris
-                )
-                Log.an().error(msg)
-                return self._fatal(msg)
+        if stream:
+            # map items are added as they become available
+            Log.some().debug(
+                '[step.%s]: streaming map items from: %s',
+                self._step['name'],
+                self._map_uris
+            )
+            self._stream_open = True
 
-            for f in file_list:
-                # check if file matches regex
-                match = re.match(self._step['map']['regex'], f['filename'])
-                if match:
-                    groups = list(match.groups())
-                    replace = {}
-                    for i, group in enumerate(groups):
-                        replace[str('${'+str(i+1)+'}')] = str(group)
-                    self._map.append({
-                        'filename': f['filename'],
-                        'chopped_uri': f['chopped_uri'],
-                        'replace': replace,
-                        'template': {},
-                        'status': 'PENDING',
-                        'attempt': 0,
-                        'run': [{}]
-                    })
-
-            if not self._map:
-                msg = (
-                    'map uri contents must include at least'
-                    ' one item matching regex: {}'
-                ).format(self._map_uris)
-                Log.an().error(msg)
-                return self._fatal(msg)
+            return True
 
-        # iterate through items, expand templates
-        for map_item in self._map:
-            replace = map_item['replace'].copy()
-            replace.update(self._replace)
-            ##### replace map uri base with value corresponding to map item
-            replace[self._step['map']['uri']] = map_item['chopped_uri']
-            for template_key in self._step['template']:
-                if isinstance(self._step['template'][template_key], str):
-                    map_item['template'][template_key] = multiple_replace(
-                        self._step['template'][template_key],
-                        replace
-                    )
-                else:
-                    map_item['template'][template_key]\
-                        = self._step['template'][template_key]
+        # list uri contents and place into matched files
+        self._map_files = self._get_map_uri_list()
+        if self._map_files is False:
+            self._map_files = None
+            msg = 'cannot get list of items from map uris: {}'.format(
+                self._map_uris
+            )
+            Log.an().error(msg)
+            return self._fatal(msg)
 
-        return True
+        return self.fill_map()
 
 
-    def _build_replace(self):
+    def fill_map(self):
         """
-        Build a list of string replacements for template items.
+        Add map items from the map URI listing until enough are pending.
 
-        Result is stored in the self._replace dict.
+        At least one batch ("map_batch_size" config, or the throttle limit if
+        larger) of map items is kept pending, so that jobs can be dispatched
+        before the whole map URI is listed.
 
         Args:
             self: class instance.
@@ -463,267 +564,1409 @@ class WorkflowStep(StageableData):
             On failure: False.
 
         """
-        for template_item in self._step['template']:
-            if not isinstance(self._step['template'][template_item], str):
-                continue
-
-            matches = re.findall(
-                r'\${([^{}]+)->([^{}]+)}',
-                self._step['template'][template_item]
-            )
+        if self._map_files is None:
+            # map uri listed completely, or not listed
+            return True
 
-            if matches:
+        batch_size = max(
+            self._config.get('map_batch_size', 1000), self._throttle_limit
+        )
+        while self._status_counts['PENDING'] < batch_size:
+            try:
+                file_list = list(
+                    itertools.islice(self._map_files, batch_size)
+                )
+            except OSError as err:
+                self._map_files = None
+                msg = 'cannot get contents of map uris: {} [{}]'.format(
+                    self._map_uris, str(err)
+                )
+                Log.an().error(msg)
+                return self._fatal(msg)
 
-                for match in matches:
-                    key = '${'+match[0]+'->'+match[1]+'}'
-                    if match[0] == 'workflow':
-                        # replace with workflow-level input or parameter
-                        if match[1] in self._inputs:
-                            self._replace[str(key)] \
-                                = str(self._inputs[match[1]][0])
+            self._num_map_files += len(file_list)
+            self._append_map_items(file_list)
 
-                        elif match[1] in self._parameters:
-                            self._replace[str(key)] \
-                                = str(self._parameters[match[1]])
+            if len(file_list) < batch_size:
+                self._map_files = None
+                break
 
-                        else:
-                            msg = (
-                                'invalid template reference,'
-                                ' must be a workflow input/parameter key: {}'
-                            ).format(key)
-                            Log.an().error(msg)
-                            return self._fatal(msg)
+        if self._map_files is not None:
+            return True
 
-                    else:
-                        # replace with output URI of previous step
-                        if match[0] in self._step['depend']:
-                            if match[1] == 'output':
-                                self._replace[str(key)] \
-                                    = self._depend_uris[match[0]][0]\
-                                        ['chopped_uri']
+        if not self._num_map_files: # this folder should never be empty
+            msg = 'map uri contents cannot be empty: {}'.format(
+                self._map_uris
+            )
+            Log.an().error(msg)
+            return self._fatal(msg)
 
-                            else:
-                                msg = (
-                                    'invalid template reference,'
-                                    ' must be "output": {}'
-                                ).format(key)
-                                Log.an().error(msg)
-                                return self._fatal(msg)
+        if not self._map:
+            msg = (
+                'map uri contents must include at least'
+                ' one item matching regex: {}'
+            ).format(self._map_uris)
+            Log.an().error(msg)
+            return self._fatal(msg)
 
-                        else:
-                            msg = (
-                                'template reference to step must be'
-                                ' listed as dependent: {}'
-                            ).format(key)
-                            Log.an().error(msg)
-                            return self._fatal(msg)
+        Log.some().debug(
+            '[step.%s]: %s map item(s) from %s file(s)',
+            self._step['name'],
+            len(self._map),
+            self._num_map_files
+        )
 
         return True
 
 
-    def get_step(self):
+    def _append_map_items(self, file_list):
         """
-        Return the step dict.
+        Add map items for files that match the map-reduce regex.
 
         Args:
             self: class instance.
+            file_list: list of dicts with "chopped_uri" and "filename" keys.
 
         Returns:
-            _step dict
+            Number of map items added.
 
         """
-        return self._step
+        num_added = 0
+        regex = re.compile(self._step['map']['regex'])
+        for f in file_list:
+            # check if file matches regex
+            match = regex.match(f['filename'])
+            if match:
+                self._add_map_item(MapItem(
+                    f['filename'],
+                    f['chopped_uri'],
+                    MapTemplate(self._template_index),
+                    tuple(str(group) for group in match.groups())
+                ))
+                num_added += 1
 
+        return num_added
 
-    def get_status_struct(self):
+
+    def set_finished_items(self, names):
         """
-        Return a dict structure with the status of all map items.
+        Keep map items that finished in a previous run of the job.
+
+        Map items with these names are marked as finished when they are
+        added to the map, if their output still exists.
 
         Args:
             self: class instance.
+            names: set of map item names (file names).
 
         Returns:
-            A dict with the following structure:
-                {
-                    id: step id
-                    name: step name
-                    map:
-                        filename: status,
-                        filename: status,...
-                }
-            Each filename: status combination indicates the status of the job
-            processing one of the map-reduce items.
+            True.
 
         """
-        struct = {
-            'id': self._step['step_id'][:8],
-            'name': self._step['name'],
-            'map': {}
-        }
-        for map_item in self._map:
-            struct['map'][map_item['filename']] = map_item['status']
+        self._finished_items = set(names)
 
-        return struct
+        return True
 
 
-    def run(self):
+    def _add_map_item(self, map_item):
         """
-        Execute the app for this step.
+        Expand the template of a new pending map item and add it to the map.
 
-        This method must be overridden by the
-        child class for a specific context.
+        Args:
+            self: class instance.
+            map_item: new map item object.
+
+        Returns:
+            None.
 
         """
-        raise NotImplementedError
+        self._expand_map_item(map_item)
+        self._map.append(map_item)
+        self._dirty_items[map_item['filename']] = map_item
+        self._status_counts['PENDING'] += 1
+        self._pending_items.append(map_item)
+        if self._result_cache:
+            self._uncached_items.append(map_item)
 
+        self._restore_finished_item(map_item)
 
-    def _serialize_detail(self):
-        """
-        Serialize all map-reduce items.
 
-        This method can be overridden and customized
-        if any map items have non-serializable objects. See
-        the LocalStep class for an example.
+    def _restore_finished_item(self, map_item):
+        """
+        Mark a new map item as finished if it finished in a previous run.
 
         Args:
             self: class instance.
+            map_item: map item object (item of self._map).
 
         Returns:
-            A dict of all map items and their run histories.
+            True if the map item was restored, False otherwise.
 
         """
-        return {
-            map_item['filename']: map_item['run'] for map_item in self._map
-        }
+        if (
+                map_item['filename'] not in self._finished_items
+                or not DataManager.exists(uri='{}/{}'.format(
+                    self._parsed_data_uris[self._source_context][0]\
+                        ['chopped_uri'],
+                    map_item['template']['output']
+                ))
+        ):
+            return False
 
+        # keep output of previous run
+        map_item['run'][map_item['attempt']]['resumed'] = True
+        self._set_item_status(map_item, 'FINISHED')
 
-    def _fatal(self, msg):
+        return True
+
+
+    def data_exists(self):
         """
-        Update database with error message and set status.
+        Check if the data URI of the step exists in the source context.
 
         Args:
-            msg: status message.
+            self: class instance.
 
         Returns:
-            False
+            True if the data URI exists, False otherwise.
 
         """
-        self._update_status_db('ERROR', msg)
-
-        return False
+        return bool(DataManager.exists(
+            parsed_uri=self._parsed_data_uris[self._source_context][0]
+        ))
 
 
-    def _update_status_db(self, status, msg):
+    def _expand_map_item(self, map_item):
         """
-        Update the status of the step, and the status record in the database.
+        Expand step templates for a single map item.
 
         Args:
-            status: new step status.
-            msg: message associated with step status.
+            self: class instance.
+            map_item: map item object (item of self._map).
 
         Returns:
-            On success: True.
-            On failure: False.
+            None.
 
         """
-        try:
-            data_source = DataSource(self._config['database'])
-        except DataSourceException as err:
-            msg = 'data source initialization error [{}]'.format(str(err))
-            Log.an().error(msg)
-            return False
+        # slot 0 is the map uri, slots 1..n are regex groups
+        values = (map_item['chopped_uri'],) + map_item['groups']
+        for template_key, plan in self._template_plans:
+            if not isinstance(plan, tuple):
+                # not a string template
+                map_item['template'][template_key] = plan
+            elif len(plan) == 1:
+                # no map item references
+                map_item['template'][template_key] = plan[0]
+            else:
+                parts = list(plan)
+                parts[1::2] = [values[slot] for slot in plan[1::2]]
+                map_item['template'][template_key] = ''.join(parts)
 
-        self._status = status
-        detail = self._serialize_detail()
 
-        if not data_source.update_job_step_status(
-                self._step['step_id'],
-                self._job['job_id'],
-                self._status,
-                json.dumps(detail),
-                msg
-        ):
-            Log.an().warning('cannot update job status in data source')
-            data_source.rollback()
+    def _compile_templates(self):
+        """
+        Compile step templates into substitution plans.
 
-        data_source.commit()
-        return True
+        A plan is a tuple of literal strings alternating with slot numbers.
+        References to workflow inputs, parameters and step outputs are folded
+        into the literals. Slot 0 is the map uri, and slots 1..n are the
+        regex groups ${1}..${n} of a map item. Non-string templates are kept
+        as is.
 
+        Args:
+            self: class instance.
+
+        Returns:
+            None.
 
-    def check_running_jobs(self):
         """
-        Check status/progress of all map-reduce items and update _map status.
+        num_groups = re.compile(self._step['map']['regex']).groups\
+            if self._step['map']['uri'] else 0
+        slots = {
+            '${'+str(i)+'}': i for i in range(1, num_groups+1)
+        }
+        if self._step['map']['uri']:
+            slots[self._step['map']['uri']] = 0
 
-        This method must be overridden by the child class for a
-        specific context.
+        self._template_plans = []
+        for template_key, value in self._step['template'].items():
+            if template_key not in self._parsed_templates:
+                self._template_plans.append((template_key, value))
+                continue
 
-        """
-        raise NotImplementedError
+            plan = [self._parsed_templates[template_key][0]]
+            parsed = self._parsed_templates[template_key]
+            for ref, literal in zip(parsed[1::2], parsed[2::2]):
+                if ref in slots:
+                    plan += [slots[ref], literal]
+                else:
+                    # constant, or unknown reference that is kept as is
+                    plan[-1] += self._replace.get(ref, ref) + literal
 
+            self._template_plans.append((template_key, tuple(plan)))
 
-    def checkpoint(self):
+
+    def extend_map(self, outputs):
         """
-        Check if step meets completion criteria, based on "checkpoint"
-        execution parameter.
+        Add map items streamed from the step referenced by the map URI.
+
+        Streamed items are matched by name against the map glob and regex.
+        Nested paths within the outputs of the referenced step are not
+        expanded.
 
         Args:
             self: class instance.
+            outputs: ordered list of all outputs streamed so far by the
+                referenced step. Only outputs beyond those already seen are
+                added.
 
         Returns:
-            True if step meets completion criteria.
-            False if it does not.
+            Number of map items added.
 
         """
-        checkpoint = self._step['execution']['parameters'].get(
-            'checkpoint', 'any'
-        )
-
-        status = self.get_status()
-        finished = [item == 'FINISHED' for item in status.values()]
-        Log.some().info(
-            '[step.%s]: checkpoint: %s of %s job(s) finished',
-            self._step['name'],
-            sum(finished),
-            len(finished)
-        )
-
-        # print summary of job result in debug mode
-        for item in sorted(status):
+        new_outputs = outputs[self._stream_count:]
+        self._stream_count = len(outputs)
+        if not new_outputs:
+            return 0
+
+        num_added = self._append_map_items([
+            {
+                'chopped_uri': self._map_uris[0],
+                'filename': output
+            } for output in glob.globfilter(
+                new_outputs,
+                self._step['map']['glob'],
+                flags=glob.EXTGLOB|glob.GLOBSTAR
+            )
+        ])
+        if num_added:
             Log.some().debug(
-                '[step.%s]: checkpoint: %s -> %s',
+                '[step.%s]: streamed %s new map item(s)',
                 self._step['name'],
-                item,
-                status[item]
+                num_added
             )
 
-        if checkpoint == 'all':
-            # all jobs must be finished
-            Log.some().info('[step.%s]: checkpoint: all jobs must finish', self._step['name'])
-            return all(finished)
-
-        if checkpoint == 'none':
-            # no jobs have to be finished
-            Log.some().info('[step.%s]: checkpoint: jobs do not have to finish', self._step['name'])
-            return True
-
-        # at least one job must be finished
-        # default to 'any' if anything other than 'all', 'any', or 'none is used
-        Log.some().info(
-            '[step.%s]: checkpoint: at least one job must finish',
-            self._step['name']
-        )
-        return any(finished)
+        return num_added
 
 
-    def get_status(self):
+    def close_stream(self):
         """
-        Check if all map-reduce jobs have finished.
+        Stop streaming map items.
+
+        Called once the step referenced by the map URI is complete, after
+        all of its outputs have been passed to extend_map().
 
         Args:
             self: class instance.
 
         Returns:
-            Dictionary with status of all map item jobs.
+            On success: True.
+            On failure: False.
+
+        """
+        self._stream_open = False
+
+        if not self._map:
+            msg = (
+                'map uri contents must include at least'
+                ' one item matching regex: {}'
+            ).format(self._map_uris)
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        return True
+
+
+    def is_stream_open(self):
+        """
+        Check if map items are still being streamed into this step.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            True if the stream is open, False otherwise.
+
+        """
+        return self._stream_open
+
+
+    def _build_replace(self):
+        """
+        Build a list of string replacements for template items.
+
+        Result is stored in the self._replace dict.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        for parsed in self._parsed_templates.values():
+            matches = [
+                match.groups() for match in (
+                    re.fullmatch(r'\${([^{}]+)->([^{}]+)}', ref)
+                    for ref in parsed[1::2]
+                ) if match
+            ]
+
+            if matches:
+
+                for match in matches:
+                    key = '${'+match[0]+'->'+match[1]+'}'
+                    if match[0] == 'workflow':
+                        # replace with workflow-level input or parameter
+                        if match[1] in self._inputs:
+                            self._replace[str(key)] \
+                                = str(self._inputs[match[1]][0])
+
+                        elif match[1] in self._parameters:
+                            self._replace[str(key)] \
+                                = str(self._parameters[match[1]])
+
+                        else:
+                            msg = (
+                                'invalid template reference,'
+                                ' must be a workflow input/parameter key: {}'
+                            ).format(key)
+                            Log.an().error(msg)
+                            return self._fatal(msg)
+
+                    else:
+                        # replace with output URI of previous step
+                        if match[0] in self._step['depend']:
+                            if match[1] == 'output':
+                                self._replace[str(key)] \
+                                    = self._depend_uris[match[0]][0]\
+                                        ['chopped_uri']
+
+                            else:
+                                msg = (
+                                    'invalid template reference,'
+                                    ' must be "output": {}'
+                                ).format(key)
+                                Log.an().error(msg)
+                                return self._fatal(msg)
+
+                        else:
+                            msg = (
+                                'template reference to step must be'
+                                ' listed as dependent: {}'
+                            ).format(key)
+                            Log.an().error(msg)
+                            return self._fatal(msg)
+
+        return True
+
+
+    def enable_item_staging(self):
+        """
+        Keep finished map items so that stage_map_items() can stage them.
+
+        Only steps whose outputs are streamed to other steps need this,
+        and it must be enabled before map items are added to the map.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            None.
+
+        """
+        self._item_staging = True
+
+
+    def stage_map_items(self, **kwargs):
+        """
+        Copy outputs of newly finished map items to all contexts except 'final'.
+
+        Outputs that have been staged this way are not staged again by
+        stage(). Only map items that finished after enable_item_staging()
+        was called are staged.
+
+        Args:
+            self: class instance.
+            **kwargs: additional arguments required by DataManager.copy().
+
+        Returns:
+            On success: list of outputs of all map items staged so far.
+            On failure: False.
+
+        """
+        while self._unstaged_items:
+            map_item = self._unstaged_items.popleft()
+            output = map_item['template']['output']
+            for context in self._parsed_data_uris:
+                if context in [self._source_context, 'final']:
+                    continue
+
+                for i, parsed_source_uri in enumerate(
+                        self._parsed_data_uris[self._source_context]
+                ):
+                    src_uri = '{}/{}'.format(
+                        parsed_source_uri['chopped_uri'], output
+                    )
+                    dest_uri = '{}/{}'.format(
+                        self._parsed_data_uris[context][i]['chopped_uri'],
+                        output
+                    )
+
+                    Log.some().debug(
+                        'staging map item: %s->%s to %s->%s',
+                        self._source_context,
+                        src_uri,
+                        context,
+                        dest_uri
+                    )
+
+                    if not self._stage_uri(
+                            URIParser.parse(src_uri),
+                            URIParser.parse(dest_uri),
+                            **kwargs
+                    ):
+                        msg = 'cannot stage map item by copying from {} to {}'\
+                            .format(src_uri, dest_uri)
+                        Log.an().error(msg)
+                        return self._fatal(msg)
+
+            self._staged_items.append(output)
+
+        return self._staged_items
+
+
+    def stage(self, executor=None, **kwargs):
+        """
+        Copy data to all contexts except 'final' from source URI.
+
+        If outputs of map items have already been staged individually, only
+        the remaining map items are staged.
+
+        Args:
+            self: class instance.
+            executor: concurrent.futures executor to stage contexts and URIs
+                concurrently, or None to stage them one after another.
+            **kwargs: additional arguments required by DataManager.copy().
+
+        Returns:
+            True or False.
+
+        """
+        if not self._staged_items:
+            return StageableData.stage(self, executor, **kwargs)
+
+        if self.stage_map_items(**kwargs) is False:
+            return False
+
+        self._staged = True
+
+        return True
+
+
+    def get_staged_items(self):
+        """
+        Return outputs of map items that have been staged individually.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Ordered list of map item outputs.
+
+        """
+        return self._staged_items
+
+
+    def get_num_items(self):
+        """
+        Return the number of map items added to the map.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Number of map items.
+
+        """
+        return len(self._map)
+
+
+    def get_step(self):
+        """
+        Return the step dict.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            _step dict
+
+        """
+        return self._step
+
+
+    def get_status_struct(self):
+        """
+        Return a dict structure with the status of all map items.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            A dict with the following structure:
+                {
+                    id: step id
+                    name: step name
+                    map:
+                        filename: status,
+                        filename: status,...
+                }
+            Each filename: status combination indicates the status of the job
+            processing one of the map-reduce items.
+
+        """
+        struct = {
+            'id': self._step['step_id'][:8],
+            'name': self._step['name'],
+            'map': {}
+        }
+        for map_item in self._map:
+            struct['map'][map_item['filename']] = map_item['status']
+
+        return struct
+
+
+    def run(self):
+        """
+        Execute the app for this step.
+
+        This method must be overridden by the
+        child class for a specific context.
+
+        """
+        raise NotImplementedError
+
+
+    def _get_chunk_size(self):
+        """
+        Get the number of map items to run in the next chunk.
+
+        If the "chunk_duration" execution parameter is set, the chunk size is
+        derived from the average run time of finished map items, and
+        "chunk_size" is used until run times are known.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Number of map items.
+
+        """
+        if not self._chunk_duration or not self._run_time_count:
+            return self._chunk_size
+
+        average = max(self._run_time_sum / self._run_time_count, 0.001)
+        return max(1, int(
+            self._chunk_duration * self._chunk_parallel / average
+        ))
+
+
+    def _get_cache_key(self, map_item):
+        """
+        Compute the result cache key of a map item.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            Cache key, or None if the map item cannot be cached.
+
+        """
+        parameters = {}
+        input_digests = {}
+        for key, value in map_item['template'].items():
+            if key not in self._app['inputs']:
+                parameters[key] = value
+            elif value:
+                parsed_uri = URIParser.parse(value)
+                if not parsed_uri or parsed_uri['scheme'] != 'local':
+                    return None
+                input_digests[key] = self._result_cache.digest(
+                    parsed_uri['chopped_path']
+                )
+                if not input_digests[key]:
+                    return None
+
+        return ResultCache.key(
+            self._app,
+            self._step['execution']['method'],
+            parameters,
+            input_digests
+        )
+
+
+    def _get_output_path(self, map_item):
+        """Return local path of the output of a map item."""
+        return '{}/{}'.format(
+            self._parsed_data_uris[self._source_context][0]['chopped_path'],
+            map_item['template']['output']
+        )
+
+
+    def _restore_cached_items(self):
+        """
+        Finish pending map items with outputs from the result cache.
+
+        The cache key of each map item is computed once. Items that are not
+        in the cache are left pending.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Number of map items restored.
+
+        """
+        if not self._result_cache:
+            return 0
+
+        num_restored = 0
+        while self._uncached_items:
+            map_item = self._uncached_items.popleft()
+            run = map_item['run'][map_item['attempt']]
+            if map_item['status'] != 'PENDING' or 'cache_key' in run:
+                continue
+
+            run['cache_key'] = self._get_cache_key(map_item)
+            if run['cache_key'] and self._result_cache.restore(
+                    run['cache_key'], self._get_output_path(map_item)
+            ):
+                Log.a().debug(
+                    '[step.%s]: cached output: %s',
+                    self._step['name'],
+                    map_item['template']['output']
+                )
+                run['cached'] = True
+                self._set_item_status(map_item, 'FINISHED')
+                num_restored += 1
+
+        if num_restored:
+            Log.some().info(
+                '[step.%s]: %s map item(s) restored from result cache',
+                self._step['name'],
+                num_restored
+            )
+
+        return num_restored
+
+
+    def _store_cached_items(self):
+        """
+        Add outputs of finished map items to the result cache.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Number of map items stored.
+
+        """
+        if not self._result_cache:
+            return 0
+
+        num_stored = 0
+        for map_item in self._map:
+            run = map_item['run'][map_item['attempt']]
+            if (
+                    map_item['status'] == 'FINISHED'
+                    and run.get('cache_key')
+                    and not run.get('cached')
+                    and os.path.lexists(self._get_output_path(map_item))
+            ):
+                if self._result_cache.store(
+                        run['cache_key'],
+                        self._get_output_path(map_item),
+                        self._app['name']
+                ):
+                    run['cached'] = True
+                    num_stored += 1
+
+        return num_stored
+
+
+    def _get_pending_chunks(self):
+        """
+        Group pending map items into chunks, up to the throttle limit.
+
+        The throttle limit applies to jobs, so each chunk counts as one job
+        no matter how many map items it holds. Map items with outputs in
+        the result cache are finished first.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            List of lists of map items.
+
+        """
+        self._restore_cached_items()
+
+        size = self._get_chunk_size()
+        limit = self._get_admission_limit()
+        if self._throttle_limit > 0:
+            # _num_running counts map items, not jobs
+            num_items = max(
+                self._throttle_limit - self._get_num_running_jobs(), 0
+            ) * size
+            limit = num_items if limit is None else min(limit, num_items)
+        pending = self._pop_pending_items(limit)
+
+        return [
+            pending[i:i+size] for i in range(0, len(pending), size)
+        ]
+
+
+    def _get_num_running_jobs(self):
+        """
+        Count the queued or running jobs of the step.
+
+        Map items of a chunk share a job.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Number of jobs.
+
+        """
+        return len({
+            map_item['run'][map_item['attempt']].get('chunk_script', key)
+            for key, map_item in self._active_items.items()
+        })
+
+
+    def _get_admission_limit(self):
+        """
+        Get the number of map items that fit in the free disk space.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Number of map items, or None for no limit.
+
+        """
+        if not self._disk_admission:
+            return None
+
+        limit = self._disk_admission.limit(
+            self._step['name'], self._disk_item_bytes, self._num_running
+        )
+        if limit == 0 and not self._disk_hold and self._pending_items:
+            Log.a().warning(
+                '[step.%s]: low free disk space, holding pending map items',
+                self._step['name']
+            )
+            self._disk_hold = True
+        elif limit != 0 and self._disk_hold:
+            Log.some().info(
+                '[step.%s]: free disk space available, resuming',
+                self._step['name']
+            )
+            self._disk_hold = False
+
+        return limit
+
+
+    def _pop_pending_items(self, limit=None):
+        """
+        Remove pending map items from the pending queue, in map order.
+
+        The caller must change the status of the returned map items.
+
+        Args:
+            self: class instance.
+            limit: maximum number of map items, or None for no limit.
+
+        Returns:
+            List of map items.
+
+        """
+        items = []
+        while self._pending_items and (limit is None or len(items) < limit):
+            map_item = self._pending_items.popleft()
+            if map_item['status'] == 'PENDING':
+                items.append(map_item)
+
+        return items
+
+
+    def _write_chunk_script(self, chunk):
+        """
+        Write a shell script that runs the commands of a chunk of map items.
+
+        Each command writes its exit status to "<log path>.exit", so every
+        map item of the chunk gets its own status. Up to "chunk_parallel"
+        commands run at the same time.
+
+        Args:
+            self: class instance.
+            chunk: list of (map item, command string, log path) tuples.
+
+        Returns:
+            On success: path of the script.
+            On failure: False.
+
+        """
+        script_path = '{}/_log/gf-chunk-{}-{}.sh'.format(
+            self._parsed_data_uris[self._source_context][0]['chopped_path'],
+            self._chunk_count,
+            slugify(self._step['name'], regex_pattern=r'[^-a-z0-9_]+')
+        )
+
+        lines = ['#!/bin/bash']
+        for i, (_, command, log_path) in enumerate(chunk):
+            lines += [
+                'item_{}() {{'.format(i),
+                '    {}'.format(command),
+                '    echo $? > {}'.format(shlex.quote(log_path+'.exit')),
+                '}'
+            ]
+        lines.append('for ITEM in {}; do'.format(
+            ' '.join('item_{}'.format(i) for i in range(len(chunk)))
+        ))
+        if self._chunk_parallel > 1:
+            lines += [
+                '    while [ "$(jobs -rp | wc -l)" -ge {} ]; do'
+                ' wait -n; done'.format(self._chunk_parallel),
+                '    "${ITEM}" &'
+            ]
+        else:
+            lines.append('    "${ITEM}"')
+        lines += ['done', 'wait']
+
+        try:
+            with open(script_path, 'w') as script_file:
+                script_file.write('\n'.join(lines)+'\n')
+        except OSError as err:
+            msg = 'cannot write chunk script for step "{}" [{}]'\
+                .format(self._step['name'], str(err))
+            Log.an().error(msg)
+            return self._fatal(msg)
+
+        self._chunk_count += 1
+        for map_item, _, log_path in chunk:
+            map_item['run'][map_item['attempt']]['log_path'] = log_path
+            map_item['run'][map_item['attempt']]['chunk_size'] = len(chunk)
+            map_item['run'][map_item['attempt']]['chunk_script'] = script_path
+
+        return script_path
+
+
+    @staticmethod
+    def _read_exit_status(map_item, missing=-1):
+        """
+        Read the exit status that a job script wrote for a map item.
+
+        Args:
+            map_item: map item object (item of self._map).
+            missing: value to return if no exit status was written.
+
+        Returns:
+            Exit status, or the "missing" value if no exit status was
+            written, e.g., because the job was cancelled or killed before
+            the item finished.
+
+        """
+        try:
+            with open('{}.exit'.format(
+                    map_item['run'][map_item['attempt']]['log_path']
+            )) as exit_file:
+                return int(exit_file.read().strip())
+        except (OSError, ValueError):
+            return missing
+
+
+    def _get_exit_status(self, map_item):
+        """
+        Get the exit status of a job that is no longer in the queue.
+
+        This method must be overridden by HPC step classes that use a
+        status provider.
+
+        """
+        raise NotImplementedError
+
+
+    def _get_unlisted_exit_status(self, map_item):
+        """
+        Get the exit status of a job that the status provider did not list.
+
+        Schedulers may stop listing a job before its exit status is written,
+        e.g., if squeue or sacct lag behind, so a missing exit status only
+        fails the job after the "exit_grace" period.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+
+        Returns:
+            Exit status, or None if the job has not finished yet.
+
+        """
+        run = map_item['run'][map_item['attempt']]
+        if 'log_path' in run:
+            # job array task or chunk, exit status written by job script
+            exit_status = self._read_exit_status(map_item, missing=None)
+        else:
+            exit_status = self._get_exit_status(map_item)
+
+        hpc_job_id = str(run['hpc_job_id'])
+        if exit_status is not None:
+            self._unlisted_since.pop(hpc_job_id, None)
+            return exit_status
+
+        since = self._unlisted_since.setdefault(hpc_job_id, time.time())
+        if time.time() - since < self._exit_grace:
+            return None
+
+        Log.a().warning(
+            '[step.%s]: no exit status of job %s after %s seconds',
+            self._step['name'], hpc_job_id, self._exit_grace
+        )
+        self._unlisted_since.pop(hpc_job_id, None)
+
+        return -1
+
+
+    def _check_jobs_bulk(self):
+        """
+        Update status of map items with a single status provider query.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            True.
+
+        """
+        active = list(self._active_items.values())
+        if not active:
+            return True
+
+        jobs = self._status_provider.query([
+            str(map_item['run'][map_item['attempt']]['hpc_job_id'])
+            for map_item in active
+        ])
+        if jobs is False:
+            msg = 'cannot get job status for step "{}"'\
+                .format(self._step['name'])
+            Log.a().warning(msg)
+            for map_item in active:
+                self._set_item_status(map_item, 'UNKNOWN')
+
+            return True
+
+        for map_item in active:
+            run = map_item['run'][map_item['attempt']]
+            job = jobs.get(str(run['hpc_job_id']))
+            if job and job['status'] not in ['FINISHED', 'FAILED']:
+                self._unlisted_since.pop(str(run['hpc_job_id']), None)
+                self._set_item_status(map_item, job['status'])
+                continue
+
+            if not job:
+                # job left the queue
+                exit_status = self._get_unlisted_exit_status(map_item)
+                if exit_status is None:
+                    continue
+                status = 'FINISHED' if exit_status == 0 else 'FAILED'
+            elif 'log_path' in run:
+                # job array task or chunk, exit status written by job script
+                exit_status = self._read_exit_status(
+                    map_item,
+                    missing=-1 if job['exit_status'] is None
+                    else job['exit_status']
+                )
+                status = 'FINISHED' if exit_status == 0 else 'FAILED'
+            else:
+                status = job['status']
+                exit_status = job['exit_status']
+
+            Log.a().debug(
+                '[step.%s]: exit status: %s -> %s',
+                self._step['name'],
+                map_item['template']['output'],
+                exit_status
+            )
+            self._set_item_status(map_item, status)
+
+            # decrease num running procs
+            if self._num_running > 0:
+                self._num_running -= 1
+
+        return True
+
+
+    def _serialize_detail(self):
+        """
+        Serialize all map-reduce items.
+
+        This method can be overridden and customized
+        if any map items have non-serializable objects. See
+        the LocalStep class for an example.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            A dict of all map items and their run histories.
+
+        """
+        return {
+            map_item['filename']: map_item['run'] for map_item in self._map
+        }
+
+
+    def _fatal(self, msg):
+        """
+        Update database with error message and set status.
+
+        Args:
+            msg: status message.
+
+        Returns:
+            False
+
+        """
+        self._update_status_db('ERROR', msg)
+
+        return False
+
+
+    def set_disk_admission(self, disk_admission, item_bytes=0):
+        """
+        Hold pending map items while free disk space is low.
+
+        Args:
+            self: class instance.
+            disk_admission: DiskAdmission instance, shared by all steps of
+                the workflow.
+            item_bytes: expected output size of a map item, 0 if unknown.
+
+        Returns:
+            True.
+
+        """
+        self._disk_admission = disk_admission
+        self._disk_item_bytes = item_bytes
+
+        return True
+
+
+    def set_status_writer(self, status_writer):
+        """
+        Write status updates in the background with a StatusWriter.
+
+        Args:
+            self: class instance.
+            status_writer: StatusWriter instance.
+
+        Returns:
+            True.
+
+        """
+        self._status_writer = status_writer
+
+        return True
+
+
+    def _set_item_status(self, map_item, status):
+        """
+        Set the status of a map item and its current run.
+
+        The item is marked as changed for the next status update.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+            status: new map item status.
+
+        Returns:
+            None.
+
+        """
+        old_status = map_item['status']
+        if (
+                old_status != status
+                or map_item['run'][map_item['attempt']].get('status') != status
+        ):
+            map_item['status'] = status
+            map_item['run'][map_item['attempt']]['status'] = status
+            self._dirty_items[map_item['filename']] = map_item
+
+            # record start and finish times of the current run
+            if status == 'RUNNING':
+                map_item['run'][map_item['attempt']]\
+                    .setdefault('started', time.time())
+            elif status in ['FINISHED', 'FAILED', 'STOPPED']:
+                map_item['run'][map_item['attempt']]['finished'] = time.time()
+
+            if old_status != status:
+                self._index_item(map_item, old_status, status)
+
+
+    def _index_item(self, map_item, old_status, status):
+        """
+        Move a map item to the index of its new status.
+
+        Args:
+            self: class instance.
+            map_item: map item object (item of self._map).
+            old_status: previous map item status.
+            status: new map item status.
+
+        Returns:
+            None.
+
+        """
+        self._status_counts[old_status] -= 1
+        self._status_counts[status] += 1
+
+        key = id(map_item)
+        self._active_items.pop(key, None)
+        self._failed_items.pop(key, None)
+
+        if status == 'PENDING':
+            self._pending_items.append(map_item)
+            if self._result_cache:
+                self._uncached_items.append(map_item)
+
+        elif status == 'FAILED':
+            self._failed_items[key] = map_item
+
+        elif status == 'FINISHED':
+            if self._item_staging:
+                self._unstaged_items.append(map_item)
+
+            run = map_item['run'][map_item['attempt']]
+            if run.get('started') and run.get('finished'):
+                # items of a chunk share the run time of the chunk
+                num_items = run.get('chunk_size', 1)
+                self._run_time_sum += (run['finished'] - run['started'])\
+                    * min(num_items, self._chunk_parallel) / num_items
+                self._run_time_count += 1
+
+        elif status != 'STOPPED':
+            self._active_items[key] = map_item
+
+
+    @staticmethod
+    def _item_record(map_item):
+        """
+        Get the job_step_item record of a map item.
+
+        Args:
+            map_item: map item object (item of self._map).
+
+        Returns:
+            Dict of JobStepItemEntity column values.
+
+        """
+        run = map_item['run'][map_item['attempt']]
+        return {
+            'status': map_item['status'],
+            'attempt': map_item['attempt'],
+            'pid': run.get('pid', 0),
+            'hpc_job_id': str(run.get('hpc_job_id', '')),
+            'started': datetime.datetime.fromtimestamp(run['started'])\
+                if run.get('started') else None,
+            'finished': datetime.datetime.fromtimestamp(run['finished'])\
+                if run.get('finished') else None
+        }
+
+
+    def _update_status_db(self, status, msg):
+        """
+        Update the status of the step, and the status record in the database.
+
+        Nothing is written if neither the step status nor any map item has
+        changed since the last write. Map item changes are buffered until
+        "status_flush_interval" seconds have passed or "status_flush_items"
+        items have changed, and are written as job_step_item rows of the
+        changed items only. The full detail of the step is only written
+        when the step status changes, which is written right away. Terminal
+        states wait for the write to complete.
+
+        Args:
+            status: new step status.
+            msg: message associated with step status.
+
+        Returns:
+            On success: True.
+            On failure: False.
+
+        """
+        self._status = status
+        status_changed = (status, msg) != self._written_status
+
+        if not status_changed:
+            if not self._dirty_items:
+                if self._status_writer:
+                    self._status_writer.skip(self._job['job_id'])
+                return True
+
+            if (
+                    len(self._dirty_items)
+                    < self._config.get('status_flush_items', 1000)
+                    and time.monotonic() - self._last_write
+                    < self._config.get('status_flush_interval', 5)
+            ):
+                # buffer map item changes
+                return True
+
+        detail_json = json.dumps(self._serialize_detail())\
+            if status_changed else None
+        items = {
+            name: self._item_record(map_item)
+            for name, map_item in self._dirty_items.items()
+        }
+        self._dirty_items = {}
+        self._written_status = (status, msg)
+        self._last_write = time.monotonic()
+
+        if self._status_writer:
+            return self._status_writer.submit(
+                self._job['job_id'],
+                self._step['step_id'],
+                self._status,
+                detail_json,
+                msg,
+                items=items,
+                wait=(status in ['FINISHED', 'ERROR'])
+            )
+
+        try:
+            data_source = DataSource(self._config['database'])
+        except DataSourceException as err:
+            msg = 'data source initialization error [{}]'.format(str(err))
+            Log.an().error(msg)
+            return False
+
+        if not data_source.update_job_step_status(
+                self._step['step_id'],
+                self._job['job_id'],
+                self._status,
+                detail_json,
+                msg,
+                items=items
+        ):
+            Log.an().warning('cannot update job status in data source')
+            data_source.rollback()
+
+        data_source.commit()
+        return True
+
+
+    def check_running_jobs(self):
+        """
+        Check status/progress of all map-reduce items and update _map status.
+
+        This method must be overridden by the child class for a
+        specific context.
+
+        """
+        raise NotImplementedError
+
+
+    def get_wait_fds(self):
+        """
+        Return file descriptors that become readable when a job finishes.
+
+        This method can be overridden by contexts that can be notified of job
+        completion. Steps without such descriptors are polled every
+        "run_poll_delay" seconds.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            List of file descriptors.
+
+        """
+        return []
+
+
+    def checkpoint(self):
+        """
+        Check if step meets completion criteria, based on "checkpoint"
+        execution parameter.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            True if step meets completion criteria.
+            False if it does not.
+
+        """
+        checkpoint = self._step['execution']['parameters'].get(
+            'checkpoint', 'any'
+        )
+
+        # cache outputs for later runs
+        self._store_cached_items()
+
+        num_finished = self._status_counts['FINISHED']
+        Log.some().info(
+            '[step.%s]: checkpoint: %s of %s job(s) finished',
+            self._step['name'],
+            num_finished,
+            len(self._map)
+        )
+
+        # print summary of job result in debug mode
+        if Log.some().isEnabledFor(logging.DEBUG):
+            status = self.get_status()
+            for item in sorted(status):
+                Log.some().debug(
+                    '[step.%s]: checkpoint: %s -> %s',
+                    self._step['name'],
+                    item,
+                    status[item]
+                )
+
+        if checkpoint == 'all':
+            # all jobs must be finished
+            Log.some().info('[step.%s]: checkpoint: all jobs must finish', self._step['name'])
+            return num_finished == len(self._map)
+
+        if checkpoint == 'none':
+            # no jobs have to be finished
+            Log.some().info('[step.%s]: checkpoint: jobs do not have to finish', self._step['name'])
+            return True
+
+        # at least one job must be finished
+        # default to 'any' if anything other than 'all', 'any', or 'none is used
+        Log.some().info(
+            '[step.%s]: checkpoint: at least one job must finish',
+            self._step['name']
+        )
+        return num_finished > 0
+
+
+    def get_status(self):
+        """
+        Check if all map-reduce jobs have finished.
+
+        Args:
+            self: class instance.
+
+        Returns:
+            Dictionary with status of all map item jobs.
 
         """
         status = {map_item['template']['output']: map_item['status'] for map_item in self._map}
@@ -763,11 +2006,13 @@ class WorkflowStep(StageableData):
                 'STOPPED' state.
 
         """
-        done = [
-            self._is_done(map_item) for map_item in self._map
-        ]
+        if self._stream_open or self._map_files is not None:
+            # more map items may still be added
+            return False
 
-        return all(done)
+        return self._status_counts['FINISHED']\
+            + self._status_counts['FAILED']\
+            + self._status_counts['STOPPED'] == len(self._map)
 
 
     def retry_failed(self):
@@ -788,6 +2033,10 @@ class WorkflowStep(StageableData):
         This method can be overridden for context-specific cleanup.
 
         """
+        if self._result_cache:
+            self._result_cache.close()
+            self._result_cache = None
+
         self._update_status_db('FINISHED', '')
 
         return True